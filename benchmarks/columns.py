@@ -0,0 +1,85 @@
+"""Measures the throughput of scanning text columns.
+
+Flags the documents of a synthetic corpus held as a pandas Series of
+Python strings, a pandas Series of Arrow strings and an Arrow array,
+and finds their words, once with a detect_abuse call per row and once
+with scan_column, and prints the rows per second of every case as JSON.
+
+    $ python benchmarks/columns.py --documents 100000
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Callable
+
+from corpus import make_corpus
+
+from rfwc import RedFlagger
+
+
+def best_time(function: Callable[[], Any], repeat: int) -> float:
+    """The fastest of repeat runs of function, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--length", type=int, default=30)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import pandas as pd
+    import pyarrow as pa
+
+    red_flagger = RedFlagger()
+    corpus = make_corpus(
+        red_flagger, args.documents, args.length, args.density, args.seed
+    )
+    columns = {
+        "Series[object]": pd.Series(corpus, dtype=object),
+        "Series[string[pyarrow]]": pd.Series(corpus, dtype="string[pyarrow]"),
+        "pyarrow.Array": pa.array(corpus, pa.large_string()),
+    }
+
+    def rows(column: Any) -> Any:
+        return column.to_pylist() if isinstance(column, pa.Array) else column
+
+    results = []
+    for name, column in columns.items():
+        for output, return_words in (("mask", False), ("words", True)):
+            cases = {
+                "detect_abuse per row": lambda: [
+                    red_flagger.detect_abuse(row, return_words)
+                    for row in rows(column)
+                ],
+                "scan_column": lambda: red_flagger.scan_column(
+                    column, output, args.batch_size
+                ),
+            }
+            for mode, scan in cases.items():
+                seconds = best_time(scan, args.repeat)
+                results.append(
+                    {
+                        "column": name,
+                        "output": output,
+                        "mode": mode,
+                        "rows": len(column),
+                        "seconds": round(seconds, 4),
+                        "rows_per_second": round(len(column) / seconds),
+                    }
+                )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
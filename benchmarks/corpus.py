@@ -0,0 +1,57 @@
+"""Synthetic corpora for the benchmarks, generated offline from a seed."""
+
+import random
+import string
+
+from rfwc import RedFlagger
+
+
+def made_up_words(
+    red_flagger: RedFlagger, count: int, rng: random.Random
+) -> list[str]:
+    """Random lowercase words that red_flagger doesn't flag."""
+    words: set[str] = set()
+    while len(words) < count:
+        word = "".join(
+            rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))
+        )
+        if not red_flagger.detect_abuse(word, return_words=False):
+            words.add(word)
+    return sorted(words)
+
+
+def made_up_phrases(
+    count: int, rng: random.Random, max_words: int = 3
+) -> list[str]:
+    """Random phrases of one to max_words words, for wordlists."""
+    return [
+        " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+            for _ in range(rng.randint(1, max_words))
+        )
+        for _ in range(count)
+    ]
+
+
+def make_corpus(
+    red_flagger: RedFlagger,
+    documents: int = 5000,
+    length: int = 30,
+    density: float = 0.01,
+    seed: int = 0,
+) -> list[str]:
+    """Documents of made up words, about length words long on average.
+
+    A density fraction of the documents also contains a random phrase from
+    the wordlist of red_flagger, the others are clean.
+    """
+    rng = random.Random(seed)
+    vocabulary = made_up_words(red_flagger, 2000, rng)
+    wordlist = red_flagger.get_wordlist()
+    corpus = []
+    for _ in range(documents):
+        words = rng.choices(vocabulary, k=rng.randint(1, 2 * length - 1))
+        if rng.random() < density:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(wordlist))
+        corpus.append(" ".join(words) + ".")
+    return corpus
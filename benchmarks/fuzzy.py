@@ -0,0 +1,129 @@
+"""Measures the latency fuzzy matching adds to every document.
+
+Scans a synthetic corpus, a fraction of whose documents contain a
+wordlist phrase with one typo, with the exact matcher and with fuzzy
+matching at every max distance, with and without the words of the
+corpus in the cache of similar words, and prints per-document latencies
+as JSON. For reference, a naive scan comparing every word of a sample of
+the documents with every word of the wordlist is timed as well.
+
+    $ python benchmarks/fuzzy.py --documents 2000 --distances 1 2
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+
+from corpus import make_corpus
+
+from rfwc import RedFlagger
+from rfwc.fuzzy import MIN_LENGTH, edit_distance
+
+
+def add_typos(
+    corpus: list[str], words: list[str], density: float, seed: int
+) -> list[str]:
+    """Appends a wordlist word with a typo to a density fraction of the
+    documents."""
+    rng = random.Random(seed)
+    typoed = []
+    for document in corpus:
+        if rng.random() < density:
+            word = rng.choice(words)
+            i = rng.randrange(len(word))
+            word = word[:i] + rng.choice("aeiou") + word[i + 1 :]
+            document = f"{document} {word}"
+        typoed.append(document)
+    return typoed
+
+
+def latencies(scan, corpus: list[str]) -> list[float]:
+    """The time scan takes on every document, in microseconds."""
+    timings = []
+    for document in corpus:
+        start = time.perf_counter()
+        scan(document)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+
+def summary(timings: list[float]) -> dict[str, float]:
+    percentiles = statistics.quantiles(timings, n=100)
+    return {
+        "mean_us": round(statistics.fmean(timings), 1),
+        "p50_us": round(percentiles[49], 1),
+        "p99_us": round(percentiles[98], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--length", type=int, default=30)
+    parser.add_argument("--density", type=float, default=0.05)
+    parser.add_argument("--distances", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--naive-documents", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    exact = RedFlagger(use_cache=False)
+    words = [
+        word
+        for word in exact.get_wordlist()
+        if word.isalpha() and len(word) >= MIN_LENGTH
+    ]
+    corpus = add_typos(
+        make_corpus(exact, args.documents, args.length, 0.0, args.seed),
+        words,
+        args.density,
+        args.seed,
+    )
+    results = [
+        {
+            "mode": "exact",
+            "flagged": sum(exact.detect_abuse(d, False) for d in corpus),
+            **summary(latencies(exact.detect_abuse, corpus)),
+        }
+    ]
+    for distance in args.distances:
+        fuzzy = RedFlagger(max_distance=distance)
+        flagged = sum(fuzzy.detect_abuse(d, False) for d in corpus)
+        similar_cache = fuzzy._matcher._similar_cache
+
+        def cold(document: str) -> list[str]:
+            similar_cache.clear()
+            return fuzzy.detect_abuse(document)
+
+        # Warm: the similar words of the corpus vocabulary are cached, as
+        # for the frequent words of real traffic. Cold: nothing is.
+        for mode, scan in (("warm", fuzzy.detect_abuse), ("cold", cold)):
+            results.append(
+                {
+                    "mode": f"fuzzy, max_distance={distance}, {mode}",
+                    "flagged": flagged,
+                    **summary(latencies(scan, corpus)),
+                }
+            )
+
+    def naive(document: str) -> list[str]:
+        return [
+            word
+            for token in document.lower().split()
+            for word in words
+            if edit_distance(token, word, 1) <= 1
+        ]
+
+    results.append(
+        {
+            "mode": "naive, max_distance=1",
+            "documents": args.naive_documents,
+            **summary(latencies(naive, corpus[: args.naive_documents])),
+        }
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measures the memory held by the wordlist at several sizes.
+
+Compares the Lexicon with the containers the RedFlagger used before it
+(the list of words, the list of ids, the id to word, word to id, id to
+position and lowercase to word dicts, and the list of token counts), with
+every lookup built. The memory of the trie matcher, which is held with
+either wordlist, is measured separately. It keeps no copy of the
+phrases, the Lexicon passes them back to remove them. Prints the sizes as
+JSON.
+
+    $ python benchmarks/lexicon_memory.py --sizes 1000 100000 1000000
+"""
+
+import argparse
+import json
+import random
+import tracemalloc
+from typing import Any, Callable
+
+from corpus import made_up_phrases
+
+from rfwc.matchers import TrieMatcher
+from rfwc.word_index import WordIndex
+
+
+def dict_wordlist(words: list[str]) -> tuple[Any, ...]:
+    """The containers of the wordlist before the Lexicon."""
+    word_ids = list(range(len(words)))
+    return (
+        words,
+        word_ids,
+        dict(enumerate(words)),
+        {word: i for i, word in enumerate(words)},
+        {word_id: i for i, word_id in enumerate(word_ids)},
+        {word.lower(): word for word in words},
+        [len(word.split()) for word in words],
+    )
+
+
+def lexicon_wordlist(words: list[str]) -> WordIndex:
+    """The WordIndex on its Lexicon, with the lookups built."""
+    index = WordIndex(words)
+    index.lexicon.find("")
+    index.lexicon.find("", ignore_case=True)
+    index.positions()
+    return index
+
+
+def retained_bytes(build: Callable[[list[str]], Any], size: int) -> int:
+    """The bytes held by build(words), the words included when kept."""
+    tracemalloc.start()
+    words = made_up_phrases(size, random.Random(0))
+    wordlist = build(words)
+    del words
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del wordlist
+    return retained
+
+
+def trie_bytes(size: int) -> int:
+    """The bytes held by a TrieMatcher of the phrases."""
+    index = WordIndex(made_up_phrases(size, random.Random(0)))
+    words = index.lexicon.words()
+    tracemalloc.start()
+    matcher = TrieMatcher(words, index.lexicon.ids)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del matcher
+    return retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 100000, 1000000]
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        before = retained_bytes(dict_wordlist, size)
+        after = retained_bytes(lexicon_wordlist, size)
+        trie = trie_bytes(size)
+        results.append(
+            {
+                "words": size,
+                "dicts_mb": round(before / 2**20, 2),
+                "lexicon_mb": round(after / 2**20, 2),
+                "bytes_per_word": [before // size, after // size],
+                "ratio": round(before / after, 2),
+                "trie_mb": round(trie / 2**20, 2),
+            }
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Benchmarks the prefilter of the boolean detect_abuse path.
+
+Scans a synthetic, mostly clean corpus with detect_abuse(return_words=False)
+with and without the prefilter, for every matching engine, and prints the
+timings as JSON.
+
+    $ python benchmarks/prefilter.py --documents 5000 --dirty 0.01
+"""
+
+import argparse
+import json
+import time
+
+from corpus import make_corpus
+
+from rfwc import RedFlagger
+from rfwc.matchers import MATCHERS
+
+
+class _NoPrefilter:
+    """Stands in for the prefilter, never rejecting a document."""
+
+    def rejects(self, document: str) -> bool:
+        return False
+
+
+def time_scan(
+    red_flagger: RedFlagger, corpus: list[str]
+) -> tuple[float, list[bool]]:
+    """Returns the time taken to scan the corpus, and the results."""
+    start = time.perf_counter()
+    results = [
+        red_flagger.detect_abuse(document, return_words=False)
+        for document in corpus
+    ]
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--dirty", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = []
+    for name in MATCHERS:
+        red_flagger = RedFlagger(matcher=name)
+        corpus = make_corpus(
+            red_flagger, args.documents, density=args.dirty, seed=args.seed
+        )
+        prefiltered, expected = time_scan(red_flagger, corpus)
+        red_flagger._matcher._prefilter = _NoPrefilter()
+        unfiltered, detected = time_scan(red_flagger, corpus)
+        assert detected == expected, "The prefilter changed the results."
+        results.append(
+            {
+                "matcher": name,
+                "documents": args.documents,
+                "dirty": args.dirty,
+                "flagged": sum(expected),
+                "prefiltered_s": round(prefiltered, 4),
+                "unfiltered_s": round(unfiltered, 4),
+                "speedup": round(unfiltered / prefiltered, 2),
+            }
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
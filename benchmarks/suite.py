@@ -0,0 +1,306 @@
+"""Benchmarks of the RedFlagger hot paths.
+
+Runs offline on synthetic corpora and writes the results as JSON, which can
+be compared with the results of an earlier run:
+
+    $ python benchmarks/suite.py --output new.json
+    $ python benchmarks/suite.py --compare old.json --output new.json
+
+Every benchmark is run --repeat times and the fastest run is reported, as
+the slower ones measure the noise of the machine rather than the code.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import Any, Callable, Iterator, Optional
+
+from corpus import made_up_phrases, make_corpus
+
+import rfwc
+from rfwc import RedFlagger
+from rfwc.normalize import Normalizer
+from rfwc.obscure_data import (
+    obscure,
+    obscure_wordlist,
+    unobscure,
+    unobscure_wordlist,
+)
+from rfwc.utils import filter_overlaps_and_sort
+
+# A benchmark yields (name, parameters, items, function to time).
+Case = tuple[str, dict[str, Any], int, Callable[[], Any]]
+
+BENCHMARKS: dict[str, Callable[[argparse.Namespace], Iterator[Case]]] = {}
+
+
+def benchmark(
+    function: Callable[[argparse.Namespace], Iterator[Case]],
+) -> Callable[[argparse.Namespace], Iterator[Case]]:
+    """Registers a benchmark under its function name."""
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+@benchmark
+def construction(args: argparse.Namespace) -> Iterator[Case]:
+    yield "RedFlagger()", {"cache": False}, 1, RedFlagger
+    cache_dir = tempfile.mkdtemp()
+    try:
+        # Writes the compiled wordlist, the timed runs read it.
+        RedFlagger(use_cache=True, cache_dir=cache_dir)
+        yield "RedFlagger()", {"cache": True}, 1, partial(
+            RedFlagger, use_cache=True, cache_dir=cache_dir
+        )
+    finally:
+        shutil.rmtree(cache_dir)
+
+
+@benchmark
+def filtering(args: argparse.Namespace) -> Iterator[Case]:
+    rng = random.Random(args.seed)
+    for size in args.wordlist_sizes:
+        phrases = made_up_phrases(size, rng)
+        params = {"words": size}
+        yield "filter_overlaps_and_sort", params, size, partial(
+            filter_overlaps_and_sort, phrases
+        )
+
+
+def scan_all(method: Callable[..., Any], corpus: list[Any], *args) -> None:
+    """Calls method on every document of the corpus."""
+    for document in corpus:
+        method(document, *args)
+
+
+def outputs_separately(red_flagger: RedFlagger, corpus: list[str]) -> None:
+    """Gets the flag, the words and the vector of every document with one
+    call (and scan) each."""
+    for document in corpus:
+        red_flagger.detect_abuse(document, return_words=False)
+        red_flagger.detect_abuse(document)
+        red_flagger.get_abuse_vector(document)
+
+
+def outputs_from_scan(red_flagger: RedFlagger, corpus: list[str]) -> None:
+    """Gets the same outputs from a single scan of every document."""
+    for document in corpus:
+        result = red_flagger.scan(document)
+        result.flagged, result.words, result.vector
+
+
+@benchmark
+def detection(args: argparse.Namespace) -> Iterator[Case]:
+    red_flagger = RedFlagger()
+    for density in args.densities:
+        corpus = make_corpus(
+            red_flagger, args.documents, args.length, density, args.seed
+        )
+        params = {
+            "documents": len(corpus),
+            "length": args.length,
+            "density": density,
+        }
+        for return_words in (True, False):
+            case_params = {**params, "return_words": return_words}
+            scan = partial(
+                scan_all, red_flagger.detect_abuse, corpus, return_words
+            )
+            yield "detect_abuse", case_params, len(corpus), scan
+        variants = {
+            "normalized": RedFlagger(normalizer=Normalizer()),
+            "fuzzy": RedFlagger(max_distance=1),
+        }
+        for variant, flagger in variants.items():
+            for return_words in (True, False):
+                case_params = {**params, "return_words": return_words}
+                scan = partial(
+                    scan_all, flagger.detect_abuse, corpus, return_words
+                )
+                yield f"detect_abuse {variant}", case_params, len(corpus), scan
+        for name, scan in (
+            ("flag, words and vector", outputs_separately),
+            ("flag, words and vector from scan", outputs_from_scan),
+        ):
+            scan = partial(scan, red_flagger, corpus)
+            yield name, params, len(corpus), scan
+        for output in ("list", "sparse"):
+            case_params = {**params, "output": output}
+            scan = partial(
+                scan_all, red_flagger.get_abuse_vector, corpus, output
+            )
+            yield "get_abuse_vector", case_params, len(corpus), scan
+
+
+@benchmark
+def categories(args: argparse.Namespace) -> Iterator[Case]:
+    rng = random.Random(args.seed)
+    red_flagger = RedFlagger()
+    corpus = make_corpus(
+        red_flagger, args.documents, args.length, 0.01, args.seed
+    )
+    for count in args.category_counts:
+        red_flagger = RedFlagger(
+            categories={
+                f"list{i}": made_up_phrases(1000, rng) for i in range(count)
+            }
+        )
+        params = {"documents": len(corpus), "categories": count}
+        scan = partial(scan_all, red_flagger.detect_categories, corpus)
+        yield "detect_categories", params, len(corpus), scan
+
+
+@benchmark
+def wordlist_edits(args: argparse.Namespace) -> Iterator[Case]:
+    red_flagger = RedFlagger()
+    words = made_up_phrases(100, random.Random(args.seed))
+
+    def add_and_remove() -> None:
+        red_flagger.add_words(words)
+        red_flagger.remove_words(words)
+
+    params = {"words": len(words)}
+    yield "add_words+remove_words", params, len(words), add_and_remove
+
+
+@benchmark
+def decoding(args: argparse.Namespace) -> Iterator[Case]:
+    with open(RedFlagger.DATA_DIR, "rb") as word_list_file:
+        data = word_list_file.read()
+    words = unobscure_wordlist(data).words
+    lines = [obscure(word) for word in words]
+    params = {"words": len(words)}
+    yield "unobscure", params, len(lines), partial(scan_all, unobscure, lines)
+    yield "obscure", params, len(words), partial(scan_all, obscure, words)
+    yield "unobscure_wordlist", params, len(words), partial(
+        unobscure_wordlist, data
+    )
+    yield "obscure_wordlist", params, len(words), partial(
+        obscure_wordlist, words
+    )
+
+
+def run_case(case: Case, repeat: int) -> dict[str, Any]:
+    """Times a case repeat times, keeps the fastest run."""
+    name, params, items, function = case
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "name": name,
+        "params": params,
+        "seconds": best,
+        "mean_seconds": sum(times) / len(times),
+        "repeat": repeat,
+        "items": items,
+        "items_per_second": items / best if best else None,
+    }
+
+
+def case_key(result: dict[str, Any]) -> str:
+    """Identifies a case between runs."""
+    return json.dumps([result["name"], result["params"]], sort_keys=True)
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: list[dict[str, Any]]
+) -> None:
+    """Prints the time of every case relative to the baseline run."""
+    baseline_seconds = {case_key(r): r["seconds"] for r in baseline}
+    for result in results:
+        old = baseline_seconds.get(case_key(result))
+        ratio = f"{result['seconds'] / old:6.2f}x" if old else "    new"
+        print(
+            f"{ratio}  {result['name']} {json.dumps(result['params'])}",
+            file=sys.stderr,
+        )
+
+
+def set_up_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks of the RedFlagger hot paths."
+    )
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        help="Run these benchmarks only.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument(
+        "--length",
+        type=int,
+        default=30,
+        help="The average number of words per document.",
+    )
+    parser.add_argument(
+        "--densities",
+        type=float,
+        nargs="+",
+        default=[0.0, 0.01, 0.5],
+        help="The fractions of documents containing a wordlist phrase.",
+    )
+    parser.add_argument(
+        "--wordlist-sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 50000],
+    )
+    parser.add_argument(
+        "--category-counts",
+        type=int,
+        nargs="+",
+        default=[1, 4, 16],
+        help="Numbers of named wordlists of 1000 phrases to match.",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--output", help="Write the results to this file, not stdout."
+    )
+    parser.add_argument(
+        "--compare", help="Results of an earlier run to compare with."
+    )
+    return parser
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    args = set_up_parser().parse_args(argv)
+    results = []
+    for name in args.only or BENCHMARKS:
+        for case in BENCHMARKS[name](args):
+            results.append(run_case(case, args.repeat))
+            print(
+                f"{results[-1]['seconds']:10.4f}s  {case[0]}"
+                f" {json.dumps(case[1])}",
+                file=sys.stderr,
+            )
+    report = {
+        "rfwc_version": rfwc.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            compare(results, json.load(baseline_file)["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
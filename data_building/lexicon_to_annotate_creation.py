@@ -1,19 +1,76 @@
 """The goal of this script is to create a file for human review
 which will contain possibly hate/toxic terms"""
 
+import argparse
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterator, Optional
+from urllib.parse import urlparse
+
 import datasets
 import pandas as pd
 import requests
-from helpers import (
-    clean_token_list,
-    initialize_grams,
-    return_list_of_first_item,
-    update_grams,
-)
+from helpers import clean_token_list, return_list_of_first_item
+from ngram_counting import Row, top_ngrams
+
+# Rows of a dataset are read, and their n-grams counted, in shards of
+# this many rows.
+SHARD_SIZE = 10_000
+
+LEXICON_URLS = [
+    "https://raw.githubusercontent.com/dan-hickey1/musk-hate-lexicon/refs/heads/main/hate_keywords.txt",  # noqa: E501
+    "https://raw.githubusercontent.com/hate-alert/HateBegetsHate_CSCW2020/refs/heads/master/HateLexicons.txt",  # noqa: E501
+    "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/hate.txt",  # noqa: E501
+    # TODO: something is odd about this raw file.
+    # When you visit it in browser, it immediately begins a download.
+    # "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/abuse.txt",  # noqa: E501
+    "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/toxic.txt",  # noqa: E501
+    "https://raw.githubusercontent.com/LDNOOBW/List-of-Dirty-Naughty-Obscene-and-Otherwise-Bad-Words/refs/heads/master/en",  # noqa: E501
+]
+
+
+def labelled_shards(
+    dataset: Any,
+    text_column: str,
+    label_column: str,
+    keep: Callable[[Any], bool],
+    shard_size: int = SHARD_SIZE,
+) -> Iterator[list[Row]]:
+    """Yields the texts of the rows of a dataset whose label is kept, in
+    shards. Rows are read shard_size at a time, as columns, which is much
+    faster than row by row and also works for streamed datasets."""
+    for batch in dataset.iter(batch_size=shard_size):
+        shard = [
+            text
+            for text, label in zip(batch[text_column], batch[label_column])
+            if keep(label)
+        ]
+        if shard:
+            yield shard
+
+
+def top_dataset_ngrams(
+    shards: Iterator[list[Row]],
+    unigram_n: int,
+    bigram_n: int,
+    trigram_n: int,
+    workers: Optional[int],
+) -> tuple[list[str], list[str], list[str]]:
+    """The most common n-grams of the shards, without their counts."""
+    return return_list_of_first_item(
+        *top_ngrams(shards, unigram_n, bigram_n, trigram_n, workers)
+    )
 
 
 def process_hso_dataset(
-    unigram_n: int = 500, bigram_n: int = 300, trigram_n: int = 200
+    unigram_n: int = 500,
+    bigram_n: int = 300,
+    trigram_n: int = 200,
+    workers: Optional[int] = None,
+    shard_size: int = SHARD_SIZE,
+    streaming: bool = False,
 ) -> tuple[list[str], list[str], list[str]]:
     """Processing the Hate Speech Offensive Dataset
     from Davidson et al. (2017).
@@ -29,27 +86,28 @@ def process_hso_dataset(
     }
     """
     # from hatebase.org
-    hso_dataset = datasets.load_dataset("tdavidson/hate_speech_offensive")
-    unigrams, bigrams, trigrams = initialize_grams()
-    for item in hso_dataset["train"]:
-        if item["class"] in [0, 1]:
-            # 0: Hate
-            # 1: Offensive
-            words = clean_token_list(item["tweet"].split())
-
-            unigrams, bigrams, trigrams = update_grams(
-                words, unigrams, bigrams, trigrams
-            )
-
-    return return_list_of_first_item(
-        unigrams.most_common(unigram_n),
-        bigrams.most_common(bigram_n),
-        trigrams.most_common(trigram_n),
+    hso_dataset = datasets.load_dataset(
+        "tdavidson/hate_speech_offensive", split="train", streaming=streaming
     )
+    # 0: Hate
+    # 1: Offensive
+    shards = labelled_shards(
+        hso_dataset,
+        "tweet",
+        "class",
+        lambda label: label in [0, 1],
+        shard_size,
+    )
+    return top_dataset_ngrams(shards, unigram_n, bigram_n, trigram_n, workers)
 
 
 def process_tx_dataset(
-    unigram_n: int = 500, bigram_n: int = 300, trigram_n: int = 200
+    unigram_n: int = 500,
+    bigram_n: int = 300,
+    trigram_n: int = 200,
+    workers: Optional[int] = None,
+    shard_size: int = SHARD_SIZE,
+    streaming: bool = False,
 ) -> tuple[list[str], list[str], list[str]]:
     """Processing the Toxic Chat Dataset from Lin et al. (2023).
 
@@ -64,25 +122,29 @@ def process_tx_dataset(
         'openai_moderation': list[list[str, float]]
     }
     """
-    tx_dataset = datasets.load_dataset("lmsys/toxic-chat", "toxicchat0124")
-    unigrams, bigrams, trigrams = initialize_grams()
-    for item in tx_dataset["train"]:
-        if item["toxicity"] == 1:
-            words = clean_token_list(item["user_input"].split())
-
-            unigrams, bigrams, trigrams = update_grams(
-                words, unigrams, bigrams, trigrams
-            )
-
-    return return_list_of_first_item(
-        unigrams.most_common(unigram_n),
-        bigrams.most_common(bigram_n),
-        trigrams.most_common(trigram_n),
+    tx_dataset = datasets.load_dataset(
+        "lmsys/toxic-chat",
+        "toxicchat0124",
+        split="train",
+        streaming=streaming,
+    )
+    shards = labelled_shards(
+        tx_dataset,
+        "user_input",
+        "toxicity",
+        lambda label: label == 1,
+        shard_size,
     )
+    return top_dataset_ngrams(shards, unigram_n, bigram_n, trigram_n, workers)
 
 
 def process_xplain_dataset(
-    unigram_n: int = 500, bigram_n: int = 300, trigram_n: int = 200
+    unigram_n: int = 500,
+    bigram_n: int = 300,
+    trigram_n: int = 200,
+    workers: Optional[int] = None,
+    shard_size: int = SHARD_SIZE,
+    streaming: bool = False,
 ) -> tuple[list[str], list[str], list[str]]:
     """Processing the HateXplain Dataset from Mathew et al. (2021).
 
@@ -100,32 +162,33 @@ def process_xplain_dataset(
     }
     """
     hxplain = datasets.load_dataset(
-        "Hate-speech-CNERG/hatexplain", trust_remote_code=True
+        "Hate-speech-CNERG/hatexplain",
+        split="train",
+        streaming=streaming,
+        trust_remote_code=True,
     )
 
-    unigrams, bigrams, trigrams = initialize_grams()
-    for item in hxplain["train"]:
-        annotations = item["annotators"]["label"]  # list of label
-        if 0 in annotations or 2 in annotations:
-            # 0: Hate
-            # 2: Offensive
-            # If any annotator found the text offensive, we are using it
-            words = clean_token_list(item["post_tokens"])
-
-            # adding to each
-            unigrams, bigrams, trigrams = update_grams(
-                words, unigrams, bigrams, trigrams
-            )
+    def keep(annotators: dict[str, list]) -> bool:
+        annotations = annotators["label"]  # list of label
+        # 0: Hate
+        # 2: Offensive
+        # If any annotator found the text offensive, we are using it
+        return 0 in annotations or 2 in annotations
 
-    return return_list_of_first_item(
-        unigrams.most_common(unigram_n),
-        bigrams.most_common(bigram_n),
-        trigrams.most_common(trigram_n),
+    # The posts are already tokenized.
+    shards = labelled_shards(
+        hxplain, "post_tokens", "annotators", keep, shard_size
     )
+    return top_dataset_ngrams(shards, unigram_n, bigram_n, trigram_n, workers)
 
 
 def process_offensive_dataset(
-    unigram_n: int = 500, bigram_n: int = 300, trigram_n: int = 200
+    unigram_n: int = 500,
+    bigram_n: int = 300,
+    trigram_n: int = 200,
+    workers: Optional[int] = None,
+    shard_size: int = SHARD_SIZE,
+    streaming: bool = False,
 ) -> tuple[list[str], list[str], list[str]]:
     """A Dataset of offensive language that is made from
     the OLID dataset (Zampieri et al., 2019) and the labels from
@@ -139,28 +202,31 @@ def process_offensive_dataset(
     }
     """
     offensive_dataset = datasets.load_dataset(
-        "christinacdl/offensive_language_dataset"
+        "christinacdl/offensive_language_dataset",
+        split="train",
+        streaming=streaming,
+    )
+    # 1: Offensive
+    shards = labelled_shards(
+        offensive_dataset,
+        "text",
+        "label",
+        lambda label: label == 1,
+        shard_size,
     )
+    return top_dataset_ngrams(shards, unigram_n, bigram_n, trigram_n, workers)
 
-    unigrams, bigrams, trigrams = initialize_grams()
-    for item in offensive_dataset["train"]:
-        if item["label"] == 1:
-            # 1: Offensive
-            words = clean_token_list(item["text"].split())
 
-            # adding to each
-            unigrams, bigrams, trigrams = update_grams(
-                words, unigrams, bigrams, trigrams
-            )
-
-    return return_list_of_first_item(
-        unigrams.most_common(unigram_n),
-        bigrams.most_common(bigram_n),
-        trigrams.most_common(trigram_n),
-    )
+def lexicon_cache_path(url: str, cache_dir: str) -> str:
+    """Where the word list downloaded from url is kept in cache_dir."""
+    digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+    name = os.path.basename(urlparse(url).path)
+    return os.path.join(cache_dir, f"{digest}-{name}")
 
 
-def download_github_wordlist(url: str) -> set[str]:
+def download_github_wordlist(
+    url: str, cache_dir: Optional[str] = None
+) -> set[str]:
     """Downloads a word list from a raw github URL
 
     There's an underlying assumption about the format of the content of the URL
@@ -170,46 +236,98 @@ def download_github_wordlist(url: str) -> set[str]:
     <Word 2>
     ...
     <Word N>
+
+    If cache_dir is given, the word list is kept there and later calls
+    read it from there, so reruns work offline. An empty set is returned
+    if the download fails.
     """
-    response = requests.get(url)
-    if response.status_code == 200:
-        wordlist = response.text.split("\n")
-        cleaned_wordlist = clean_token_list(wordlist)
-        return set(cleaned_wordlist)
+    path = lexicon_cache_path(url, cache_dir) if cache_dir else None
+    if path is not None and os.path.exists(path):
+        with open(path, encoding="utf-8") as cached:
+            text = cached.read()
     else:
-        print(f"Failed to get file from {url}. Code: {response.status_code}.")
-
-
-if __name__ == "__main__":
-    # Getting the top ngrams from each corpus.
-    hso_unigrams, hso_bigrams, hso_trigrams = process_hso_dataset()
-    tx_unigrams, tx_bigrams, tx_trigrams = process_tx_dataset()
-    xplain_unigrams, xplain_bigrams, xplain_trigrams = process_xplain_dataset()
-    offensive_unigrams, offensive_bigrams, offensive_trigrams = (
-        process_offensive_dataset()
-    )
-
-    # Getting the lexicons of toxicity from open-source libraries.
-    musk_hate = download_github_wordlist(
-        "https://raw.githubusercontent.com/dan-hickey1/musk-hate-lexicon/refs/heads/main/hate_keywords.txt"  # noqa: E501
+        try:
+            response = requests.get(url, timeout=60)
+        except requests.RequestException as error:
+            print(f"Failed to get file from {url}. Error: {error}.")
+            return set()
+        if response.status_code != 200:
+            print(
+                f"Failed to get file from {url}."
+                f" Code: {response.status_code}."
+            )
+            return set()
+        text = response.text
+        if path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Written whole, then moved, so no partial file is ever cached.
+            with open(f"{path}.tmp", "w", encoding="utf-8") as cached:
+                cached.write(text)
+            os.replace(f"{path}.tmp", path)
+    return set(clean_token_list(text.split("\n")))
+
+
+def set_up_parser() -> argparse.ArgumentParser:
+    """Set up the argument parser for the CLI."""
+    parser = argparse.ArgumentParser(
+        prog="LexiconToAnnotateCreation",
+        description="Creates the sheet of possibly hateful or toxic terms"
+        " to annotate, from the most frequent n-grams of hateful and toxic"
+        " corpora and from open-source lexicons.",
     )
-    gab_hate = download_github_wordlist(
-        "https://raw.githubusercontent.com/hate-alert/HateBegetsHate_CSCW2020/refs/heads/master/HateLexicons.txt"  # noqa: E501
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of processes counting n-grams, by default one per"
+        " CPU.",
     )
-    gst_hate = download_github_wordlist(
-        "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/hate.txt"  # noqa: E501
+    parser.add_argument(
+        "--shard_size",
+        type=int,
+        default=SHARD_SIZE,
+        help="The number of rows counted at a time by a process.",
     )
-    # TODO: something is odd about this raw file.
-    # When you visit it in browser, it immediately begins a download.
-    # gst_abuse = download_github_wordlist(
-    #     "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/abuse.txt" # noqa: E501
-    # )
-    gst_toxic = download_github_wordlist(
-        "https://raw.githubusercontent.com/martinigoyanes/LexiconGST/refs/heads/main/data/lexicons/toxic.txt"  # noqa: E501
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stream the datasets rather than downloading them first.",
     )
-    shutter_stock_hate = download_github_wordlist(
-        "https://raw.githubusercontent.com/LDNOOBW/List-of-Dirty-Naughty-Obscene-and-Otherwise-Bad-Words/refs/heads/master/en"  # noqa: E501
+    parser.add_argument(
+        "--cache_dir",
+        default=os.path.join(os.path.dirname(__file__), "lexicon_cache"),
+        help="Where downloaded lexicons are kept for later runs. Delete it"
+        " to download them again.",
     )
+    return parser
+
+
+if __name__ == "__main__":
+    args = set_up_parser().parse_args()
+    options = {
+        "workers": args.workers,
+        "shard_size": args.shard_size,
+        "streaming": args.streaming,
+    }
+    # Getting the lexicons of toxicity from open-source libraries, all at
+    # once and while the corpora are processed.
+    with ThreadPoolExecutor(max_workers=len(LEXICON_URLS)) as downloads:
+        lexicons = downloads.map(
+            partial(download_github_wordlist, cache_dir=args.cache_dir),
+            LEXICON_URLS,
+        )
+
+        # Getting the top ngrams from each corpus.
+        hso_unigrams, hso_bigrams, hso_trigrams = process_hso_dataset(
+            **options
+        )
+        tx_unigrams, tx_bigrams, tx_trigrams = process_tx_dataset(**options)
+        xplain_unigrams, xplain_bigrams, xplain_trigrams = (
+            process_xplain_dataset(**options)
+        )
+        offensive_unigrams, offensive_bigrams, offensive_trigrams = (
+            process_offensive_dataset(**options)
+        )
+        musk_hate, gab_hate, gst_hate, gst_toxic, shutter_stock_hate = lexicons
 
     # getting rid of overlaps
     all_unigrams = list(
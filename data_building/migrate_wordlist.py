@@ -0,0 +1,61 @@
+"""A script to convert a wordlist from the line format to the bulk format.
+
+The line format, written by earlier versions of
+post_annotation_processing.py, holds one separately obscured word per
+line. The bulk format (see rfwc.obscure_data.obscure_wordlist) holds the
+whole wordlist in a single obscured blob, which decodes in one pass.
+"""
+
+import argparse
+import os
+
+from rfwc.obscure_data import (
+    ObscuringError,
+    obscure_wordlist,
+    unobscure,
+    unobscure_wordlist,
+)
+from rfwc.utils import filter_overlaps_and_sort
+
+
+def set_up_parser() -> argparse.ArgumentParser:
+    """Set up the argument parser for the CLI."""
+    parser = argparse.ArgumentParser(
+        prog="MigrateWordlist",
+        description="Converts a wordlist with one obscured word per line"
+        " to the bulk obscured wordlist format.",
+    )
+    parser.add_argument("filename", help="The path to the line format file.")
+    parser.add_argument("out_file", help="The name of the file to write to.")
+    parser.add_argument(
+        "--no_filter",
+        action="store_true",
+        help="Keep the words as they are, rather than storing the output of"
+        " filter_overlaps_and_sort (which lets loading skip filtering).",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    args = set_up_parser().parse_args()
+    if not os.path.exists(args.filename):
+        raise ValueError(
+            "The file name provided does not exist."
+            f" File name: {args.filename}"
+        )
+
+    with open(args.filename, "rb") as line_file:
+        words = [unobscure(line) for line in line_file if line.strip()]
+    print(f"Words read: {len(words)}.")
+    if not args.no_filter:
+        words = filter_overlaps_and_sort(words)
+        print(f"Length after overlap filtering: {len(words)}.")
+
+    obscured = obscure_wordlist(words, filtered=not args.no_filter)
+    # This really shouldn't happen, this check doesn't cost much though.
+    if unobscure_wordlist(obscured).words != words:
+        raise ObscuringError("Encoding changed the wordlist.")
+
+    with open(args.out_file, "wb") as out_file:
+        out_file.write(obscured)
+    print(f"Obscured word list written to {args.out_file}")
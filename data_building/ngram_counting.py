@@ -0,0 +1,241 @@
+"""Counting the most frequent n-grams of large corpora in bounded memory.
+
+Counting every n-gram of a corpus exactly takes memory in the number of
+distinct n-grams, most of which occur once. Instead, the corpus is read
+as a stream of shards, which are counted exactly by a pool of worker
+processes. Every counted shard is folded into a count-min sketch, a
+fixed size table of counters which never underestimates a count, and only
+its most frequent n-grams are kept as candidates. The workers add their
+counts to one set of tables in shared memory, so a shard only sends its
+candidates back, and the top candidates are ranked by their counts in the
+shared tables.
+
+An n-gram which is frequent overall but never among the capacity most
+frequent of a shard is missed, so the capacity is kept a multiple of the
+number of n-grams wanted.
+"""
+
+import heapq
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import nullcontext
+from hashlib import blake2b
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, ContextManager, Iterable, Optional, Union
+
+import numpy as np
+from helpers import clean_token_list, initialize_grams, update_grams
+
+from rfwc.shared import attach_shared_memory
+
+# Rows are texts, split on whitespace, or lists of tokens.
+Row = Union[str, list[str]]
+# Unigrams are words, longer n-grams tuples of words.
+Ngram = Union[str, tuple[str, ...]]
+
+SKETCH_WIDTH = 1 << 18
+SKETCH_DEPTH = 4
+# Candidates kept per n-gram wanted.
+CAPACITY_FACTOR = 10
+
+
+def _hashes(ngrams: list[Ngram]) -> np.ndarray:
+    """A 64 bit hash of every n-gram, the same in every process (unlike
+    hash(), which is salted per process)."""
+    digests = b"".join(
+        blake2b(
+            ("\x1f".join(ngram) if isinstance(ngram, tuple) else ngram).encode(
+                "utf-8", "surrogatepass"
+            ),
+            digest_size=8,
+        ).digest()
+        for ngram in ngrams
+    )
+    return np.frombuffer(digests, dtype=np.uint64)
+
+
+class NgramSketch:
+    """The approximate counts of the n-grams of a corpus, and the ones
+    most likely to be the most frequent, in memory independent of the
+    size of the corpus.
+
+    Every n-gram is counted in depth rows of width counters, at columns
+    picked by its hash, and its estimated count is the smallest of them,
+    which exceeds its true count by the counts of the n-grams it collides
+    with.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        width: int = SKETCH_WIDTH,
+        depth: int = SKETCH_DEPTH,
+        table: Optional[np.ndarray] = None,
+    ):
+        self.capacity = capacity
+        # A table of another sketch, e.g. in shared memory, can be used.
+        self.table = (
+            np.zeros((depth, width), dtype=np.int64)
+            if table is None
+            else table
+        )
+        self.candidates: set[Ngram] = set()
+
+    def _columns(self, ngrams: list[Ngram]) -> np.ndarray:
+        """The column of every n-gram in every row, by double hashing."""
+        hashes = _hashes(ngrams)
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.table.shape[0], dtype=np.uint64)[:, None]
+        return ((low + rows * high) % np.uint64(self.table.shape[1])).astype(
+            np.intp
+        )
+
+    def update(
+        self, counts: Counter, lock: Optional[ContextManager] = None
+    ) -> None:
+        """Adds exact counts, e.g. of a shard, to the sketch. lock is held
+        while writing to the table, if it is shared."""
+        if not counts:
+            return
+        ngrams = list(counts)
+        columns = self._columns(ngrams)
+        values = np.fromiter(counts.values(), np.int64, len(ngrams))
+        with lock or nullcontext():
+            for row, row_columns in zip(self.table, columns):
+                np.add.at(row, row_columns, values)
+        self.candidates.update(
+            ngram for ngram, _ in counts.most_common(self.capacity)
+        )
+        self._prune()
+
+    def add_candidates(self, candidates: Iterable[Ngram]) -> None:
+        """Adds the candidates of a sketch sharing the same table."""
+        self.candidates.update(candidates)
+        self._prune()
+
+    def estimate(self, ngrams: list[Ngram]) -> np.ndarray:
+        """The estimated count of every n-gram."""
+        if not ngrams:
+            return np.zeros(0, dtype=np.int64)
+        columns = self._columns(ngrams)
+        return np.take_along_axis(self.table, columns, axis=1).min(axis=0)
+
+    def most_common(self, n: int) -> list[tuple[Ngram, int]]:
+        """The n candidates with the highest estimated counts, like
+        Counter.most_common."""
+        candidates = list(self.candidates)
+        counts = self.estimate(candidates).tolist()
+        return heapq.nlargest(
+            n, zip(candidates, counts), key=lambda item: item[1]
+        )
+
+    def _prune(self) -> None:
+        # Pruning rescans the candidates, so it's done once they reach
+        # twice the capacity rather than at every update.
+        if len(self.candidates) > 2 * self.capacity:
+            self.candidates = {
+                ngram for ngram, _ in self.most_common(self.capacity)
+            }
+
+
+# The tables of the unigram, bigram and trigram sketches in shared memory,
+# and the lock guarding them, in every worker.
+_shared: Optional[SharedMemory] = None
+_tables: Optional[np.ndarray] = None
+_lock: Any = None
+
+
+def _init_worker(name: str, shape: tuple[int, ...], lock: Any) -> None:
+    global _shared, _tables, _lock
+    _shared = attach_shared_memory(name)
+    _tables = np.ndarray(shape, dtype=np.int64, buffer=_shared.buf)
+    _lock = lock
+
+
+def count_shard(
+    rows: list[Row], capacities: tuple[int, int, int]
+) -> tuple[set[Ngram], set[Ngram], set[Ngram]]:
+    """Counts the unigrams, bigrams and trigrams of a shard of rows into
+    the shared tables, returns the candidates of the shard."""
+    unigrams, bigrams, trigrams = initialize_grams()
+    for row in rows:
+        words = clean_token_list(row.split() if isinstance(row, str) else row)
+        update_grams(words, unigrams, bigrams, trigrams)
+    candidates = []
+    for capacity, table, counts in zip(
+        capacities, _tables, (unigrams, bigrams, trigrams)
+    ):
+        sketch = NgramSketch(capacity, table=table)
+        sketch.update(counts, _lock)
+        candidates.append(sketch.candidates)
+    return tuple(candidates)
+
+
+def top_ngrams(
+    shards: Iterable[list[Row]],
+    unigram_n: int = 500,
+    bigram_n: int = 300,
+    trigram_n: int = 200,
+    workers: Optional[int] = None,
+    width: int = SKETCH_WIDTH,
+    depth: int = SKETCH_DEPTH,
+) -> tuple[
+    list[tuple[str, int]],
+    list[tuple[tuple[str, ...], int]],
+    list[tuple[tuple[str, ...], int]],
+]:
+    """The most common unigrams, bigrams and trigrams of the rows of
+    shards, with their estimated counts, counted in a pool of worker
+    processes.
+
+    At most two shards per worker are in flight at any time, so memory use
+    depends on the size of the shards and of the sketches, and not on the
+    size of the corpus.
+    """
+    workers = workers or os.cpu_count() or 1
+    wanted = (unigram_n, bigram_n, trigram_n)
+    capacities = tuple(CAPACITY_FACTOR * n for n in wanted)
+    shape = (len(wanted), depth, width)
+    shared = SharedMemory(
+        create=True, size=int(np.prod(shape)) * np.dtype(np.int64).itemsize
+    )
+    try:
+        tables = np.ndarray(shape, dtype=np.int64, buffer=shared.buf)
+        tables[:] = 0
+        totals = tuple(
+            NgramSketch(capacity, table=table)
+            for capacity, table in zip(capacities, tables)
+        )
+        shards = iter(shards)
+        pending: deque[Future] = deque()
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(shared.name, shape, multiprocessing.Lock()),
+        ) as executor:
+
+            def submit_next() -> bool:
+                shard = next(shards, None)
+                if shard is None:
+                    return False
+                pending.append(executor.submit(count_shard, shard, capacities))
+                return True
+
+            while len(pending) < 2 * workers and submit_next():
+                pass
+            while pending:
+                candidates = pending.popleft().result()
+                submit_next()
+                for total, shard_candidates in zip(totals, candidates):
+                    total.add_candidates(shard_candidates)
+        result = tuple(
+            total.most_common(n) for total, n in zip(totals, wanted)
+        )
+        del tables, totals
+    finally:
+        shared.close()
+        shared.unlink()
+    return result
@@ -4,14 +4,18 @@ import argparse
 import os
 import pandas as pd
 
-from rfwc.obscure_data import obscure, unobscure, ObscuringError
+from rfwc.obscure_data import (
+    ObscuringError,
+    obscure_wordlist,
+    unobscure_wordlist,
+)
 from rfwc.utils import filter_overlaps_and_sort
 
 OUT_FILEPATH = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
     "rfwc",
     "data",
-    "toxic_keywords_b16.txt",
+    "toxic_keywords.rfwc",
 )
 
 
@@ -108,11 +112,11 @@ if __name__ == "__main__":
     unique_toxic_words_only = filter_overlaps_and_sort(toxic_words_only)
     print(f"Length after overlap filtering: {len(unique_toxic_words_only)}.")
 
-    # Obscuring each word.
-    encoded_words = [obscure(word) for word in unique_toxic_words_only]
+    # Obscuring the whole wordlist, recording that it is filtered.
+    encoded_words = obscure_wordlist(unique_toxic_words_only, filtered=True)
 
     # This really shouldn't happen, this check doesn't cost much though.
-    decoded_words = [unobscure(word) for word in encoded_words]
+    decoded_words = unobscure_wordlist(encoded_words).words
     for orig_word, decoded_word in zip(unique_toxic_words_only, decoded_words):
         if orig_word != decoded_word:
             raise ObscuringError(
@@ -121,7 +125,5 @@ if __name__ == "__main__":
 
     # Writing out.
     with open(args.out_file, "wb") as toxic_file:
-        for encoded_word in encoded_words:
-            toxic_file.write(encoded_word)
-            toxic_file.write(b"\n")
+        toxic_file.write(encoded_words)
     print(f"Obscured word list written to {args.out_file}")
@@ -43,8 +43,8 @@ def predict_offensive_dataset():
         "christinacdl/offensive_language_dataset"
     )
     predicted_labels = [
-        1 if AF.detect_abuse(item["text"], return_words=False) else 0
-        for item in offensive_dataset["test"]
+        1 if flagged else 0
+        for flagged in AF.scan_column(offensive_dataset["test"]["text"])
     ]
     print("Prediction on christinacdl/offensive_language_dataset done.")
     return _get_metrics(offensive_dataset["test"]["label"], predicted_labels)
@@ -71,19 +71,20 @@ def predict_xplain_dataset():
         "Hate-speech-CNERG/hatexplain", trust_remote_code=True
     )
     gold_labels = []
-    pred_labels = []
+    texts = []
     for item in hxplain["test"]:
         annotations = item["annotators"]["label"]  # list of label
-        text = " ".join(item["post_tokens"])
+        texts.append(" ".join(item["post_tokens"]))
         if 0 in annotations or 2 in annotations:
             # 0: Hate, 2: Offensive
             # If any annotator found the text offensive, it is a positive class
             gold_labels.append(1)
         else:
             gold_labels.append(0)
-        pred_labels.append(
-            1 if AF.detect_abuse(text, return_words=False) else 0
-        )
+    pred_labels = [
+        1 if flagged else 0
+        for flagged in AF.detect_abuse_many(texts, return_words=False)
+    ]
     print("Prediction on Hate-speech-CNERG/hatexplain done.")
     return _get_metrics(gold_labels, pred_labels)
 
@@ -105,8 +106,8 @@ def predict_tx_dataset():
     """
     tx_dataset = datasets.load_dataset("lmsys/toxic-chat", "toxicchat0124")
     pred_labels = [
-        1 if AF.detect_abuse(item["user_input"], return_words=False) else 0
-        for item in tx_dataset["test"]
+        1 if flagged else 0
+        for flagged in AF.scan_column(tx_dataset["test"]["user_input"])
     ]
     print("Prediction on lmsys/toxic-chat done.")
     return _get_metrics(tx_dataset["test"]["toxicity"], pred_labels)
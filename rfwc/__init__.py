@@ -1 +1,4 @@
+__version__ = "0.1.0"
+
 from .red_flagger import RedFlagger  # noqa: F401
+from .async_flagger import AsyncRedFlagger  # noqa: F401
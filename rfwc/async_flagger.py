@@ -0,0 +1,249 @@
+"""An asyncio front end to the RedFlagger.
+
+Matching is CPU bound, so calling detect_abuse from a coroutine blocks the
+event loop. AsyncRedFlagger runs the matching on an executor instead.
+Single documents awaited at about the same time are gathered into micro
+batches, so the executor is not called once per document, and a bounded
+queue makes callers wait when the executor falls behind. Batches are
+scanned concurrently, as many at a time as the executor has workers.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Iterable, Optional, Union
+
+from .parallel import _init_worker, _scan_chunk
+from .red_flagger import RedFlagger
+from .utils import chunked
+
+Result = Union[list[str], bool]
+
+
+class AsyncRedFlagger:
+    """Awaitable detect_abuse and detect_abuse_many.
+
+    red_flagger defaults to a new RedFlagger. Work runs on threads threads
+    by default, on that many worker processes if processes is given, or on
+    the given executor, which is left running by aclose. A process pool
+    given as executor receives the RedFlagger with every batch, processes
+    sends it to every worker once. Documents awaited within batch_window
+    seconds of each other are scanned together, up to max_batch_size at a
+    time, and as many batches are scanned at once as the executor has
+    workers. At most max_pending documents wait to be scanned, further
+    callers wait for room.
+
+    Use it as an async context manager, or call aclose when done.
+    """
+
+    def __init__(
+        self,
+        red_flagger: Optional[RedFlagger] = None,
+        processes: Optional[int] = None,
+        batch_window: float = 0.002,
+        max_batch_size: int = 256,
+        max_pending: int = 4096,
+        threads: int = 1,
+        executor: Optional[Executor] = None,
+    ):
+        if max_batch_size < 1 or max_pending < 1 or threads < 1:
+            raise ValueError(
+                "max_batch_size, max_pending and threads must be positive."
+            )
+        if processes and executor is not None:
+            raise ValueError(
+                "Only one of processes and executor can be given."
+            )
+        self._red_flagger = red_flagger or RedFlagger()
+        self._processes = processes
+        self._threads = threads
+        self._batch_window = batch_window
+        self._max_batch_size = max_batch_size
+        self._max_pending = max_pending
+        self._executor = executor
+        # A given executor is the caller's to shut down.
+        self._owns_executor = executor is None
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        # Taken by every batch scanning, so no more batches are submitted
+        # than the executor can run.
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._scanning: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "AsyncRedFlagger":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _workers(self) -> int:
+        """The number of batches the executor runs at once."""
+        if self._processes:
+            return self._processes
+        if self._owns_executor:
+            return self._threads
+        # Both executors of concurrent.futures keep it there.
+        return getattr(self._executor, "_max_workers", None) or 1
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self._processes:
+                # Every worker receives the RedFlagger once.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self._processes,
+                    initializer=_init_worker,
+                    initargs=(self._red_flagger,),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self._threads)
+        return self._executor
+
+    async def _run_chunk(
+        self, chunk: list[str], return_words: bool
+    ) -> list[Result]:
+        """Scans a chunk of documents on the executor."""
+        loop = asyncio.get_running_loop()
+        if self._processes:
+            function = _scan_chunk
+        else:
+            function = self._red_flagger._detect_abuse_chunk
+        return await loop.run_in_executor(
+            self._get_executor(), function, chunk, return_words
+        )
+
+    async def _submit(
+        self, chunk: list[str], return_words: bool
+    ) -> asyncio.Task:
+        """Waits for a free worker, then scans a chunk in a task of its
+        own, which frees the worker when done."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._workers())
+        slots = self._slots
+        await slots.acquire()
+        task = asyncio.get_running_loop().create_task(
+            self._run_chunk(chunk, return_words)
+        )
+        self._scanning.add(task)
+        task.add_done_callback(self._scanning.discard)
+        task.add_done_callback(lambda _: slots.release())
+        return task
+
+    async def detect_abuse(
+        self, document: str, return_words: bool = True
+    ) -> Result:
+        """Awaitable RedFlagger.detect_abuse, scanned in a micro batch.
+
+        Cancelling the call drops the document if it wasn't scanned yet.
+        """
+        if self._batcher is None or self._batcher.done():
+            self._queue = asyncio.Queue(maxsize=self._max_pending)
+            self._batcher = asyncio.get_running_loop().create_task(
+                self._batch_forever()
+            )
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, return_words, future))
+        return await future
+
+    async def detect_abuse_many(
+        self, documents: Iterable[str], return_words: bool = True
+    ) -> list[Result]:
+        """Awaitable RedFlagger.detect_abuse_many, returns a list.
+
+        The documents are scanned in chunks of max_batch_size, as many at
+        once as the executor has workers, so a long call can be cancelled
+        in between chunks.
+        """
+        results: list[Result] = []
+        pending: deque[asyncio.Task] = deque()
+        try:
+            for chunk in chunked(documents, self._max_batch_size):
+                pending.append(await self._submit(chunk, return_words))
+                while pending and pending[0].done():
+                    results.extend(pending.popleft().result())
+            while pending:
+                results.extend(await pending.popleft())
+        finally:
+            for task in pending:
+                task.cancel()
+        return results
+
+    async def _next_batch(self) -> list[tuple[str, bool, asyncio.Future]]:
+        """Waits for a document, then gathers the ones that follow it
+        within the batch window."""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self._batch_window
+        while len(batch) < self._max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), timeout)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _batch_forever(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            for return_words in (True, False):
+                items = [
+                    (document, future)
+                    for document, words, future in batch
+                    if words == return_words and not future.cancelled()
+                ]
+                if not items:
+                    continue
+                # Not awaited, so the next batch is gathered meanwhile.
+                task = await self._submit(
+                    [document for document, _ in items], return_words
+                )
+                task.add_done_callback(
+                    partial(_resolve, [future for _, future in items])
+                )
+
+    async def aclose(self) -> None:
+        """Stops the batching and shuts the executor down, unless it was
+        given."""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        # Batches being scanned, which cancels their documents.
+        scanning = list(self._scanning)
+        for task in scanning:
+            task.cancel()
+        await asyncio.gather(*scanning, return_exceptions=True)
+        if self._queue is not None:
+            # Documents that never made it into a batch.
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                future.cancel()
+        self._slots = None
+        if self._executor is not None and self._owns_executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _resolve(futures: list[asyncio.Future], task: asyncio.Task) -> None:
+    """Passes the results, error or cancellation of a scanned batch on to
+    the futures of its documents."""
+    if task.cancelled():
+        for future in futures:
+            future.cancel()
+        return
+    error = task.exception()
+    for i, future in enumerate(futures):
+        if future.done():
+            continue
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(task.result()[i])
@@ -0,0 +1,114 @@
+"""Scanning of bytes-like buffers and memory-mapped files.
+
+Large UTF-8 inputs are not read into one Python string. They are cut into
+blocks of about block_size bytes at line breaks, every block is decoded
+and matched on its own, and the character offsets of the matches are
+translated back to byte offsets into the buffer. Phrases never contain a
+line break and a line break is not a word character, so cutting at line
+breaks finds exactly the matches a scan of the whole text would find.
+
+Bytes that are not valid UTF-8 are decoded with surrogateescape, which
+keeps one character per invalid byte so byte offsets stay exact.
+"""
+
+import mmap
+import os
+from typing import Iterator, Union
+
+from .matchers import Matcher
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# (start byte, end byte, index into the wordlist)
+ByteMatch = tuple[int, int, int]
+
+DEFAULT_BLOCK_SIZE = 1 << 20
+
+# Bytes copied at a time when looking for line breaks in a memoryview.
+_SEARCH_STEP = 1 << 16
+
+
+def _rfind_newline(view: memoryview, start: int, end: int) -> int:
+    """Offset after the last line break in view[start:end], or -1."""
+    while end > start:
+        step_start = max(start, end - _SEARCH_STEP)
+        found = bytes(view[step_start:end]).rfind(b"\n")
+        if found != -1:
+            return step_start + found + 1
+        end = step_start
+    return -1
+
+
+def _find_newline(view: memoryview, start: int) -> int:
+    """Offset after the first line break from start on, or len(view)."""
+    while start < len(view):
+        found = bytes(view[start : start + _SEARCH_STEP]).find(b"\n")
+        if found != -1:
+            return start + found + 1
+        start += _SEARCH_STEP
+    return len(view)
+
+
+def iter_blocks(
+    buffer: Buffer, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[tuple[int, memoryview]]:
+    """Yields (byte offset, block) pairs covering the buffer.
+
+    Blocks end on a line break, so a line longer than block_size makes a
+    longer block.
+    """
+    if block_size < 1:
+        raise ValueError(f"block_size must be positive, got {block_size}.")
+    view = memoryview(buffer).cast("B")
+    # Views are released explicitly, a memory-mapped file can't be closed
+    # while views on it exist.
+    try:
+        start = 0
+        while start < len(view):
+            end = start + block_size
+            if end < len(view):
+                cut = _rfind_newline(view, start, end)
+                end = cut if cut != -1 else _find_newline(view, end)
+            end = min(end, len(view))
+            yield start, view[start:end]
+            start = end
+    finally:
+        view.release()
+
+
+def scan_buffer(
+    matcher: Matcher, buffer: Buffer, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[ByteMatch]:
+    """Yields the matches in a UTF-8 buffer, with byte offsets."""
+    for offset, block in iter_blocks(buffer, block_size):
+        text = str(block, "utf-8", "surrogateescape")
+        block.release()
+        if text.isascii():
+            for start, end, index in matcher.finditer(text):
+                yield offset + start, offset + end, index
+            continue
+        # Translates character offsets to byte offsets, encoding each
+        # character of the block at most once.
+        position = 0
+        byte_position = offset
+        for start, end, index in matcher.finditer(text):
+            byte_position += len(
+                text[position:start].encode("utf-8", "surrogateescape")
+            )
+            byte_end = byte_position + len(
+                text[start:end].encode("utf-8", "surrogateescape")
+            )
+            yield byte_position, byte_end, index
+            position, byte_position = end, byte_end
+
+
+def scan_file(
+    matcher: Matcher, path: str, block_size: int = DEFAULT_BLOCK_SIZE
+) -> Iterator[ByteMatch]:
+    """Yields the matches in a UTF-8 file, memory-mapping it."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be memory-mapped.
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield from scan_buffer(matcher, mapped, block_size)
@@ -0,0 +1,87 @@
+"""On-disk cache of the compiled wordlist.
+
+With RedFlagger(use_cache=True), decoding and filtering the wordlist and
+building the matcher are done once, the result is written next to the
+user's other caches and is reused by every following RedFlagger until the
+source wordlist or the library version changes. It is off by default, as
+it saves little for the bundled wordlist. The artifact is obscured the
+same way as the wordlist itself, so the list is never stored as plain
+text.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zlib
+from base64 import urlsafe_b64decode as b64d
+from base64 import urlsafe_b64encode as b64e
+from typing import Any, Optional
+
+from . import __version__
+
+CACHE_DIR_ENV = "RFWC_CACHE_DIR"
+
+
+def default_cache_dir() -> str:
+    """The RFWC_CACHE_DIR environment variable if it is set, otherwise
+    rfwc/ inside the XDG cache directory."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    base_dir = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base_dir, "rfwc")
+
+
+def compiled_path(
+    source_path: str, matcher_name: str, cache_dir: Optional[str] = None
+) -> str:
+    """Path of the artifact compiled from source_path.
+
+    The file name is a hash of the source file, the library version and
+    the matcher, so any change to them points to a new artifact.
+    """
+    digest = hashlib.sha256()
+    with open(source_path, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 16), b""):
+            digest.update(block)
+    digest.update(f"\0{__version__}\0{matcher_name}".encode("utf-8"))
+    return os.path.join(
+        cache_dir or default_cache_dir(), f"{digest.hexdigest()}.rfwc"
+    )
+
+
+def load_compiled(path: str) -> Optional[dict[str, Any]]:
+    """Reads a compiled artifact, returns None if it is missing or broken."""
+    try:
+        with open(path, "rb") as compiled_file:
+            return json.loads(zlib.decompress(b64d(compiled_file.read())))
+    except (OSError, ValueError, zlib.error):
+        return None
+
+
+def save_compiled(path: str, compiled: dict[str, Any]) -> bool:
+    """Writes a compiled artifact, returns False if it could not be written.
+
+    The file is written to a temporary name first and then moved in place,
+    so concurrent processes never read a partially written artifact.
+    """
+    data = b64e(
+        zlib.compress(
+            json.dumps(compiled, separators=(",", ":")).encode("utf-8"), 9
+        )
+    )
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,154 @@
+"""Named wordlists, matched together in a single pass."""
+
+from typing import Iterable, Iterator, Union
+
+from .matchers import Match, TrieMatcher
+from .utils import filter_overlaps_and_sort
+from .word_index import WordIndex
+
+
+class Categories:
+    """Named wordlists sharing one trie, with overlaps resolved per list.
+
+    Every list is filtered by filter_overlaps_and_sort on its own, so a
+    phrase is never dropped because another list has an overlapping one,
+    and phrases in several lists are reported for each of them. The
+    phrases of all the lists share one trie under ids of their own, and
+    a scan walks it once, resolving overlapping matches separately for
+    every list, so its cost doesn't grow with the number of lists.
+    """
+
+    def __init__(self) -> None:
+        self._indexes: dict[str, WordIndex] = {}
+        self._matcher = TrieMatcher([])
+        # Trie ids by list and id in the list, and the other way around.
+        self._trie_ids: dict[tuple[str, int], int] = {}
+        self._owners: dict[int, tuple[str, int]] = {}
+        self._priorities: dict[int, tuple[int, int]] = {}
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._indexes
+
+    def names(self) -> list[str]:
+        """The names of the lists, in the order they were added."""
+        return list(self._indexes)
+
+    def wordlist(self, name: str) -> list[str]:
+        """The filtered and sorted phrases of a list."""
+        return self._index(name).lexicon.words()
+
+    def _index(self, name: str) -> WordIndex:
+        try:
+            return self._indexes[name]
+        except KeyError:
+            raise ValueError(
+                f"Unknown category {name}. Categories: {self.names()}."
+            ) from None
+
+    def add(self, name: str, words: Iterable[str]) -> None:
+        """Adds words to a list, creating it if needed."""
+        index = self._indexes.get(name)
+        if index is None:
+            index = self._indexes[name] = WordIndex(
+                filter_overlaps_and_sort(list(words))
+            )
+            lexicon = index.lexicon
+            self._add_words(name, zip(lexicon.ids, lexicon))
+            return
+        changes = index.add(words)
+        if changes is None:
+            # The list was filtered again and its ids were reset, so its
+            # old phrases are gone.
+            self._rebuild()
+            return
+        added, removed = changes
+        self._remove_words(name, removed)
+        self._add_words(name, added)
+
+    def remove(self, name: str, words: Iterable[str]) -> None:
+        """Removes words from a list."""
+        self._remove_words(name, self._index(name).remove(words))
+
+    def drop(self, name: str) -> None:
+        """Removes a whole list."""
+        lexicon = self._index(name).lexicon
+        self._remove_words(name, zip(lexicon.ids, lexicon))
+        del self._indexes[name]
+
+    def _rebuild(self) -> None:
+        """Builds the trie again from the phrases of every list."""
+        self._matcher = TrieMatcher([])
+        self._trie_ids.clear()
+        self._owners.clear()
+        self._priorities.clear()
+        for name, index in self._indexes.items():
+            # By id, so trie ids grow with the ids of the list.
+            self._add_words(
+                name, sorted(zip(index.lexicon.ids, index.lexicon))
+            )
+
+    def _add_words(self, name: str, words: Iterable[tuple[int, str]]) -> None:
+        for word_id, word in words:
+            trie_id = self._next_id
+            self._next_id += 1
+            self._trie_ids[name, word_id] = trie_id
+            self._owners[trie_id] = (name, word_id)
+            # Ids grow in the order words are added to a list, like the ids
+            # of its WordIndex, so ties are won as in a RedFlagger.
+            self._priorities[trie_id] = (len(word.split()), trie_id)
+            self._matcher.add_word(word, trie_id)
+
+    def _remove_words(
+        self, name: str, words: Iterable[tuple[int, str]]
+    ) -> None:
+        for word_id, word in list(words):
+            trie_id = self._trie_ids.pop((name, word_id))
+            del self._owners[trie_id]
+            del self._priorities[trie_id]
+            self._matcher.remove_word(word, trie_id)
+
+    def finditer(self, document: str) -> Iterator[tuple[str, Match]]:
+        """Yields (name, (start, end, word id)) for the matches of every
+        list, where the word id is the id in the WordIndex of the list.
+        Matches of a list come in order, the lists are interleaved."""
+        owners = self._owners
+        priorities = self._priorities
+        # The best candidate at the latest start of every list.
+        best: dict[str, Match] = {}
+        for start, end, trie_id in self._matcher.candidates(document):
+            name = owners[trie_id][0]
+            pending = best.get(name)
+            if pending is not None and start != pending[0]:
+                if start < pending[1]:
+                    continue
+                yield name, self._local(pending)
+                pending = None
+            if pending is None or priorities[trie_id] < priorities[pending[2]]:
+                pending = (start, end, trie_id)
+            best[name] = pending
+        for name, pending in best.items():
+            yield name, self._local(pending)
+
+    def _local(self, match: Match) -> Match:
+        start, end, trie_id = match
+        return start, end, self._owners[trie_id][1]
+
+    def detect(
+        self, document: str, return_words: bool = True
+    ) -> dict[str, Union[list[str], bool]]:
+        """The words found from every list, or whether any was found."""
+        if not return_words:
+            found = dict.fromkeys(self._indexes, False)
+            if self._matcher.search(document):
+                owners = self._owners
+                for _, _, trie_id in self._matcher.candidates(document):
+                    found[owners[trie_id][0]] = True
+            return found
+        words: dict[str, list[str]] = {name: [] for name in self._indexes}
+        for name, (_, _, word_id) in self.finditer(document):
+            words[name].append(self._indexes[name].lexicon.word(word_id))
+        return words
@@ -0,0 +1,323 @@
+"""Command line interface for the RedFlagger.
+
+Documents are streamed from files (or stdin) and results are written as
+they are produced, so arbitrarily large inputs are scanned with bounded
+memory.
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from .red_flagger import RedFlagger
+from .server import make_server
+
+# (file name, line or row number, document)
+Record = tuple[str, int, str]
+
+BUFFER_SIZE = 1 << 20
+
+
+class InputError(Exception):
+    pass
+
+
+def set_up_parser() -> argparse.ArgumentParser:
+    """Set up the argument parser for the CLI."""
+    parser = argparse.ArgumentParser(
+        prog="rfwc",
+        description="Keyword based abuse flagging with the Red Flagger.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Scan documents from files or stdin.",
+        description="Scans documents from files or stdin and writes one"
+        " JSON line per document (or a summary with --count-only).",
+    )
+    scan_parser.add_argument(
+        "files",
+        nargs="*",
+        default=["-"],
+        help="The files to scan, - (the default) reads from stdin.",
+    )
+    scan_parser.add_argument(
+        "--format",
+        choices=("text", "jsonl", "csv"),
+        default="text",
+        help="text: one document per line. jsonl: one JSON object per line,"
+        " see --field. csv: a CSV file with a header, see --column.",
+    )
+    scan_parser.add_argument(
+        "--field",
+        default="text",
+        help="The field holding the document in jsonl input. Nested fields"
+        " are separated by dots.",
+    )
+    scan_parser.add_argument(
+        "--column",
+        default="text",
+        help="The column holding the document in csv input.",
+    )
+    scan_parser.add_argument(
+        "--extra-words",
+        help="A file with extra words or phrases to detect, one per line.",
+    )
+    scan_parser.add_argument(
+        "--output",
+        default="-",
+        help="The file to write to, - (the default) writes to stdout.",
+    )
+    scan_parser.add_argument(
+        "--flagged-only",
+        action="store_true",
+        help="Only write the documents in which words were detected.",
+    )
+    scan_parser.add_argument(
+        "--count-only",
+        action="store_true",
+        help="Only write the number of scanned and flagged documents.",
+    )
+    scan_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of worker processes used for scanning.",
+    )
+    scan_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1024,
+        help="The number of documents scanned together.",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Serve scan requests from a daemon.",
+        description="Loads the word list once and answers JSON-lines scan"
+        " requests over a Unix socket or a localhost TCP port, see"
+        " rfwc.client.RedFlaggerClient.",
+    )
+    serve_parser.add_argument(
+        "--socket",
+        help="The Unix socket to listen on, instead of a TCP port.",
+    )
+    serve_parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="The address to listen on (default: 127.0.0.1).",
+    )
+    serve_parser.add_argument(
+        "--port",
+        type=int,
+        default=8737,
+        help="The TCP port to listen on (default: 8737).",
+    )
+    serve_parser.add_argument(
+        "--http",
+        action="store_true",
+        help="Accept the requests as HTTP POST bodies instead.",
+    )
+    serve_parser.add_argument(
+        "--extra-words",
+        help="A file with extra words or phrases to detect, one per line.",
+    )
+    return parser
+
+
+def load_red_flagger(extra_words: Optional[str]) -> RedFlagger:
+    """Creates the RedFlagger, with the words of the extra_words file."""
+    red_flagger = RedFlagger()
+    if extra_words:
+        with open(extra_words, encoding="utf-8") as words_file:
+            red_flagger.add_words([w.strip() for w in words_file if w.strip()])
+    return red_flagger
+
+
+@contextmanager
+def open_input(filename: str) -> Iterator[TextIO]:
+    """Opens an input file, or stdin for -, as buffered UTF-8 text."""
+    if filename != "-":
+        with open(
+            filename,
+            encoding="utf-8",
+            errors="replace",
+            newline="",
+            buffering=BUFFER_SIZE,
+        ) as input_file:
+            yield input_file
+        return
+    stdin = io.TextIOWrapper(
+        sys.stdin.buffer, encoding="utf-8", errors="replace", newline=""
+    )
+    try:
+        yield stdin
+    finally:
+        # Leaves sys.stdin open.
+        stdin.detach()
+
+
+@contextmanager
+def open_output(filename: str) -> Iterator[TextIO]:
+    """Opens the output file, or stdout for -, as buffered UTF-8 text."""
+    if filename != "-":
+        with open(
+            filename, "w", encoding="utf-8", buffering=BUFFER_SIZE
+        ) as output_file:
+            yield output_file
+        return
+    stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+    try:
+        yield stdout
+    finally:
+        # Leaves sys.stdout open.
+        stdout.flush()
+        stdout.detach()
+
+
+def get_field(item: Any, field: str) -> Any:
+    """Gets a (dot separated, nested) field from a JSON object."""
+    for key in field.split("."):
+        item = item[key]
+    return item
+
+
+def read_records(
+    files: list[str], input_format: str, field: str, column: str
+) -> Iterator[Record]:
+    """Lazily reads the documents of every input file."""
+    for filename in files:
+        with open_input(filename) as input_file:
+            if input_format == "csv":
+                reader = csv.DictReader(input_file)
+                if reader.fieldnames and column not in reader.fieldnames:
+                    raise InputError(
+                        f"Column {column} not found in {filename}."
+                        f" Columns: {reader.fieldnames}."
+                    )
+                for row_number, row in enumerate(reader, start=1):
+                    yield filename, row_number, row[column] or ""
+                continue
+            for line_number, line in enumerate(input_file, start=1):
+                line = line.rstrip("\r\n")
+                if input_format == "text":
+                    yield filename, line_number, line
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    document = get_field(json.loads(line), field)
+                except (KeyError, TypeError, ValueError) as e:
+                    raise InputError(
+                        f"Could not read field {field} from line"
+                        f" {line_number} of {filename}: {e!r}."
+                    ) from None
+                # Only nulls are empty documents, falsy values like 0 are
+                # scanned as text.
+                if document is None:
+                    document = ""
+                yield filename, line_number, str(document)
+
+
+def scan_records(
+    red_flagger: RedFlagger,
+    records: Iterable[Record],
+    return_words: bool,
+    workers: int,
+    chunk_size: int,
+) -> Iterator[tuple[Record, Any]]:
+    """Scans records lazily, pairing every record with its result."""
+    # The scanner only reads a few chunks ahead of the results, so the
+    # records waiting for their result stay bounded.
+    waiting: deque[Record] = deque()
+
+    def documents() -> Iterator[str]:
+        for record in records:
+            waiting.append(record)
+            yield record[2]
+
+    if workers > 1:
+        results = red_flagger.scan_parallel(
+            documents(),
+            workers=workers,
+            chunk_size=chunk_size,
+            return_words=return_words,
+        )
+    else:
+        results = red_flagger.detect_abuse_many(
+            documents(), return_words=return_words, chunk_size=chunk_size
+        )
+    for result in results:
+        yield waiting.popleft(), result
+
+
+def scan(args: argparse.Namespace) -> None:
+    """Runs the scan command."""
+    red_flagger = load_red_flagger(args.extra_words)
+    records = read_records(args.files, args.format, args.field, args.column)
+    results = scan_records(
+        red_flagger,
+        records,
+        return_words=not args.count_only,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+    with open_output(args.output) as output:
+        if args.count_only:
+            documents = flagged = 0
+            for _, is_flagged in results:
+                documents += 1
+                flagged += is_flagged
+            output.write(
+                json.dumps({"documents": documents, "flagged": flagged})
+            )
+            output.write("\n")
+            return
+        for (filename, line_number, _), words in results:
+            if args.flagged_only and not words:
+                continue
+            output.write(
+                json.dumps(
+                    {"file": filename, "line": line_number, "words": words},
+                    ensure_ascii=False,
+                )
+            )
+            output.write("\n")
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Runs the serve command until interrupted."""
+    server = make_server(
+        load_red_flagger(args.extra_words),
+        socket_path=args.socket,
+        host=args.host,
+        port=args.port,
+        http=args.http,
+    )
+    with server:
+        print(f"rfwc: serving on {server.server_address}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    """Entry point of the rfwc command, returns the exit code."""
+    parser = set_up_parser()
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "scan":
+            scan(args)
+        elif args.command == "serve":
+            serve(args)
+    except (InputError, OSError, ValueError) as e:
+        print(f"rfwc: error: {e}", file=sys.stderr)
+        return 1
+    return 0
@@ -0,0 +1,134 @@
+"""A thin client for the rfwc serve daemon, see rfwc.server."""
+
+import itertools
+import json
+import socket
+from typing import Any, Iterable, Optional, Union
+
+from .server import JSON_VECTOR_OUTPUTS, ServerError
+from .utils import import_optional
+
+
+class RedFlaggerClient:
+    """Mirrors the RedFlagger scanning methods, answered by a daemon.
+
+    Connects to the Unix socket at socket_path if it is given, otherwise
+    to host and port. The connection is opened on the first call and kept
+    open until close is called.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        if socket_path is None and port is None:
+            raise ValueError("Either socket_path or port is required.")
+        self._socket_path = socket_path
+        self._address = (host, port)
+        self._timeout = timeout
+        self._socket: Optional[socket.socket] = None
+        self._reader = None
+        self._ids = itertools.count()
+
+    def __enter__(self) -> "RedFlaggerClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> None:
+        if self._socket_path is not None:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address: Any = self._socket_path
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = self._address
+        try:
+            self._socket.settimeout(self._timeout)
+            self._socket.connect(address)
+        except OSError:
+            self.close()
+            raise
+        self._reader = self._socket.makefile("rb")
+
+    def close(self) -> None:
+        """Closes the connection to the daemon."""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def _call(self, method: str, **params: Any) -> Any:
+        request_id = next(self._ids)
+        request = json.dumps(
+            {"id": request_id, "method": method, "params": params},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        # A kept connection may have been closed by a restarted daemon, in
+        # which case the request is sent again on a new connection.
+        for retry in (True, False):
+            if self._socket is None:
+                self._connect()
+            try:
+                self._socket.sendall(request + b"\n")
+                line = self._reader.readline()
+                if not line:
+                    raise ConnectionResetError("The daemon hung up.")
+                break
+            except (BrokenPipeError, ConnectionResetError):
+                self.close()
+                if not retry:
+                    raise
+        response = json.loads(line)
+        if response.get("id") != request_id:
+            self.close()
+            raise ServerError(f"Unexpected response: {response}.")
+        if "error" in response:
+            raise ServerError(response["error"])
+        return response["result"]
+
+    def detect_abuse(
+        self, document: str, return_words: bool = True
+    ) -> Union[list[str], bool]:
+        """RedFlagger.detect_abuse, answered by the daemon."""
+        return self._call(
+            "detect_abuse", document=document, return_words=return_words
+        )
+
+    def detect_abuse_many(
+        self, documents: Iterable[str], return_words: bool = True
+    ) -> Union[list[list[str]], list[bool]]:
+        """RedFlagger.detect_abuse_many in a single request, returns a list."""
+        return self._call(
+            "detect_abuse_many",
+            documents=list(documents),
+            return_words=return_words,
+        )
+
+    def get_abuse_vector(self, document: str, output: str = "list") -> Any:
+        """RedFlagger.get_abuse_vector, answered by the daemon.
+
+        The numpy output is built from the list output (requires numpy).
+        """
+        if output == "numpy":
+            np = import_optional("numpy")
+            return np.array(
+                self._call("get_abuse_vector", document=document),
+                dtype=np.int64,
+            )
+        if output not in JSON_VECTOR_OUTPUTS:
+            raise ValueError(
+                f"Unknown output {output}."
+                f" Available outputs: {JSON_VECTOR_OUTPUTS + ('numpy',)}."
+            )
+        result = self._call(
+            "get_abuse_vector", document=document, output=output
+        )
+        if output == "sparse":
+            return [tuple(pair) for pair in result]
+        return result
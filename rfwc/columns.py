@@ -0,0 +1,114 @@
+"""Reading text columns: pandas Series, Arrow arrays and datasets.
+
+The rows of a column are converted to Python strings batch_size at a
+time, so the matcher lookups are done once per batch and memory use does
+not depend on the length of the column. Arrow string arrays, which back
+datasets columns and pandas columns of Arrow strings, are converted by
+Arrow in C++ a batch at a time rather than a value at a time.
+
+Whatever the container, a row that isn't a string (a missing value, a
+number, bytes) is scanned as an empty document, so it is never flagged.
+"""
+
+import sys
+from typing import Any, Iterable, Iterator
+
+from .utils import chunked, import_optional
+
+COLUMN_OUTPUTS = ("mask", "words", "matrix")
+
+
+def _arrow_classes() -> tuple[type, ...]:
+    """The Arrow array classes, or none if pyarrow isn't imported, in
+    which case no column can be an Arrow array."""
+    pa = sys.modules.get("pyarrow")
+    return () if pa is None else (pa.Array, pa.ChunkedArray)
+
+
+def is_series(column: Any) -> bool:
+    """Whether column is a pandas Series."""
+    pd = sys.modules.get("pandas")
+    return pd is not None and isinstance(column, pd.Series)
+
+
+def is_arrow(column: Any) -> bool:
+    """Whether column is a pyarrow Array or ChunkedArray."""
+    return isinstance(column, _arrow_classes())
+
+
+def _as_arrow(column: Any) -> Any:
+    """The Arrow array behind column, or None if it holds Python strings.
+
+    datasets columns (dataset["text"], datasets >= 4) are read in the
+    Arrow format, which maps the data of the dataset without copying it,
+    and pandas Series of Arrow strings expose their Arrow array.
+    """
+    if is_arrow(column):
+        return column
+    if hasattr(column, "source") and hasattr(column, "column_name"):
+        return column.source.with_format("arrow")[column.column_name]
+    storage = getattr(getattr(column, "dtype", None), "storage", None)
+    if is_series(column) and storage == "pyarrow":
+        pa = import_optional("pyarrow")
+        return pa.array(column.array)
+    return None
+
+
+def _arrow_batches(array: Any, batch_size: int) -> Iterator[list[str]]:
+    pa = import_optional("pyarrow")
+    pc = import_optional("pyarrow.compute")
+    chunks = array.chunks if isinstance(array, pa.ChunkedArray) else [array]
+    for chunk in chunks:
+        if pa.types.is_dictionary(chunk.type):
+            chunk = chunk.dictionary_decode()
+        strings = pa.types.is_string(chunk.type) or pa.types.is_large_string(
+            chunk.type
+        )
+        for offset in range(0, len(chunk), batch_size):
+            rows = chunk.slice(offset, batch_size)
+            # Like non-strings in Python containers.
+            if not strings:
+                yield [""] * len(rows)
+                continue
+            yield pc.fill_null(rows, "").to_pylist()
+
+
+def _python_batches(
+    rows: Iterable[Any], batch_size: int
+) -> Iterator[list[str]]:
+    for chunk in chunked(rows, batch_size):
+        yield [row if isinstance(row, str) else "" for row in chunk]
+
+
+def row_batches(column: Any, batch_size: int = 1024) -> Iterator[list[str]]:
+    """Yields the rows of column as lists of batch_size strings (fewer for
+    the last one), with missing values (None, NaN) and other non-strings
+    as empty strings."""
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be positive, got {batch_size}.")
+    array = _as_arrow(column)
+    if array is not None:
+        return _arrow_batches(array, batch_size)
+    return _python_batches(column, batch_size)
+
+
+def like_column(values: list[Any], column: Any, output: str) -> Any:
+    """values, one per row of column, in the container of column: a
+    Series with its index for a Series, an Arrow array for an Arrow array
+    and a list otherwise. Masks are boolean and words lists of strings,
+    even when column is empty."""
+    if is_series(column):
+        pd = import_optional("pandas")
+        return pd.Series(
+            values,
+            index=column.index,
+            name=column.name,
+            dtype=bool if output == "mask" else object,
+        )
+    if is_arrow(column):
+        pa = import_optional("pyarrow")
+        return pa.array(
+            values,
+            pa.bool_() if output == "mask" else pa.list_(pa.string()),
+        )
+    return values
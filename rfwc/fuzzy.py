@@ -0,0 +1,268 @@
+"""Fuzzy matching of misspelled phrases, up to an edit distance.
+
+Comparing every word of a document with every phrase of the wordlist
+would cost a distance computation per pair. Instead, the words of the
+phrases are kept in a deletion dictionary (as in SymSpell): every string
+obtained by deleting up to max_distance characters from a word maps back
+to the word. Two words within max_distance of each other share one of
+these deletions, so the candidates for a word of a document are found
+with a few dictionary lookups (len(word) + 1 for a distance of 1), and
+only they are checked with edit_distance.
+"""
+
+import re
+from typing import Any, Iterator, Optional
+
+from .matchers import Match, Matcher, TrieMatcher, fold_case
+
+# Words shorter than this only match exactly, as most short words are a
+# typo away from a common word ("witch" and "bitch", "white" and
+# "whites", "mother" and "muther").
+MIN_LENGTH = 7
+
+# The number of document words whose similar words are remembered.
+SIMILAR_CACHE_SIZE = 65536
+
+_WORD_RUN = re.compile(r"\w+")
+# Key under which a node of the trie of words stores the ids of the
+# phrases ending there.
+_TERMINAL = ""
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """The number of insertions, deletions, substitutions and swaps of
+    adjacent characters turning a into b (optimal string alignment), or
+    max_distance + 1 if it's more than max_distance."""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous: list[int] = []
+    row = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            value = min(
+                row[j] + 1,
+                current[j - 1] + 1,
+                row[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if (
+                i > 1
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                value = min(value, previous[j - 2] + 1)
+            current[j] = value
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous, row = row, current
+    return min(row[-1], max_distance + 1)
+
+
+def deletions(word: str, max_distance: int) -> set[str]:
+    """The strings obtained by deleting up to max_distance characters
+    from word, word included."""
+    found = {word}
+    last = {word}
+    for _ in range(max_distance):
+        last = {
+            variant[:i] + variant[i + 1 :]
+            for variant in last
+            for i in range(len(variant))
+        }
+        found |= last
+    return found
+
+
+class FuzzyMatcher(Matcher):
+    """Matches the phrases exactly, and with up to max_distance typos.
+
+    Exact matches come from a trie of the phrases. Phrases made of word
+    runs separated by single spaces, with a word of at least min_length
+    characters, are also matched fuzzily: they are kept in a trie of
+    their words, which is walked from every word of the document, trying
+    the words of the phrases close to every word of the document and
+    adding up their distances. A word can have a typo for every
+    min_length characters of the shorter of it and the word of the
+    phrase, so words shorter than min_length only match exactly.
+
+    Matches are resolved like the trie does, by leftmost start, then
+    fewest words, then exact before fuzzy, then id.
+    """
+
+    name = "fuzzy"
+    incremental = True
+    # It depends on max_distance and min_length as well as the wordlist.
+    cacheable = False
+
+    def __init__(
+        self,
+        word_list: list[str],
+        word_ids: Optional[list[int]] = None,
+        max_distance: int = 1,
+        min_length: int = MIN_LENGTH,
+    ):
+        super().__init__(word_list, word_ids)
+        if max_distance < 1:
+            raise ValueError("max_distance must be at least 1.")
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self._trie = TrieMatcher([])
+        self._priorities: dict[int, tuple[int, int]] = {}
+        # The trie of the words of the fuzzy phrases, and their words.
+        self._root: dict[str, Any] = {}
+        self._phrases: dict[int, list[str]] = {}
+        # The fuzzy words by their deletions, and how many phrases use
+        # every fuzzy word.
+        self._deletions: dict[str, set[str]] = {}
+        self._word_counts: dict[str, int] = {}
+        # The result of _similar for the words of the last documents,
+        # emptied when the phrases change.
+        self._similar_cache: dict[str, list[tuple[str, int]]] = {}
+        for word, word_id in zip(self._word_list, self._word_ids):
+            self.add_word(word, word_id)
+        del self._word_list, self._word_ids
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {**self.__dict__, "_similar_cache": {}}
+
+    def add_word(self, word: str, word_id: int) -> None:
+        self._similar_cache.clear()
+        self._trie.add_word(word, word_id)
+        self._priorities[word_id] = (len(word.split()), word_id)
+        words = fold_case(word).split()
+        if not all(map(_WORD_RUN.fullmatch, words)) or all(
+            len(part) < self.min_length for part in words
+        ):
+            return
+        self._phrases[word_id] = words
+        node = self._root
+        for part in words:
+            node = node.setdefault(part, {})
+        node.setdefault(_TERMINAL, []).append(word_id)
+        for part in words:
+            if len(part) < self.min_length:
+                continue
+            count = self._word_counts.get(part, 0)
+            self._word_counts[part] = count + 1
+            if not count:
+                for deletion in deletions(part, self._typos(part)):
+                    self._deletions.setdefault(deletion, set()).add(part)
+
+    def remove_word(self, word: str, word_id: int) -> None:
+        self._similar_cache.clear()
+        self._trie.remove_word(word, word_id)
+        self._priorities.pop(word_id, None)
+        words = self._phrases.pop(word_id, None)
+        if words is None:
+            return
+        path = [self._root]
+        for part in words:
+            path.append(path[-1][part])
+        path[-1][_TERMINAL].remove(word_id)
+        if not path[-1][_TERMINAL]:
+            del path[-1][_TERMINAL]
+        for depth in range(len(words), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][words[depth - 1]]
+        for part in words:
+            if len(part) < self.min_length:
+                continue
+            self._word_counts[part] -= 1
+            if self._word_counts[part]:
+                continue
+            del self._word_counts[part]
+            for deletion in deletions(part, self._typos(part)):
+                similar = self._deletions[deletion]
+                similar.discard(part)
+                if not similar:
+                    del self._deletions[deletion]
+
+    def _typos(self, word: str) -> int:
+        """The number of typos a word can have, one for every min_length
+        characters. A word of a document and a word of a phrase are
+        allowed the typos of the shorter one."""
+        return min(self.max_distance, len(word) // self.min_length)
+
+    def _similar(self, word: str) -> list[tuple[str, int]]:
+        """The words of the phrases word can stand for, with their
+        distance to it, word itself included."""
+        similar = [(word, 0)]
+        typos = self._typos(word)
+        if not typos:
+            return similar
+        found: set[str] = set()
+        for deletion in deletions(word, typos):
+            words = self._deletions.get(deletion)
+            if words:
+                found |= words
+        found.discard(word)
+        for other in found:
+            allowed = min(typos, self._typos(other))
+            distance = edit_distance(word, other, allowed)
+            if distance <= allowed:
+                similar.append((other, distance))
+        return similar
+
+    def _fuzzy(self, document: str) -> Iterator[tuple[int, int, int, int]]:
+        """Yields (start, end, word id, distance) for every fuzzy match
+        with at least one typo, overlapping ones included, by start."""
+        folded = fold_case(document)
+        runs = [match.span() for match in _WORD_RUN.finditer(folded)]
+        similar = self._similar_cache
+        if len(similar) > SIMILAR_CACHE_SIZE:
+            similar.clear()
+        max_distance = self.max_distance
+        for i, (start, _) in enumerate(runs):
+            frontier = [(self._root, 0)]
+            for j in range(i, len(runs)):
+                # The words of a phrase are separated by a single space, as
+                # in the trie.
+                if j > i and folded[runs[j - 1][1] : runs[j][0]] != " ":
+                    break
+                word = folded[runs[j][0] : runs[j][1]]
+                alternatives = similar.get(word)
+                if alternatives is None:
+                    alternatives = similar[word] = self._similar(word)
+                reached = []
+                for node, cost in frontier:
+                    for other, distance in alternatives:
+                        child = node.get(other)
+                        if child is None or cost + distance > max_distance:
+                            continue
+                        reached.append((child, cost + distance))
+                        if cost + distance and _TERMINAL in child:
+                            for word_id in child[_TERMINAL]:
+                                yield start, runs[j][1], word_id, (
+                                    cost + distance
+                                )
+                if not reached:
+                    break
+                frontier = reached
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        priorities = self._priorities
+        candidates = [
+            (start, priorities[word_id][0], 0, word_id, end)
+            for start, end, word_id in self._trie.candidates(document)
+        ]
+        candidates.extend(
+            (start, priorities[word_id][0], distance, word_id, end)
+            for start, end, word_id, distance in self._fuzzy(document)
+        )
+        last_end = 0
+        for start, _, _, word_id, end in sorted(candidates):
+            if start < last_end:
+                continue
+            yield start, end, word_id
+            last_end = end
+
+    def search(self, document: str) -> bool:
+        if self._trie.search(document):
+            return True
+        for _ in self._fuzzy(document):
+            return True
+        return False
@@ -0,0 +1,278 @@
+"""The wordlist packed into one string, with stable integer ids."""
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+# Above this many removals, the order is rebuilt in a single pass rather
+# than deleting the ids one at a time.
+_BULK_REMOVAL = 16
+# Markers of the slots of _IdTable that hold no id.
+_EMPTY = -1
+_DELETED = -2
+
+
+def _capacity(entries: int) -> int:
+    """The smallest power of two at least twice entries, at least 8."""
+    capacity = 8
+    while capacity < 2 * entries:
+        capacity *= 2
+    return capacity
+
+
+class _IdTable:
+    """An open addressing hash table of ids, keyed by key(word(id)).
+
+    Only the ids are stored, the keys are computed from the words when
+    compared, so the table costs 8 bytes per slot. Several ids may have
+    the same key, find returns any of them.
+    """
+
+    def __init__(
+        self,
+        word: Callable[[int], str],
+        key: Optional[Callable[[str], str]],
+        word_ids: Iterable[int],
+        entries: int,
+    ):
+        self._word = word
+        self._key = key
+        self._build(word_ids, entries)
+
+    def _build(self, word_ids: Iterable[int], entries: int) -> None:
+        self._slots = array("q", [_EMPTY]) * _capacity(entries)
+        self._mask = len(self._slots) - 1
+        # Slots that are not empty, deleted ones included.
+        self._used = 0
+        for word_id in word_ids:
+            self.add(word_id)
+
+    def _key_of(self, word_id: int) -> str:
+        word = self._word(word_id)
+        return word if self._key is None else self._key(word)
+
+    def find(self, key: str) -> int:
+        """An id with the key, or -1."""
+        slots = self._slots
+        mask = self._mask
+        i = hash(key) & mask
+        while True:
+            word_id = slots[i]
+            if word_id == _EMPTY:
+                return -1
+            if word_id >= 0 and self._key_of(word_id) == key:
+                return word_id
+            i = (i + 1) & mask
+
+    def add(self, word_id: int) -> None:
+        if 3 * (self._used + 1) > 2 * len(self._slots):
+            live = [word_id for word_id in self._slots if word_id >= 0]
+            self._build(live, len(live) + 1)
+        slots = self._slots
+        i = hash(self._key_of(word_id)) & self._mask
+        while slots[i] >= 0:
+            i = (i + 1) & self._mask
+        if slots[i] == _EMPTY:
+            self._used += 1
+        slots[i] = word_id
+
+    def remove(self, word_id: int) -> None:
+        slots = self._slots
+        i = hash(self._key_of(word_id)) & self._mask
+        while slots[i] != _EMPTY:
+            if slots[i] == word_id:
+                slots[i] = _DELETED
+                return
+            i = (i + 1) & self._mask
+
+
+class Lexicon:
+    """Phrases in a given order, each with an id that never changes.
+
+    The phrases are stored back to back in a single string, and found by
+    an array of offsets indexed by id, so a phrase costs its characters
+    and a few machine words rather than a str object and an entry in
+    several containers. The id of a phrase, or of a phrase ignoring case,
+    is found in hash tables of ids, built on the first lookup. The text of
+    removed phrases is dropped once it makes up half of the string.
+
+    Inserted phrases are appended to a list of chunks, joined to the
+    string once they make up an eighth of it, so an insert doesn't copy
+    the whole string. Removals find the ids in the order with a scan in
+    C and don't need the positions of the other phrases.
+    """
+
+    def __init__(
+        self,
+        words: Iterable[str] = (),
+        word_ids: Optional[Iterable[int]] = None,
+    ):
+        words = list(words)
+        # The ids in the order of the phrases.
+        self.ids = array(
+            "q", range(len(words)) if word_ids is None else word_ids
+        )
+        if len(self.ids) != len(words):
+            raise ValueError("There must be one id per word.")
+        if word_ids is not None:
+            by_id = [""] * (max(self.ids, default=-1) + 1)
+            for word_id, word in zip(self.ids, words):
+                by_id[word_id] = word
+            words = by_id
+        self._pack(words)
+        self._positions: Optional[array] = None
+        self._table: Optional[_IdTable] = None
+        self._folded_table: Optional[_IdTable] = None
+
+    def _pack(self, words_by_id: list[str]) -> None:
+        self._text = "".join(words_by_id)
+        # The phrase of id i is _text[_offsets[i] : _offsets[i + 1]], or
+        # in a chunk of _tail past the end of _text.
+        self._offsets = array("q", accumulate(map(len, words_by_id)))
+        self._offsets.insert(0, 0)
+        self._tail: list[str] = []
+        # The offset of every chunk of _tail.
+        self._tail_starts: list[int] = []
+        # Characters of removed phrases still in _text.
+        self._garbage = 0
+
+    def _join_tail(self) -> None:
+        self._text = "".join([self._text, *self._tail])
+        self._tail.clear()
+        self._tail_starts.clear()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The tables are rebuilt on the first lookup.
+        return {**self.__dict__, "_table": None, "_folded_table": None}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self.word, self.ids)
+
+    def __contains__(self, word: str) -> bool:
+        return self.find(word) is not None
+
+    def word(self, word_id: int) -> str:
+        """The phrase with the id."""
+        start = self._offsets[word_id]
+        end = self._offsets[word_id + 1]
+        if end <= len(self._text):
+            return self._text[start:end]
+        # A phrase is never split between chunks.
+        chunk = bisect_right(self._tail_starts, start) - 1
+        offset = self._tail_starts[chunk]
+        return self._tail[chunk][start - offset : end - offset]
+
+    def words(self) -> list[str]:
+        """The phrases in order, as a new list."""
+        if self._tail:
+            self._join_tail()
+        text = self._text
+        offsets = self._offsets
+        return [text[offsets[i] : offsets[i + 1]] for i in self.ids]
+
+    def find(self, word: str, ignore_case: bool = False) -> Optional[int]:
+        """The id of the phrase, or of a phrase equal to it ignoring case,
+        or None if there is none."""
+        if ignore_case:
+            if self._folded_table is None:
+                self._folded_table = _IdTable(
+                    self.word, str.lower, self.ids, len(self.ids)
+                )
+            word_id = self._folded_table.find(word.lower())
+        else:
+            if self._table is None:
+                self._table = _IdTable(
+                    self.word, None, self.ids, len(self.ids)
+                )
+            word_id = self._table.find(word)
+        return None if word_id < 0 else word_id
+
+    def positions(self) -> array:
+        """Maps ids to positions in the order, -1 for ids that aren't in the
+        lexicon. Cached between edits."""
+        if self._positions is None:
+            self._positions = array("q", [-1]) * (len(self._offsets) - 1)
+            for position, word_id in enumerate(self.ids):
+                self._positions[word_id] = position
+        return self._positions
+
+    def insert(self, words: Iterable[tuple[int, str]]) -> list[int]:
+        """Inserts (position, phrase) pairs one after the other, returns the
+        new ids of the phrases."""
+        added = []
+        pieces = []
+        start = self._offsets[-1]
+        for position, word in words:
+            word_id = len(self._offsets) - 1
+            self._offsets.append(self._offsets[-1] + len(word))
+            self.ids.insert(position, word_id)
+            pieces.append(word)
+            added.append(word_id)
+        if pieces:
+            self._tail.append("".join(pieces))
+            self._tail_starts.append(start)
+            if 8 * (self._offsets[-1] - len(self._text)) > len(self._text):
+                self._join_tail()
+        for table in (self._table, self._folded_table):
+            if table is not None:
+                for word_id in added:
+                    table.add(word_id)
+        self._positions = None
+        return added
+
+    def remove(self, word_ids: Iterable[int]) -> list[int]:
+        """Removes phrases by id, returns the positions they were at."""
+        word_ids = set(word_ids)
+        if not word_ids:
+            return []
+        if len(word_ids) > _BULK_REMOVAL:
+            removed_positions = [
+                position
+                for position, word_id in enumerate(self.ids)
+                if word_id in word_ids
+            ]
+        else:
+            removed_positions = list(map(self._position, word_ids))
+        removed_positions.sort(reverse=True)
+        for word_id in word_ids:
+            for table in (self._table, self._folded_table):
+                if table is not None:
+                    table.remove(word_id)
+            self._garbage += (
+                self._offsets[word_id + 1] - self._offsets[word_id]
+            )
+        if len(word_ids) > _BULK_REMOVAL:
+            self.ids = array(
+                "q",
+                (word_id for word_id in self.ids if word_id not in word_ids),
+            )
+        else:
+            for position in removed_positions:
+                del self.ids[position]
+        self._positions = None
+        if 2 * self._garbage > self._offsets[-1]:
+            live = set(self.ids)
+            self._pack(
+                [
+                    self.word(word_id) if word_id in live else ""
+                    for word_id in range(len(self._offsets) - 1)
+                ]
+            )
+        return removed_positions
+
+    def _position(self, word_id: int) -> int:
+        """The position of an id in the order, from the cached positions
+        or by looking for its bytes in the ids."""
+        if self._positions is not None:
+            return self._positions[word_id]
+        data = self.ids.tobytes()
+        needle = array("q", [word_id]).tobytes()
+        start = data.find(needle)
+        # Only matches aligned on an id count.
+        while start % self.ids.itemsize:
+            start = data.find(needle, start + 1)
+        return start // self.ids.itemsize
@@ -0,0 +1,727 @@
+"""Matching engines used by the RedFlagger to find wordlist phrases.
+
+Every engine implements the same semantics as the original regular
+expression: phrases are matched case-insensitively, must be surrounded by
+regex word boundaries (\\b), and overlapping candidates are resolved the
+way a regex alternation would resolve them (leftmost start first, then the
+earliest phrase in the wordlist).
+
+Matches are reported with a word id. Unless word_ids are given, the id of
+a phrase is its index in word_list.
+"""
+
+import re
+import struct
+from array import array
+from base64 import b64decode, b64encode
+from bisect import bisect_left, insort
+from typing import Any, Iterable, Iterator, Optional
+
+# (start, end, word id)
+Match = tuple[int, int, int]
+
+_BOUNDARY = re.compile(r"\b")
+_WORD_RUN = re.compile(r"\w+")
+
+# Key under which a trie node stores the ids of the phrases ending there.
+_TERMINAL = ""
+
+# magic, version, node count, edge count, word count, text size.
+_FLAT_HEADER = struct.Struct("=4sIIIII")
+_FLAT_MAGIC = b"RFWT"
+_FLAT_VERSION = 1
+
+
+def fold_case(text: str) -> str:
+    """Lowercases text while keeping a one-to-one character alignment.
+
+    str.lower() can change the length of a string (e.g. "İ"), which would
+    break the offsets reported by the matchers, so those characters are
+    left as they are.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return "".join(
+        char.lower() if len(char.lower()) == 1 else char for char in text
+    )
+
+
+def is_word_char(char: str) -> bool:
+    """Mirrors the definition of \\w used by the re module for str."""
+    return char.isalnum() or char == "_"
+
+
+def is_boundary(text: str, position: int) -> bool:
+    """Mirrors the \\b assertion of the re module at a position in text."""
+    before = position > 0 and is_word_char(text[position - 1])
+    after = position < len(text) and is_word_char(text[position])
+    return before != after
+
+
+def boundaries(text: str) -> list[int]:
+    """The positions in text where \\b matches."""
+    return [match.start() for match in _BOUNDARY.finditer(text)]
+
+
+def word_runs(phrase: str) -> list[str]:
+    """The case-folded runs of word characters in a phrase."""
+    return _WORD_RUN.findall(fold_case(phrase))
+
+
+def contains_phrase(text: str, phrase: str) -> bool:
+    """Whether phrase is found in text between word boundaries, ignoring
+    case. This is the check filter_overlaps_and_sort does on pairs."""
+    if not phrase:
+        return _BOUNDARY.search(text) is not None
+    folded_text = fold_case(text)
+    folded_phrase = fold_case(phrase)
+    start = folded_text.find(folded_phrase)
+    while start != -1:
+        if is_boundary(text, start) and is_boundary(text, start + len(phrase)):
+            return True
+        start = folded_text.find(folded_phrase, start + 1)
+    return False
+
+
+def select_leftmost(candidates: list[Match]) -> list[Match]:
+    """Resolves overlapping candidates like a regex alternation would.
+
+    The leftmost candidate wins, ties on the start are won by the phrase
+    that comes first in the wordlist (the lowest index), and the scan
+    resumes where the winning match ends.
+    """
+    selected = []
+    last_end = 0
+    for start, end, index in sorted(candidates, key=lambda c: (c[0], c[2])):
+        if start < last_end:
+            continue
+        selected.append((start, end, index))
+        last_end = end
+    return selected
+
+
+class Prefilter:
+    """Cheaply rules out documents that can't contain any phrase.
+
+    Every word run of a phrase is also a whole word run of a document the
+    phrase is found in, as the phrase is surrounded by word boundaries.
+    One run per phrase (the longest, as long runs tend to be rare) is
+    kept, and a document none of whose word runs is kept can't match.
+    Phrases without word characters are looked up as plain substrings.
+    Finding the word runs of a document runs in C, so clean documents
+    are rejected without walking them in Python.
+    """
+
+    def __init__(self, word_list: Iterable[str] = ()):
+        # Number of phrases keyed by each run.
+        self._keys: dict[str, int] = {}
+        self._keyless: dict[str, int] = {}
+        for word in word_list:
+            self.add(word)
+
+    def _counts_and_key(self, word: str) -> tuple[dict[str, int], str]:
+        runs = word_runs(word)
+        if runs:
+            return self._keys, max(runs, key=len)
+        return self._keyless, fold_case(word)
+
+    def add(self, word: str) -> None:
+        if not word:
+            # Empty phrases are never matched.
+            return
+        counts, key = self._counts_and_key(word)
+        counts[key] = counts.get(key, 0) + 1
+
+    def remove(self, word: str) -> None:
+        if not word:
+            return
+        counts, key = self._counts_and_key(word)
+        counts[key] -= 1
+        if not counts[key]:
+            del counts[key]
+
+    def rejects(self, document: str) -> bool:
+        """Whether no phrase can be found in the document."""
+        folded = fold_case(document)
+        if any(phrase in folded for phrase in self._keyless):
+            return False
+        return self._keys.keys().isdisjoint(_WORD_RUN.findall(folded))
+
+
+class Matcher:
+    """Base class for the matching engines."""
+
+    name = ""
+    # Whether add_word and remove_word are supported.
+    incremental = False
+    # Whether the matcher can be rebuilt from get_state, and so be kept in
+    # the compiled artifact.
+    cacheable = True
+
+    def __init__(
+        self, word_list: list[str], word_ids: Optional[list[int]] = None
+    ):
+        self._word_list = list(word_list)
+        self._word_ids = (
+            list(range(len(self._word_list)))
+            if word_ids is None
+            else list(word_ids)
+        )
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        """Yields (start, end, word id) for every match in the document."""
+        raise NotImplementedError
+
+    def search(self, document: str) -> bool:
+        """Returns whether there is at least one match in the document."""
+        for _ in self.finditer(document):
+            return True
+        return False
+
+    def add_word(self, word: str, word_id: int) -> None:
+        """Adds a phrase to an incremental matcher."""
+        raise NotImplementedError(f"The {self.name} matcher is static.")
+
+    def remove_word(self, word: str, word_id: int) -> None:
+        """Removes a phrase from an incremental matcher."""
+        raise NotImplementedError(f"The {self.name} matcher is static.")
+
+    def get_state(self) -> dict[str, Any]:
+        """Returns a JSON serializable state to rebuild the matcher from."""
+        return {"word_list": self._word_list, "word_ids": self._word_ids}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "Matcher":
+        """Rebuilds a matcher from the output of get_state."""
+        return cls(state["word_list"], state.get("word_ids"))
+
+
+class RegexMatcher(Matcher):
+    """Reference engine that compiles the wordlist to a single alternation.
+
+    The cost of a scan grows with the size of the wordlist, so this engine
+    is mainly kept to check the other engines against.
+    """
+
+    name = "regex"
+
+    def __init__(
+        self, word_list: list[str], word_ids: Optional[list[int]] = None
+    ):
+        super().__init__(word_list, word_ids)
+        escaped_word_list = [
+            rf"\b{re.escape(w)}\b" for w in self._word_list if w
+        ]
+        # An empty alternation would match everywhere.
+        self._pattern = re.compile(
+            "|".join(escaped_word_list) or r"(?!)", flags=re.IGNORECASE
+        )
+        self._prefilter = Prefilter(self._word_list)
+        # Reversed so case-insensitive duplicates map to the first index,
+        # which is the alternative the regex would have matched.
+        self._lookup = {
+            fold_case(word): word_id
+            for word, word_id in reversed(
+                list(zip(self._word_list, self._word_ids))
+            )
+        }
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        for match in self._pattern.finditer(document):
+            yield (
+                match.start(),
+                match.end(),
+                self._lookup[fold_case(match.group())],
+            )
+
+    def search(self, document: str) -> bool:
+        if self._prefilter.rejects(document):
+            return False
+        return self._pattern.search(document) is not None
+
+
+class AhoCorasickMatcher(Matcher):
+    """Character level Aho-Corasick automaton over the case-folded phrases.
+
+    A scan visits every character of the document once, so its cost grows
+    with the length of the document rather than the size of the wordlist.
+    """
+
+    name = "aho-corasick"
+
+    def __init__(
+        self, word_list: list[str], word_ids: Optional[list[int]] = None
+    ):
+        super().__init__(word_list, word_ids)
+        self._lengths = [len(word) for word in self._word_list]
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail = [0]
+        # Indices into word_list, which double as the priority of a phrase.
+        self._outputs: list[tuple[int, ...]] = [()]
+        for index, word in enumerate(self._word_list):
+            if word:
+                self._insert(fold_case(word), index)
+        self._build_fail_links()
+        self._prefilter = Prefilter(self._word_list)
+
+    def _insert(self, phrase: str, index: int) -> None:
+        """Adds a case-folded phrase to the trie."""
+        state = 0
+        for char in phrase:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            state = next_state
+        # Exact (case-insensitive) duplicates keep the earliest index only.
+        if not self._outputs[state]:
+            self._outputs[state] = (index,)
+
+    def _build_fail_links(self) -> None:
+        """Breadth first pass computing failure links and merged outputs."""
+        queue = list(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target
+                self._outputs[next_state] += self._outputs[target]
+
+    def _candidates(self, document: str) -> Iterator[Match]:
+        """Yields every bounded match, overlapping ones included, in order
+        of their end offset. Matches carry indices into word_list."""
+        goto = self._goto
+        fail = self._fail
+        outputs = self._outputs
+        lengths = self._lengths
+        state = 0
+        for position, char in enumerate(fold_case(document)):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                end = position + 1
+                if not is_boundary(document, end):
+                    continue
+                for index in outputs[state]:
+                    start = end - lengths[index]
+                    if is_boundary(document, start):
+                        yield start, end, index
+
+    def candidates(self, document: str) -> Iterator[Match]:
+        """Yields every bounded match, overlapping ones included, in order
+        of their end offset."""
+        word_ids = self._word_ids
+        for start, end, index in self._candidates(document):
+            yield start, end, word_ids[index]
+
+    def get_state(self) -> dict[str, Any]:
+        return {
+            "word_list": self._word_list,
+            "word_ids": self._word_ids,
+            "goto": self._goto,
+            "fail": self._fail,
+            "outputs": self._outputs,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "AhoCorasickMatcher":
+        # Skips __init__, the automaton tables are taken as they are.
+        matcher = cls.__new__(cls)
+        matcher._word_list = state["word_list"]
+        matcher._word_ids = state.get("word_ids") or list(
+            range(len(matcher._word_list))
+        )
+        matcher._lengths = [len(word) for word in matcher._word_list]
+        matcher._goto = state["goto"]
+        matcher._fail = state["fail"]
+        matcher._outputs = [tuple(output) for output in state["outputs"]]
+        matcher._prefilter = Prefilter(matcher._word_list)
+        return matcher
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        word_ids = self._word_ids
+        for start, end, index in select_leftmost(
+            list(self._candidates(document))
+        ):
+            yield start, end, word_ids[index]
+
+    def search(self, document: str) -> bool:
+        if self._prefilter.rejects(document):
+            return False
+        for _ in self._candidates(document):
+            return True
+        return False
+
+
+class TrieMatcher(Matcher):
+    """Trie of the case-folded phrases, walked from every word boundary.
+
+    Matches can only start on a word boundary, which the re module finds
+    in C, and a walk never goes deeper than the longest phrase, so the
+    cost of a scan does not depend on the size of the wordlist.
+
+    Unlike the automaton, the trie has no links between phrases, so
+    phrases are added and removed in time proportional to their length.
+    Ties on the start of a match are won by the phrase with the fewest
+    words and then the lowest id, which is the order of the wordlist for
+    lists coming out of filter_overlaps_and_sort.
+    """
+
+    name = "trie"
+    incremental = True
+
+    def __init__(
+        self, word_list: list[str], word_ids: Optional[list[int]] = None
+    ):
+        super().__init__(word_list, word_ids)
+        self._root: dict[str, Any] = {}
+        # The phrases are only kept in the trie, the Lexicon holding them
+        # passes them back to remove_word.
+        self._prefilter = Prefilter()
+        for word, word_id in zip(self._word_list, self._word_ids):
+            self.add_word(word, word_id)
+        # Not kept up to date by add_word and remove_word.
+        del self._word_list, self._word_ids
+
+    def add_word(self, word: str, word_id: int) -> None:
+        if not word:
+            return
+        node = self._root
+        for char in fold_case(word):
+            node = node.setdefault(char, {})
+        self._prefilter.add(word)
+        # The phrases ending at a node have the same number of words, so
+        # they are sorted by id.
+        insort(node.setdefault(_TERMINAL, []), word_id)
+
+    def remove_word(self, word: str, word_id: int) -> None:
+        # Walks down to the terminal, then prunes the emptied nodes.
+        folded = fold_case(word)
+        path = [self._root]
+        for char in folded:
+            node = path[-1].get(char)
+            if node is None:
+                return
+            path.append(node)
+        terminal = path[-1].get(_TERMINAL)
+        if not word or terminal is None or word_id not in terminal:
+            return
+        self._prefilter.remove(word)
+        terminal.remove(word_id)
+        if not terminal:
+            del path[-1][_TERMINAL]
+        for depth in range(len(folded), 0, -1):
+            if path[depth]:
+                break
+            del path[depth - 1][folded[depth - 1]]
+
+    def phrases(self) -> Iterator[tuple[str, list[int]]]:
+        """Yields every case-folded phrase of the trie and its ids."""
+        stack = [("", self._root)]
+        while stack:
+            prefix, node = stack.pop()
+            for char, child in node.items():
+                if char == _TERMINAL:
+                    yield prefix, child
+                else:
+                    stack.append((prefix + char, child))
+
+    def _walk(self, document: str) -> Iterator[tuple[int, int, list[int]]]:
+        """Yields (start, end, ids) for every bounded match, overlapping
+        ones included, by increasing start and then end."""
+        folded = fold_case(document)
+        starts = boundaries(document)
+        is_boundary_at = set(starts)
+        length = len(folded)
+        root = self._root
+        for start in starts:
+            if start == length:
+                break
+            node = root.get(folded[start])
+            position = start + 1
+            while node is not None:
+                if _TERMINAL in node and position in is_boundary_at:
+                    yield start, position, node[_TERMINAL]
+                if position == length:
+                    break
+                node = node.get(folded[position])
+                position += 1
+
+    def candidates(self, document: str) -> Iterator[Match]:
+        """Yields every bounded match, overlapping ones included."""
+        for start, end, word_ids in self._walk(document):
+            for word_id in word_ids:
+                yield start, end, word_id
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        best = None
+        for start, end, word_ids in self._walk(document):
+            if best is not None and start != best[0]:
+                if start < best[1]:
+                    continue
+                yield best
+                best = None
+            # Matches at the same start are compared by (token count, id),
+            # the token counts of the phrases being those of the document.
+            if best is None or (
+                len(document[start:end].split()),
+                word_ids[0],
+            ) < (len(document[start : best[1]].split()), best[2]):
+                best = (start, end, word_ids[0])
+        if best is not None:
+            yield best
+
+    def search(self, document: str) -> bool:
+        if self._prefilter.rejects(document):
+            return False
+        for _ in self._walk(document):
+            return True
+        return False
+
+    def get_state(self) -> dict[str, Any]:
+        return {"root": self._root}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "TrieMatcher":
+        # Skips __init__, the trie is taken as it is.
+        matcher = cls.__new__(cls)
+        matcher._root = state["root"]
+        matcher._prefilter = Prefilter(
+            phrase for phrase, word_ids in matcher.phrases() for _ in word_ids
+        )
+        return matcher
+
+
+class FlatTrieMatcher(Matcher):
+    """The trie of TrieMatcher packed into one flat, read-only buffer.
+
+    The buffer holds no Python objects, so it can be placed in shared
+    memory or a memory-mapped file and used by many processes at once,
+    see rfwc.shared. It is laid out as a header followed by arrays of
+    native uint32:
+    - edge_start: edges of node n are edge_start[n]:edge_start[n + 1],
+    - edge_chars: the code point of every edge, sorted within a node,
+    - edge_targets: the node every edge leads to,
+    - node_ranks: 0, or 1 + the rank of the best phrase ending at a node,
+        ranks follow the (token count, id) priority of TrieMatcher,
+    - rank_ids: the word id of every rank,
+    - word_ids: the ids of the phrases in wordlist order,
+    - word_ends: the end of every phrase in the UTF-8 text,
+    followed by the phrases as UTF-8 text.
+
+    Children are found by binary search, which is slower than the dicts of
+    TrieMatcher but takes a fraction of their memory. Like TrieMatcher,
+    documents are first checked with a Prefilter of the phrases, built
+    from the text of the buffer when attaching to it.
+    """
+
+    name = "flat-trie"
+
+    def __init__(
+        self, word_list: list[str], word_ids: Optional[list[int]] = None
+    ):
+        super().__init__(word_list, word_ids)
+        self._attach(pack_trie(self._word_list, self._word_ids))
+        del self._word_list, self._word_ids
+
+    def _attach(self, buffer: Any) -> None:
+        """Uses the tables in buffer, without copying them."""
+        view = memoryview(buffer).cast("B")
+        if len(view) < _FLAT_HEADER.size:
+            raise ValueError("The buffer is too small for trie tables.")
+        magic, version, nodes, edges, words, text_size = (
+            _FLAT_HEADER.unpack_from(view)
+        )
+        if magic != _FLAT_MAGIC or version != _FLAT_VERSION:
+            raise ValueError("The buffer doesn't hold trie tables.")
+        sizes = (nodes + 1, edges, edges, nodes, words, words, words)
+        position = _FLAT_HEADER.size
+        tables = []
+        for size in sizes:
+            tables.append(view[position : position + 4 * size].cast("I"))
+            position += 4 * size
+        if position + text_size > len(view):
+            raise ValueError("The trie tables are truncated.")
+        self._buffer = buffer
+        (
+            self._edge_start,
+            self._edge_chars,
+            self._edge_targets,
+            self._node_ranks,
+            self._rank_ids,
+            self._list_ids,
+            self._word_ends,
+        ) = tables
+        self._text = view[position : position + text_size]
+        # Unlike the tables, the prefilter is private to every process.
+        self._prefilter = Prefilter(self.words()[0])
+
+    @classmethod
+    def from_buffer(cls, buffer: Any) -> "FlatTrieMatcher":
+        """Attaches to tables written by pack_trie, e.g. in shared memory."""
+        matcher = cls.__new__(cls)
+        matcher._attach(buffer)
+        return matcher
+
+    def words(self) -> tuple[list[str], list[int]]:
+        """The phrases in wordlist order, and their ids."""
+        text = bytes(self._text)
+        words = []
+        start = 0
+        for end in self._word_ends:
+            words.append(text[start:end].decode("utf-8"))
+            start = end
+        return words, list(self._list_ids)
+
+    def _walk(self, document: str) -> Iterator[tuple[int, int, int]]:
+        """Yields (start, end, rank) for every bounded match, by increasing
+        start and then end."""
+        folded = fold_case(document)
+        starts = boundaries(document)
+        is_boundary_at = set(starts)
+        length = len(folded)
+        edge_start = self._edge_start
+        edge_chars = self._edge_chars
+        edge_targets = self._edge_targets
+        node_ranks = self._node_ranks
+        for start in starts:
+            node = 0
+            position = start
+            while position < length:
+                low = edge_start[node]
+                high = edge_start[node + 1]
+                code = ord(folded[position])
+                edge = bisect_left(edge_chars, code, low, high)
+                if edge == high or edge_chars[edge] != code:
+                    break
+                node = edge_targets[edge]
+                position += 1
+                if node_ranks[node] and position in is_boundary_at:
+                    yield start, position, node_ranks[node] - 1
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        if self._prefilter.rejects(document):
+            return
+        rank_ids = self._rank_ids
+        best = None
+        for start, end, rank in self._walk(document):
+            if best is not None and start != best[0]:
+                if start < best[1]:
+                    continue
+                yield best[0], best[1], rank_ids[best[2]]
+                best = None
+            if best is None or rank < best[2]:
+                best = (start, end, rank)
+        if best is not None:
+            yield best[0], best[1], rank_ids[best[2]]
+
+    def search(self, document: str) -> bool:
+        if self._prefilter.rejects(document):
+            return False
+        for _ in self._walk(document):
+            return True
+        return False
+
+    def tables(self) -> memoryview:
+        """The buffer holding the tables."""
+        return memoryview(self._buffer).cast("B")
+
+    def get_state(self) -> dict[str, Any]:
+        return {"tables": b64encode(self.tables()).decode("ascii")}
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "FlatTrieMatcher":
+        return cls.from_buffer(b64decode(state["tables"]))
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Memoryviews can't be pickled, copies of the matcher get a copy of
+        # the tables.
+        return {"tables": bytes(self.tables())}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self._attach(state["tables"])
+
+
+def pack_trie(word_list: list[str], word_ids: list[int]) -> bytes:
+    """Packs the trie of word_list into the tables of FlatTrieMatcher."""
+    trie = TrieMatcher(word_list, word_ids)
+    priorities = {
+        word_id: (len(word.split()), word_id)
+        for word, word_id in zip(word_list, word_ids)
+        if word
+    }
+    ranks = {
+        word_id: rank
+        for rank, word_id in enumerate(
+            sorted(priorities, key=priorities.__getitem__)
+        )
+    }
+    edge_start = array("I", [0])
+    edge_chars = array("I")
+    edge_targets = array("I")
+    node_ranks = array("I")
+    # Breadth first, so the children of a node get consecutive numbers.
+    queue = [trie._root]
+    for node in queue:
+        terminal = node.get(_TERMINAL)
+        node_ranks.append(ranks[terminal[0]] + 1 if terminal else 0)
+        for char in sorted(char for char in node if char != _TERMINAL):
+            edge_chars.append(ord(char))
+            edge_targets.append(len(queue))
+            queue.append(node[char])
+        edge_start.append(len(edge_chars))
+    rank_ids = array("I", sorted(ranks, key=ranks.__getitem__))
+    text = bytearray()
+    word_ends = array("I")
+    for word in word_list:
+        text += word.encode("utf-8")
+        word_ends.append(len(text))
+    header = _FLAT_HEADER.pack(
+        _FLAT_MAGIC,
+        _FLAT_VERSION,
+        len(queue),
+        len(edge_chars),
+        len(word_list),
+        len(text),
+    )
+    tables = (
+        edge_start,
+        edge_chars,
+        edge_targets,
+        node_ranks,
+        rank_ids,
+        array("I", word_ids),
+        word_ends,
+    )
+    return header + b"".join(table.tobytes() for table in tables) + text
+
+
+MATCHERS = {
+    matcher.name: matcher
+    for matcher in (
+        RegexMatcher,
+        AhoCorasickMatcher,
+        TrieMatcher,
+        FlatTrieMatcher,
+    )
+}
+
+
+def get_matcher(name: str) -> type[Matcher]:
+    """Returns the matching engine registered under name."""
+    try:
+        return MATCHERS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown matcher {name}. Available matchers: {list(MATCHERS)}."
+        ) from None
@@ -0,0 +1,167 @@
+"""Opt-in instrumentation of the RedFlagger.
+
+A RedFlagger given a Metrics object counts the documents it scans, the
+documents it flags and the words it finds, and records how long scans,
+loading and rebuilding the matcher take in latency histograms. Hooks
+receive every measurement as it is made, to forward it to a metrics
+system such as Prometheus or StatsD:
+
+    def forward(kind, name, value):
+        if kind == "timing":
+            statsd.timing(name, value * 1000)
+        else:
+            statsd.incr(name, value)
+
+    metrics = Metrics()
+    metrics.add_hook(forward)
+    red_flagger = RedFlagger(metrics=metrics)
+
+Without a Metrics object, the RedFlagger only pays for a None check.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Optional
+
+# Upper bounds in seconds, like the default buckets of Prometheus clients
+# with finer steps below a millisecond.
+DEFAULT_BUCKETS = (
+    0.00001,
+    0.000025,
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Called with the kind ("counter" or "timing"), name and value.
+Hook = Callable[[str, str, float], Any]
+
+
+class Histogram:
+    """Counts of observations by bucket, with their total and sum."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # The last count is for observations above every bucket.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """The upper bound of the bucket holding the q quantile, or None
+        if there are no observations (inf if it is above every bucket)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> dict[str, Any]:
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            cumulative.append([bound, seen])
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            # Cumulative, like Prometheus "le" buckets.
+            "buckets": cumulative,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Metrics:
+    """Counters and latency histograms, shared by any number of threads.
+
+    Pickled copies (e.g. in scan_parallel workers) start empty and without
+    hooks.
+    """
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._hooks: list[Hook] = []
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"buckets": self._buckets}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["buckets"])
+
+    def add_hook(self, hook: Hook) -> None:
+        """Calls hook(kind, name, value) for every measurement."""
+        self._hooks.append(hook)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        for hook in self._hooks:
+            hook("counter", name, value)
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self._buckets)
+            histogram.observe(seconds)
+        for hook in self._hooks:
+            hook("timing", name, seconds)
+
+    def record_results(self, results: list[Any]) -> None:
+        """Counts scanned documents, flagged documents and found words."""
+        self.increment("documents", len(results))
+        self.increment("flagged_documents", sum(map(bool, results)))
+        if results and isinstance(results[0], list):
+            self.increment("words", sum(map(len, results)))
+
+    def snapshot(self) -> dict[str, Any]:
+        """The counters, histograms and the share of flagged documents."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {
+                name: histogram.snapshot()
+                for name, histogram in self.histograms.items()
+            }
+        documents = counters.get("documents", 0)
+        return {
+            "counters": counters,
+            "histograms": histograms,
+            "match_rate": (
+                counters.get("flagged_documents", 0) / documents
+                if documents
+                else None
+            ),
+        }
+
+    def reset(self) -> None:
+        """Drops every measurement, the hooks are kept."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
@@ -0,0 +1,400 @@
+"""Normalization of obfuscated spellings before matching.
+
+A Normalizer rewrites both the phrases of the wordlist and the documents
+into a canonical form, so one phrase matches its obfuscated variants
+("sh1t", "$hit", "shiiiit", "s.h.i.t", "s h i t", "𝐬𝐡𝐢𝐭") without adding
+them to the wordlist:
+- Unicode folding: compatibility forms (NFKC), accents and a table of
+    lookalike letters from other scripts map to plain letters,
+- leet characters map to letters within runs containing a letter,
+- separators between single characters are removed ("s.h.i.t" and
+    "s h i t", but not "shit-faced"),
+- runs of a repeated character collapse to one.
+
+The folding and leet steps replace characters one for one, and the
+others are done by two precompiled regular expressions, so normalizing
+is a few linear passes in C with Python code run only at the edits.
+Where every normalized character came from is kept, as the pieces
+copied by every pass, to report matches at their offsets in the original
+document.
+
+A collapsed run remembers its length, and a phrase only matches where
+the runs of the document are as long as its own, or elongated (three or
+more), so "shiiit" matches "shit" and "asss" matches "ass", but "as"
+doesn't match "ass" and "assess" doesn't match "asses".
+
+Phrases are also matched as written, and those matches are kept over
+the normalized ones, unless a longer normalized match covers them ("y"
+in "f l u f f y"), so a normalized matcher flags at least what a trie of
+the same phrases flags ("shit@home", where "@" would be read as "a").
+Of the phrases a normalized match could be, one spelled as in the
+document wins, then one without leet characters ("bitch" over "b1tch").
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Iterator, NamedTuple, Optional
+
+from .matchers import Match, Matcher, TrieMatcher, fold_case
+
+LEET = {
+    "0": "o",
+    "1": "i",
+    "3": "e",
+    "4": "a",
+    "5": "s",
+    "7": "t",
+    "8": "b",
+    "@": "a",
+    "$": "s",
+    "!": "i",
+    "|": "l",
+    "+": "t",
+}
+# Leet characters more often punctuation when they end or start a word.
+_EDGE_PUNCTUATION = "!|+"
+SEPARATORS = " .,-_~"
+# Letters of other scripts that look like latin ones, beyond what NFKC
+# and removing accents already fold.
+CONFUSABLES = {
+    "а": "a",
+    "в": "b",
+    "е": "e",
+    "ё": "e",
+    "к": "k",
+    "м": "m",
+    "н": "h",
+    "о": "o",
+    "р": "p",
+    "с": "c",
+    "т": "t",
+    "у": "y",
+    "х": "x",
+    "і": "i",
+    "ї": "i",
+    "ј": "j",
+    "ѕ": "s",
+    "ԁ": "d",
+    "ԛ": "q",
+    "ԝ": "w",
+    "ɑ": "a",
+    "ɡ": "g",
+    "ı": "i",
+    "α": "a",
+    "β": "b",
+    "ε": "e",
+    "η": "n",
+    "ι": "i",
+    "κ": "k",
+    "ν": "v",
+    "ο": "o",
+    "ρ": "p",
+    "τ": "t",
+    "υ": "u",
+    "χ": "x",
+}
+# Ranges of combining marks, e.g. the accents of "s̈ḧïẗ".
+_COMBINING_MARKS = (
+    r"\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f"
+)
+
+
+class _FoldingTable(dict):
+    """A str.translate table folding characters one for one, filled in
+    as characters are first seen."""
+
+    def __missing__(self, code: int) -> str:
+        char = chr(code)
+        folded = "".join(
+            c
+            for c in unicodedata.normalize("NFKD", char)
+            if not unicodedata.combining(c)
+        )
+        folded = CONFUSABLES.get(folded.lower(), folded.lower())
+        # Characters folding to several or none are left as they are,
+        # to keep the offsets.
+        self[code] = folded if len(folded) == 1 else char
+        return self[code]
+
+
+# The positions where the pieces copied by an edit pass start, in the
+# text after and before it.
+Pieces = tuple[array, array]
+
+
+def _source(pieces: Optional[Pieces], position: int) -> int:
+    """The position before an edit pass of a character after it."""
+    if pieces is None:
+        return position
+    starts, sources = pieces
+    piece = bisect_right(starts, position) - 1
+    return sources[piece] + position - starts[piece]
+
+
+def _edit(
+    pattern: re.Pattern, text: str, runs: Optional[dict[int, int]] = None
+) -> tuple[str, Optional[Pieces]]:
+    """Removes the matches of pattern from text, or collapses them to
+    their first character and records their length in runs."""
+    pieces = []
+    starts = array("i")
+    sources = array("i")
+    length = 0
+    position = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        if start > position:
+            starts.append(length)
+            sources.append(position)
+            pieces.append(text[position:start])
+            length += start - position
+        if runs is not None:
+            starts.append(length)
+            sources.append(start)
+            runs[length] = end - start
+            pieces.append(text[start])
+            length += 1
+        position = end
+    if position == 0:
+        return text, None
+    starts.append(length)
+    sources.append(position)
+    pieces.append(text[position:])
+    return "".join(pieces), (starts, sources)
+
+
+def _same_run(document_run: int, phrase_run: int, char: str) -> bool:
+    """Whether a run of the document matches a run of a phrase: as long,
+    or longer where it's elongated or whitespace."""
+    return document_run == phrase_run or (
+        document_run > phrase_run and (document_run >= 3 or char.isspace())
+    )
+
+
+class Normalized(NamedTuple):
+    text: str
+    # The pieces of the passes removing characters and collapsing runs,
+    # None where a pass didn't change the text.
+    removed: Optional[Pieces]
+    collapsed: Optional[Pieces]
+    # The length of the collapsed runs, by position in text.
+    runs: dict[int, int]
+
+    def span(self, start: int, end: int) -> tuple[int, int]:
+        """The span of the original text a span of text comes from."""
+        last = _source(self.collapsed, end - 1) + self.runs.get(end - 1, 1)
+        start = _source(self.collapsed, start)
+        return (
+            _source(self.removed, start),
+            _source(self.removed, last - 1) + 1,
+        )
+
+
+class Normalizer:
+    """Rewrites text into the canonical form phrases are matched in.
+
+    Every step can be turned off: leet is a map of characters to letters
+    (None to disable), separators the characters removed between single
+    characters ("" to disable).
+    """
+
+    def __init__(
+        self,
+        leet: Optional[dict[str, str]] = LEET,
+        collapse_repeats: bool = True,
+        separators: str = SEPARATORS,
+        fold_unicode: bool = True,
+    ):
+        self.leet = dict(leet or {})
+        self.collapse_repeats = collapse_repeats
+        self.separators = separators
+        self.fold_unicode = fold_unicode
+        self._folding = _FoldingTable()
+        self._leet_table = str.maketrans(self.leet)
+        # Runs of word and leet characters holding a leet character. The
+        # lookahead only runs at the start of a run, which keeps it linear.
+        leet_chars = re.escape("".join(self.leet))
+        self._leet_run = (
+            re.compile(
+                rf"(?<![\w{leet_chars}])(?=[\w{leet_chars}]*[{leet_chars}])"
+                rf"[\w{leet_chars}]+"
+            )
+            if self.leet
+            else None
+        )
+        self._has_leet = (
+            re.compile(f"[{leet_chars}]").search if self.leet else None
+        )
+        self._runs = re.compile(r"(.)\1+", re.DOTALL)
+        removed = []
+        if separators:
+            # Between two characters that are words of their own, where an
+            # apostrophe is part of a word ("it's b"). The lookbehind only
+            # runs at separators.
+            seps = re.escape(separators)
+            removed.append(
+                rf"[{seps}](?<=(?<![\w'])\w[{seps}])[{seps}]*(?=\w(?![\w']))"
+            )
+        self._removed = re.compile("|".join(removed)) if removed else None
+        # Combining marks are only looked for in non-ASCII text.
+        if fold_unicode:
+            removed.append(f"[{_COMBINING_MARKS}]+")
+        self._unicode_removed = (
+            re.compile("|".join(removed)) if removed else None
+        )
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            "leet": self.leet,
+            "collapse_repeats": self.collapse_repeats,
+            "separators": self.separators,
+            "fold_unicode": self.fold_unicode,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def _replace_leet(self, match: re.Match) -> str:
+        run = match.group()
+        # Punctuation-like leet characters at the edges of the run stay.
+        core = run.strip(_EDGE_PUNCTUATION)
+        if not any(char.isalpha() for char in core):
+            return run
+        start = run.index(core)
+        return (
+            run[:start]
+            + core.translate(self._leet_table)
+            + run[start + len(core) :]
+        )
+
+    def normalize(self, text: str) -> Normalized:
+        """Normalizes text, keeping where every character came from."""
+        text = fold_case(text)
+        edits = self._removed
+        if not text.isascii():
+            edits = self._unicode_removed
+            if self.fold_unicode:
+                text = text.translate(self._folding)
+        if self._has_leet is not None and self._has_leet(text):
+            text = self._leet_run.sub(self._replace_leet, text)
+        removed = None
+        if edits is not None:
+            text, removed = _edit(edits, text)
+        runs: dict[int, int] = {}
+        collapsed = None
+        # After removing separators, to collapse "a s s" as "ass".
+        if self.collapse_repeats:
+            text, collapsed = _edit(self._runs, text, runs)
+        return Normalized(text, removed, collapsed, runs)
+
+
+class NormalizedMatcher(Matcher):
+    """A trie of the normalized phrases, matched in normalized documents.
+
+    Matches are reported at their offsets in the original document. The
+    size of the trie doesn't depend on how many obfuscated spellings a
+    phrase has.
+    """
+
+    name = "normalized"
+    incremental = True
+    # It depends on the normalizer as well as the wordlist.
+    cacheable = False
+
+    def __init__(
+        self,
+        normalizer: Normalizer,
+        word_list: list[str],
+        word_ids: Optional[list[int]] = None,
+    ):
+        super().__init__(word_list, word_ids)
+        self._normalizer = normalizer
+        self._trie = TrieMatcher([])
+        self._exact = TrieMatcher([])
+        self._runs: dict[int, dict[int, int]] = {}
+        self._priorities: dict[int, tuple[int, bool, int]] = {}
+        for word, word_id in zip(self._word_list, self._word_ids):
+            self.add_word(word, word_id)
+        del self._word_list, self._word_ids
+
+    def add_word(self, word: str, word_id: int) -> None:
+        normalized = self._normalizer.normalize(word)
+        self._trie.add_word(normalized.text, word_id)
+        self._exact.add_word(word, word_id)
+        self._runs[word_id] = normalized.runs
+        leet = any(char in self._normalizer.leet for char in word)
+        self._priorities[word_id] = (len(word.split()), leet, word_id)
+
+    def remove_word(self, word: str, word_id: int) -> None:
+        self._trie.remove_word(self._normalizer.normalize(word).text, word_id)
+        self._exact.remove_word(word, word_id)
+        self._runs.pop(word_id, None)
+        self._priorities.pop(word_id, None)
+
+    def _verified(self, normalized: Normalized) -> Iterator[Match]:
+        """The candidates whose repeated characters are repeated in the
+        document as many times as in the phrase, or more if elongated."""
+        text = normalized.text
+        runs = normalized.runs
+        for start, end, word_id in self._trie.candidates(text):
+            phrase_runs = self._runs[word_id]
+            if all(
+                _same_run(
+                    runs.get(position, 1),
+                    phrase_runs.get(position - start, 1),
+                    text[position],
+                )
+                for position in range(start, end)
+            ):
+                yield start, end, word_id
+
+    def finditer(self, document: str) -> Iterator[Match]:
+        exact = list(self._exact.finditer(document))
+        starts = [start for start, _, _ in exact]
+        ends = [end for _, end, _ in exact]
+        normalized = self._normalizer.normalize(document)
+        priorities = self._priorities
+        candidates = sorted(
+            (
+                (*normalized.span(start, end), word_id)
+                for start, end, word_id in self._verified(normalized)
+            ),
+            key=lambda match: (match[0], priorities[match[2]]),
+        )
+        matches = []
+        covered = set()
+        last_end = 0
+        for start, end, word_id in candidates:
+            if start < last_end:
+                continue
+            # The exact matches it overlaps are kept unless it's longer
+            # and covers them.
+            first = bisect_right(ends, start)
+            last = bisect_left(starts, end)
+            if first < last and (
+                starts[first] < start
+                or ends[last - 1] > end
+                or (starts[first], ends[last - 1]) == (start, end)
+            ):
+                continue
+            covered.update(range(first, last))
+            matches.append((start, end, word_id))
+            last_end = end
+        if not matches:
+            return iter(exact)
+        matches.extend(
+            match for i, match in enumerate(exact) if i not in covered
+        )
+        return iter(sorted(matches))
+
+    def search(self, document: str) -> bool:
+        if self._exact.search(document):
+            return True
+        normalized = self._normalizer.normalize(document)
+        if not self._trie.search(normalized.text):
+            return False
+        for _ in self._verified(normalized):
+            return True
+        return False
@@ -4,9 +4,23 @@ Modified from:
 https://stackoverflow.com/questions/2490334/simple-way-to-encode-a-string-according-to-a-password
 """  # noqa: E501
 
+import struct
+import sys
 import zlib
 from base64 import urlsafe_b64decode as b64d
 from base64 import urlsafe_b64encode as b64e
+from typing import NamedTuple
+
+# The bulk format obscures a whole wordlist in one blob: a fixed header
+# followed by a single zlib stream holding the UTF-8 words separated by
+# line breaks.
+BULK_MAGIC = b"RFWC"
+BULK_VERSION = 1
+# magic, version, flags, reserved, word count, payload size, crc32 of the
+# decompressed payload.
+_BULK_HEADER = struct.Struct("<4sBBHIII")
+# The words are the output of filter_overlaps_and_sort.
+FLAG_FILTERED = 1
 
 
 class ObscuringError(Exception):
@@ -25,8 +39,66 @@ def unobscure(obscured: bytes) -> str:
     return data.decode("utf-16")
 
 
+class ObscuredWordlist(NamedTuple):
+    words: list[str]
+    filtered: bool
+
+
+def is_obscured_wordlist(data: bytes) -> bool:
+    """Whether data is in the bulk format rather than one word per line."""
+    return data[: len(BULK_MAGIC)] == BULK_MAGIC
+
+
+def obscure_wordlist(words: list[str], filtered: bool = False) -> bytes:
+    """Obscures a whole wordlist in the bulk format.
+
+    filtered records that words is the output of filter_overlaps_and_sort,
+    so loading it can skip filtering.
+    """
+    if any("\n" in word for word in words):
+        raise ValueError("Words can't contain line breaks.")
+    body = "\n".join(words).encode("utf-8")
+    flags = FLAG_FILTERED if filtered else 0
+    payload = zlib.compress(body, 9)
+    header = _BULK_HEADER.pack(
+        BULK_MAGIC,
+        BULK_VERSION,
+        flags,
+        0,
+        len(words),
+        len(payload),
+        zlib.crc32(body),
+    )
+    return header + payload
+
+
+def unobscure_wordlist(data: bytes) -> ObscuredWordlist:
+    """Decodes a wordlist obscured by obscure_wordlist in a single pass."""
+    if len(data) < _BULK_HEADER.size or not is_obscured_wordlist(data):
+        raise ObscuringError("Not an obscured wordlist.")
+    _, version, flags, _, count, size, checksum = _BULK_HEADER.unpack_from(
+        data
+    )
+    if version > BULK_VERSION:
+        raise ObscuringError(
+            f"Unsupported wordlist version {version}, please upgrade rfwc."
+        )
+    payload = data[_BULK_HEADER.size :]
+    if len(payload) != size:
+        raise ObscuringError("The obscured wordlist is truncated.")
+    try:
+        body = zlib.decompress(payload)
+    except zlib.error as e:
+        raise ObscuringError(f"The obscured wordlist is corrupt: {e}.")
+    if zlib.crc32(body) != checksum:
+        raise ObscuringError("The checksum of the obscured wordlist is wrong.")
+    words = body.decode("utf-8").split("\n") if count else []
+    if len(words) != count:
+        raise ObscuringError("The obscured wordlist has the wrong length.")
+    return ObscuredWordlist(words, bool(flags & FLAG_FILTERED))
+
+
 if __name__ == "__main__":
-    # TODO delete this code when it is integrated
-    with open("data/toxic_keywords_b16.txt", "rb") as toxic_file:
-        for line in toxic_file:
-            print(unobscure(line))
+    with open(sys.argv[1], "rb") as toxic_file:
+        for word in unobscure_wordlist(toxic_file.read()).words:
+            print(word)
@@ -0,0 +1,67 @@
+"""Multi-process scanning of large corpora.
+
+Matching is pure Python and bound by the GIL, so large corpora are split
+into chunks that are scanned by a pool of worker processes. Every worker
+receives the RedFlagger once, when it starts, rather than with every task.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
+
+from .utils import chunked
+
+if TYPE_CHECKING:
+    from .red_flagger import RedFlagger
+
+# The RedFlagger of the current worker process, set by _init_worker.
+_worker_flagger: Optional["RedFlagger"] = None
+
+
+def _init_worker(red_flagger: "RedFlagger") -> None:
+    global _worker_flagger
+    _worker_flagger = red_flagger
+
+
+def _scan_chunk(
+    chunk: list[str], return_words: bool
+) -> Union[list[list[str]], list[bool]]:
+    return _worker_flagger._detect_abuse_chunk(chunk, return_words)
+
+
+def scan_parallel(
+    red_flagger: "RedFlagger",
+    documents: Iterable[str],
+    workers: Optional[int] = None,
+    chunk_size: int = 1024,
+    return_words: bool = True,
+) -> Iterator[Union[list[str], bool]]:
+    """Runs detect_abuse over documents in a pool of worker processes.
+
+    Results are yielded lazily and in the order of the input documents. At
+    most two chunks per worker are in flight at any time, so memory use
+    does not depend on how many documents there are.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(documents, chunk_size)
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(red_flagger,),
+    ) as executor:
+
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            pending.append(executor.submit(_scan_chunk, chunk, return_words))
+            return True
+
+        while len(pending) < 2 * workers and submit_next():
+            pass
+        while pending:
+            results = pending.popleft().result()
+            submit_next()
+            yield from results
@@ -1,69 +1,328 @@
 import os.path
-import re
-from typing import Union
+import time
+from array import array
+from typing import Any, Callable, Iterable, Iterator, Optional, Union
 from collections import Counter
+from itertools import chain
 
-from .obscure_data import unobscure
-from .utils import filter_overlaps_and_sort
+from .buffers import DEFAULT_BLOCK_SIZE, Buffer, scan_buffer, scan_file
+from .cache import compiled_path, load_compiled, save_compiled
+from .categories import Categories
+from .columns import COLUMN_OUTPUTS, like_column, row_batches
+from .fuzzy import MIN_LENGTH, FuzzyMatcher
+from .matchers import (
+    FlatTrieMatcher,
+    Matcher,
+    TrieMatcher,
+    get_matcher,
+    pack_trie,
+)
+from .metrics import Metrics
+from .normalize import NormalizedMatcher, Normalizer
+from .obscure_data import (
+    is_obscured_wordlist,
+    unobscure,
+    unobscure_wordlist,
+)
+from .parallel import scan_parallel
+from .result_cache import CacheInfo, ResultCache
+from .scan import ScanResult
+from .shared import attach_shared_memory, map_tables
+from .utils import chunked, filter_overlaps_and_sort, import_optional
+from .word_index import WordIndex
+
+VECTOR_OUTPUTS = ("list", "sparse", "numpy")
+SPAN_OUTPUTS = ("array", "numpy")
+# numpy dtype of the records returned by find_spans.
+SPAN_DTYPE = [("start", "i4"), ("end", "i4"), ("word_index", "i4")]
 
 
 class RedFlagger:
     DATA_DIR = os.path.join(
-        os.path.dirname(__file__), "data/toxic_keywords_b16.txt"
+        os.path.dirname(__file__), "data/toxic_keywords.rfwc"
     )
+    # The name of the main wordlist in the results of detect_categories.
+    DEFAULT_CATEGORY = "default"
+
+    def __init__(
+        self,
+        matcher: str = "trie",
+        use_cache: bool = False,
+        cache_dir: Optional[str] = None,
+        result_cache_size: int = 0,
+        result_cache_bytes: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+        categories: Optional[dict[str, Iterable[str]]] = None,
+        normalizer: Optional[Normalizer] = None,
+        max_distance: int = 0,
+        min_length: int = MIN_LENGTH,
+    ):
+        # The engine used for matching, see rfwc.matchers.MATCHERS.
+        self._matcher_class = get_matcher(matcher)
+        if normalizer is not None or max_distance:
+            if self._matcher_class is not TrieMatcher:
+                raise ValueError(
+                    "Normalizing and fuzzy matching require the trie matcher."
+                )
+            if normalizer is not None and max_distance:
+                raise ValueError(
+                    "A normalizer can't be used with fuzzy matching."
+                )
+        self._set_options(result_cache_size, result_cache_bytes, metrics)
+        # Rewrites obfuscated spellings before matching, off by default.
+        self._normalizer = normalizer
+        # The number of typos a fuzzy match may have, 0 to match exactly,
+        # and the length of a word allowing one typo.
+        self._max_distance = max_distance
+        self._min_length = min_length
+        for name, words in (categories or {}).items():
+            self.add_category(name, words)
+        if use_cache and self._timed(
+            "load_compiled", self._load_compiled, cache_dir
+        ):
+            return
+        self._set_wordlist(self._timed("load_wordlist", self._load_wordlist))
+        self._matcher = self._timed("load_matcher", self._load_matcher)
+        if use_cache:
+            self._save_compiled(cache_dir)
+
+    def _set_options(
+        self,
+        result_cache_size: int,
+        result_cache_bytes: Optional[int],
+        metrics: Optional[Metrics],
+    ) -> None:
+        # Instrumentation, off unless a Metrics object is given.
+        self._metrics = metrics
+        # Results of detect_abuse for repeated documents, off by default.
+        self._result_cache = (
+            ResultCache(result_cache_size, result_cache_bytes)
+            if result_cache_size
+            else None
+        )
+        # The shared memory or file mapping the matcher tables are in.
+        self._shared: Any = None
+        # Named wordlists, matched by detect_categories.
+        self._categories = Categories()
+
+    @classmethod
+    def from_shared(
+        cls,
+        name: Optional[str] = None,
+        path: Optional[str] = None,
+        buffer: Any = None,
+        result_cache_size: int = 0,
+        result_cache_bytes: Optional[int] = None,
+        metrics: Optional[Metrics] = None,
+    ) -> "RedFlagger":
+        """Creates a RedFlagger on matcher tables made by get_shared_tables.
+
+        Exactly one of name (a block of shared memory, see
+        rfwc.shared.share_tables), path (a file written by
+        rfwc.shared.write_tables, which is memory-mapped) or buffer (any
+        object supporting the buffer protocol) locates the tables. They
+        aren't copied, so every process attached to the same tables shares
+        one copy of the matcher. The RedFlagger uses the flat-trie matcher,
+        which can't be patched, so add_words and remove_words build a
+        private matcher.
+        """
+        if sum(source is not None for source in (name, path, buffer)) != 1:
+            raise ValueError("Give exactly one of name, path or buffer.")
+        red_flagger = cls.__new__(cls)
+        red_flagger._matcher_class = FlatTrieMatcher
+        red_flagger._set_options(
+            result_cache_size, result_cache_bytes, metrics
+        )
+        red_flagger._normalizer = None
+        red_flagger._max_distance = 0
+        red_flagger._min_length = MIN_LENGTH
+        if name is not None:
+            red_flagger._shared = attach_shared_memory(name)
+            buffer = red_flagger._shared.buf
+        elif path is not None:
+            red_flagger._shared = map_tables(path)
+            buffer = red_flagger._shared
+        red_flagger._matcher = red_flagger._timed(
+            "load_matcher", FlatTrieMatcher.from_buffer, buffer
+        )
+        words, word_ids = red_flagger._matcher.words()
+        red_flagger._index = WordIndex(words, word_ids)
+        return red_flagger
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Shared memory and mappings don't pickle, the matcher pickles a
+        # copy of its tables.
+        return {**self.__dict__, "_shared": None}
+
+    def get_shared_tables(self) -> bytes:
+        """Packs the wordlist into the flat tables of the flat-trie
+        matcher, to be shared between processes with from_shared."""
+        lexicon = self._index.lexicon
+        return pack_trie(lexicon.words(), lexicon.ids)
 
-    def __init__(self):
-        self._wordlist = self._load_wordlist()
-        self._case_map = {
-            word.lower(): word for word in self._wordlist
-        }  # Map lowercase items to their original case
-        self._regex_wordlist = self._load_wordlist_regex(self._wordlist)
+    def _timed(self, name: str, function: Callable, *args: Any) -> Any:
+        """Calls function, recording how long it took if metrics are on."""
+        if self._metrics is None:
+            return function(*args)
+        start = time.perf_counter()
+        result = function(*args)
+        self._metrics.observe(name, time.perf_counter() - start)
+        return result
+
+    def _load_compiled(self, cache_dir: Optional[str]) -> bool:
+        """Load the wordlist and matcher from the compiled artifact.
+        Returns False when there is no up to date artifact."""
+        if not self._engine().cacheable:
+            return False
+        try:
+            path = compiled_path(
+                self.DATA_DIR, self._matcher_class.name, cache_dir
+            )
+        except OSError:
+            return False
+        compiled = load_compiled(path)
+        if compiled is None:
+            return False
+        try:
+            self._set_wordlist(compiled["wordlist"])
+            self._matcher = self._matcher_class.from_state(
+                compiled["matcher_state"]
+            )
+        except (KeyError, TypeError, ValueError):
+            # Written by a different version of a matcher.
+            return False
+        return True
+
+    def _save_compiled(self, cache_dir: Optional[str]) -> None:
+        """Write the wordlist and matcher to the compiled artifact.
+        Failing to write it (e.g. read-only home) is not an error."""
+        if not self._engine().cacheable:
+            return
+        try:
+            path = compiled_path(
+                self.DATA_DIR, self._matcher_class.name, cache_dir
+            )
+        except OSError:
+            return
+        save_compiled(
+            path,
+            {
+                "wordlist": self._index.lexicon.words(),
+                "matcher_state": self._matcher.get_state(),
+            },
+        )
 
     def _load_wordlist(self) -> list[str]:
-        """Load in the wordlist from the encoded base16 file.
-        Duplicates may exist in read-in set, so filtering at read in"""
+        """Load in the wordlist from the obscured file, either in the bulk
+        format or with one obscured word per line.
+        Duplicates may exist in read-in set, so filtering at read in, unless
+        the file records that it was filtered already."""
         with open(self.DATA_DIR, "rb") as word_list_file:
-            return filter_overlaps_and_sort(
-                [unobscure(word) for word in word_list_file]
-            )
+            data = word_list_file.read()
+        if is_obscured_wordlist(data):
+            wordlist = unobscure_wordlist(data)
+            if wordlist.filtered:
+                return wordlist.words
+            return filter_overlaps_and_sort(wordlist.words)
+        return filter_overlaps_and_sort(
+            [unobscure(word) for word in data.splitlines() if word.strip()]
+        )
+
+    def _set_wordlist(self, word_list: list[str]) -> None:
+        """Index a filtered and sorted wordlist."""
+        self._index = WordIndex(word_list)
+
+    def _engine(self) -> type[Matcher]:
+        """The class of the matcher built by _load_matcher."""
+        if self._normalizer is not None:
+            return NormalizedMatcher
+        if self._max_distance:
+            return FuzzyMatcher
+        return self._matcher_class
 
-    def _load_wordlist_regex(self, word_list: list[str]) -> str:
-        """Convert the wordlist to a regular expression."""
-        escaped_word_list = [rf"\b{re.escape(w)}\b" for w in word_list]
-        return "|".join(escaped_word_list)
+    def _load_matcher(self) -> Matcher:
+        """Build the configured matching engine from the wordlist."""
+        lexicon = self._index.lexicon
+        if self._normalizer is not None:
+            return NormalizedMatcher(
+                self._normalizer, lexicon.words(), lexicon.ids
+            )
+        if self._max_distance:
+            return FuzzyMatcher(
+                lexicon.words(),
+                lexicon.ids,
+                self._max_distance,
+                self._min_length,
+            )
+        return self._matcher_class(lexicon.words(), lexicon.ids)
 
     def get_wordlist(self) -> list[str]:
         """Returns the currently loaded in list of words."""
-        return self._wordlist.copy()
+        return self._index.lexicon.words()
 
     def add_words(self, words: list[str]) -> None:
         """Extend the wordlist with new words.
-        This re-triggers duplication and overlap checking.
+        This re-triggers duplication and overlap checking, for the new words
+        and the entries they overlap with only.
         """
-        # Now filters and sorts the _wordlist; however, no filtering is
-        # performed on words parameter so adjust the case_map update so
-        # that it also checks if the word we're trying to add was
-        # maintained in the word list after filtering overlaps
-        self._wordlist.extend(words)
-        self._wordlist = filter_overlaps_and_sort(self._wordlist)
-        self._case_map.update(
-            {word.lower(): word for word in words if word in self._wordlist}
-        )
-        # Updating the regex.
-        self._regex_wordlist = self._load_wordlist_regex(self._wordlist)
+        changes = self._timed("update_wordlist", self._index.add, words)
+        self._timed("update_matcher", self._update_matcher, changes)
+        if self._result_cache is not None:
+            self._result_cache.clear()
 
     def remove_words(self, words_to_remove: list[str]) -> None:
         """Removes words from the configured wordlist.
         Removed words will no longer be used in future detect_abuse calls.
         """
-        self._wordlist = [
-            w for w in self._wordlist if w not in words_to_remove
-        ]
-        self._case_map = {
-            k: v for k, v in self._case_map.items() if k not in words_to_remove
-        }
-        # Updating the regex.
-        self._regex_wordlist = self._load_wordlist_regex(self._wordlist)
+        removed = self._timed(
+            "update_wordlist", self._index.remove, words_to_remove
+        )
+        self._timed("update_matcher", self._update_matcher, ([], removed))
+        if self._result_cache is not None:
+            self._result_cache.clear()
+
+    def add_category(self, name: str, words: Iterable[str]) -> None:
+        """Adds words to a named wordlist, creating it if needed.
+
+        Categories are only used by detect_categories. Overlapping phrases
+        are filtered out within a category, not across categories.
+        """
+        if name == self.DEFAULT_CATEGORY:
+            raise ValueError(
+                f"{name} is the name of the main wordlist, use add_words."
+            )
+        self._categories.add(name, words)
+
+    def remove_category_words(self, name: str, words: list[str]) -> None:
+        """Removes words from a named wordlist."""
+        self._categories.remove(name, words)
+
+    def remove_category(self, name: str) -> None:
+        """Removes a named wordlist."""
+        self._categories.drop(name)
+
+    def get_categories(self) -> list[str]:
+        """Returns the names of the named wordlists."""
+        return self._categories.names()
+
+    def get_category_wordlist(self, name: str) -> list[str]:
+        """Returns the words of a named wordlist."""
+        return self._categories.wordlist(name)
+
+    def _update_matcher(
+        self,
+        changes: Optional[tuple[list[tuple[int, str]], list[tuple[int, str]]]],
+    ) -> None:
+        """Patch the matcher with the added and removed words, or rebuild
+        it when the matcher can't be patched or the whole list changed."""
+        if changes is None or not self._matcher.incremental:
+            self._matcher = self._timed("load_matcher", self._load_matcher)
+            return
+        added, removed = changes
+        for word_id, word in removed:
+            self._matcher.remove_word(word, word_id)
+        for word_id, word in added:
+            self._matcher.add_word(word, word_id)
 
     def detect_abuse(
         self, document: str, return_words: bool = True
@@ -74,17 +333,326 @@ class RedFlagger:
         Otherwise, a boolean representing if there were any terms
         in the list returned.
         """
+        if self._metrics is not None:
+            start = time.perf_counter()
+            result = self._detect_abuse(document, return_words)
+            self._metrics.observe("detect_abuse", time.perf_counter() - start)
+            self._metrics.record_results([result])
+            return result
+        return self._detect_abuse(document, return_words)
+
+    def detect_categories(
+        self, document: str, return_words: bool = True
+    ) -> dict[str, Union[list[str], bool]]:
+        """Like detect_abuse, for every category at once.
+
+        Returns the result of detect_abuse under DEFAULT_CATEGORY, and the
+        words (or whether any was found) of every named wordlist under its
+        name. All the named wordlists are matched in a single pass.
+        """
+        start = time.perf_counter() if self._metrics is not None else 0.0
+        results = {
+            self.DEFAULT_CATEGORY: self._detect_abuse(document, return_words)
+        }
+        results.update(self._categories.detect(document, return_words))
+        if self._metrics is not None:
+            self._metrics.observe(
+                "detect_categories", time.perf_counter() - start
+            )
+        return results
+
+    def _detect_abuse(
+        self, document: str, return_words: bool
+    ) -> Union[list[str], bool]:
+        if self._result_cache is not None:
+            return self._detect_abuse_cached(document, return_words)
         if return_words:
-            matches = re.findall(
-                self._regex_wordlist, document, flags=re.IGNORECASE
+            word = self._index.lexicon.word
+            return [
+                word(word_id)
+                for _, _, word_id in self._matcher.finditer(document)
+            ]
+        return self._matcher.search(document)
+
+    def _detect_abuse_cached(
+        self, document: str, return_words: bool
+    ) -> Union[list[str], bool]:
+        """detect_abuse through the result cache. Words are cached as
+        tuples, so callers can't change a cached result."""
+        result = self._result_cache.get(document, return_words)
+        if result is None:
+            if return_words:
+                word = self._index.lexicon.word
+                result = tuple(
+                    word(word_id)
+                    for _, _, word_id in self._matcher.finditer(document)
+                )
+            else:
+                result = self._matcher.search(document)
+            self._result_cache.put(document, return_words, result)
+        return list(result) if return_words else result
+
+    def get_metrics(self) -> Optional[dict[str, Any]]:
+        """Returns a snapshot of the metrics, or None if they are off."""
+        if self._metrics is None:
+            return None
+        return self._metrics.snapshot()
+
+    def result_cache_info(self) -> Optional[CacheInfo]:
+        """Returns the hits, misses and size of the result cache, or None
+        if results aren't cached."""
+        if self._result_cache is None:
+            return None
+        return self._result_cache.info()
+
+    def scan(self, document: str) -> ScanResult:
+        """Scans the document once for every output.
+
+        The result gives the flag (.flagged), the words (.words), the
+        spans (.spans) and the bag-of-words (.vector) of detect_abuse,
+        find_spans and get_abuse_vector, computed from the same matches
+        when first read.
+        """
+        if self._metrics is None:
+            return self._scan(document)
+        start = time.perf_counter()
+        result = self._scan(document)
+        self._metrics.observe("scan", time.perf_counter() - start)
+        self._metrics.record_results([result.matches])
+        return result
+
+    def _scan(self, document: str) -> ScanResult:
+        return ScanResult(
+            list(self._matcher.finditer(document)), self._index.lexicon
+        )
+
+    def find_spans(self, document: str, output: str = "array") -> Any:
+        """Finds where the harmful words are in the document.
+
+        Returns the same matches as detect_abuse, from the same single scan,
+        as compact (start, end, word_index) records, where word_index is the
+        position of the word in get_wordlist. output selects the container:
+        - "array": a flat array('i') of start, end, word_index triples.
+        - "numpy": a numpy structured array with the start, end and
+            word_index fields (requires numpy).
+        """
+        if output not in SPAN_OUTPUTS:
+            raise ValueError(
+                f"Unknown output {output}. Available outputs: {SPAN_OUTPUTS}."
             )
-            return [self._case_map[word.lower()] for word in matches]
-        return bool(
-            re.search(self._regex_wordlist, document, flags=re.IGNORECASE)
+        spans = self._scan(document).spans
+        if output == "numpy":
+            np = import_optional("numpy")
+            return np.frombuffer(spans, dtype=SPAN_DTYPE).copy()
+        return spans
+
+    def redact(
+        self, document: str, mask: str = "*", keep_length: bool = True
+    ) -> str:
+        """Replaces the harmful words in the document with mask.
+
+        If keep_length is True, mask is repeated to the length of each word
+        so the offsets of the rest of the document don't change.
+        """
+        pieces = []
+        position = 0
+        for start, end, _ in self._matcher.finditer(document):
+            pieces.append(document[position:start])
+            pieces.append(mask * (end - start) if keep_length else mask)
+            position = end
+        if not pieces:
+            return document
+        pieces.append(document[position:])
+        return "".join(pieces)
+
+    def detect_abuse_many(
+        self,
+        documents: Iterable[str],
+        return_words: bool = True,
+        chunk_size: int = 1024,
+    ) -> Iterator[Union[list[str], bool]]:
+        """Lazily runs detect_abuse over an iterable of documents.
+
+        Documents are consumed chunk_size at a time, so memory use does not
+        depend on how many documents there are. The matcher and wordlist
+        are looked up once per chunk rather than once per document.
+        """
+        for chunk in chunked(documents, chunk_size):
+            yield from self._detect_abuse_chunk(chunk, return_words)
+
+    def scan_parallel(
+        self,
+        documents: Iterable[str],
+        workers: Optional[int] = None,
+        chunk_size: int = 1024,
+        return_words: bool = True,
+    ) -> Iterator[Union[list[str], bool]]:
+        """Like detect_abuse_many, but spread over worker processes.
+
+        workers defaults to the number of CPUs. Results come back in the
+        order of the input documents. Only worth it for large corpora, as
+        starting the workers has a fixed cost.
+        """
+        return scan_parallel(
+            self,
+            documents,
+            workers=workers,
+            chunk_size=chunk_size,
+            return_words=return_words,
         )
 
-    def get_abuse_vector(self, document: str) -> list[int]:
-        """Creates a vector with the counts of each word in the wordlist."""
-        abuse_words = self.detect_abuse(document)
-        word_counts = Counter(abuse_words)
-        return [word_counts[w] for w in self.get_wordlist()]
+    def _detect_abuse_chunk(
+        self, chunk: list[str], return_words: bool
+    ) -> Union[list[list[str]], list[bool]]:
+        """detect_abuse over a list of documents with the lookups hoisted."""
+        if self._metrics is not None:
+            start = time.perf_counter()
+            results = self._scan_chunk(chunk, return_words)
+            self._metrics.observe(
+                "detect_abuse_chunk", time.perf_counter() - start
+            )
+            self._metrics.record_results(results)
+            return results
+        return self._scan_chunk(chunk, return_words)
+
+    def _scan_chunk(
+        self, chunk: list[str], return_words: bool
+    ) -> Union[list[list[str]], list[bool]]:
+        if self._result_cache is not None:
+            cached = self._detect_abuse_cached
+            return [cached(document, return_words) for document in chunk]
+        search = self._matcher.search
+        if return_words:
+            word = self._index.lexicon.word
+            finditer = self._matcher.finditer
+            # Clean documents are ruled out by the faster search first.
+            return [
+                (
+                    [word(word_id) for _, _, word_id in finditer(document)]
+                    if search(document)
+                    else []
+                )
+                for document in chunk
+            ]
+        return [search(document) for document in chunk]
+
+    def detect_abuse_buffer(
+        self, buffer: Buffer, block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Iterator[tuple[int, int, str]]:
+        """Detects harmful words in UTF-8 encoded bytes.
+
+        Accepts bytes, bytearray, memoryview or mmap objects and yields
+        (start, end, word) for every detected word, where start and end are
+        byte offsets into the buffer. The detected words are the same as
+        detect_abuse on the decoded text would return. The buffer is
+        decoded block_size bytes at a time, cut at line breaks.
+        """
+        word = self._index.lexicon.word
+        for start, end, word_id in scan_buffer(
+            self._matcher, buffer, block_size
+        ):
+            yield start, end, word(word_id)
+
+    def detect_abuse_file(
+        self, path: str, block_size: int = DEFAULT_BLOCK_SIZE
+    ) -> Iterator[tuple[int, int, str]]:
+        """Like detect_abuse_buffer, over a memory-mapped UTF-8 file."""
+        word = self._index.lexicon.word
+        for start, end, word_id in scan_file(self._matcher, path, block_size):
+            yield start, end, word(word_id)
+
+    def get_abuse_vector(self, document: str, output: str = "list") -> Any:
+        """Creates a vector with the counts of each word in the wordlist.
+
+        The columns follow the order of get_wordlist. output selects the
+        representation:
+        - "list": a dense list of counts.
+        - "sparse": a list of (index, count) pairs for the non-zero counts,
+            sorted by index.
+        - "numpy": a dense numpy array (requires numpy).
+        """
+        if output not in VECTOR_OUTPUTS:
+            raise ValueError(
+                f"Unknown output {output}."
+                f" Available outputs: {VECTOR_OUTPUTS}."
+            )
+        result = self._scan(document)
+        if output == "sparse":
+            return sorted(result.counts.items())
+        if output == "numpy":
+            np = import_optional("numpy")
+            vector = np.zeros(len(self._index), dtype=np.int64)
+            vector[list(result.counts)] = list(result.counts.values())
+            return vector
+        return result.vector
+
+    def get_abuse_matrix(
+        self,
+        documents: Iterable[str],
+        as_scipy: bool = False,
+        chunk_size: int = 1024,
+    ) -> Any:
+        """Creates a sparse document-term matrix of wordlist counts.
+
+        Rows follow the order of documents and columns the order of
+        get_wordlist. The matrix is built directly in CSR form and returned
+        as ((data, indices, indptr), shape), which scipy.sparse.csr_matrix
+        accepts as is. If as_scipy is True, the scipy matrix is returned
+        instead (requires scipy).
+        """
+        data = array("i")
+        indices = array("i")
+        indptr = array("q", [0])
+        for chunk in chunked(documents, chunk_size):
+            positions = self._index.positions()
+            search = self._matcher.search
+            finditer = self._matcher.finditer
+            for document in chunk:
+                # Most documents are clean, and ruled out faster by search.
+                if not search(document):
+                    indptr.append(len(indices))
+                    continue
+                word_counts = Counter(
+                    positions[word_id] for _, _, word_id in finditer(document)
+                )
+                for index in sorted(word_counts):
+                    indices.append(index)
+                    data.append(word_counts[index])
+                indptr.append(len(indices))
+        shape = (len(indptr) - 1, len(self._index))
+        if as_scipy:
+            sparse = import_optional("scipy.sparse")
+            return sparse.csr_matrix((data, indices, indptr), shape=shape)
+        return (data, indices, indptr), shape
+
+    def scan_column(
+        self, column: Any, output: str = "mask", batch_size: int = 1024
+    ) -> Any:
+        """Scans every row of a column of documents.
+
+        column is a pandas Series, a pyarrow string Array or ChunkedArray,
+        a datasets column (dataset["text"]) or any iterable of strings, and
+        missing values and other non-strings are scanned as empty
+        documents. Rows are converted and scanned batch_size at a time, see
+        rfwc.columns. output selects the result:
+        - "mask": whether every row is flagged, like
+            detect_abuse(return_words=False).
+        - "words": the words found in every row, like detect_abuse.
+        - "matrix": the document-term matrix of get_abuse_matrix.
+        The mask and words come as a Series with the index and name of a
+        Series, as an Arrow array for Arrow input and as a list otherwise.
+        """
+        if output not in COLUMN_OUTPUTS:
+            raise ValueError(
+                f"Unknown output {output}."
+                f" Available outputs: {COLUMN_OUTPUTS}."
+            )
+        batches = row_batches(column, batch_size)
+        if output == "matrix":
+            return self.get_abuse_matrix(
+                chain.from_iterable(batches), chunk_size=batch_size
+            )
+        results: list[Any] = []
+        for rows in batches:
+            results.extend(self._detect_abuse_chunk(rows, output == "words"))
+        return like_column(results, column, output)
@@ -0,0 +1,96 @@
+"""A bounded cache of detect_abuse results for repeated documents."""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, NamedTuple, Optional
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    max_entries: int
+    entries: int
+    bytes: int
+
+
+class ResultCache:
+    """Least recently used cache of results, bounded in entries and bytes.
+
+    Keys hold the documents themselves, so lookups cost a hash of the
+    document (cached by str) and a comparison, and a collision can never
+    return the result of another document. The size in bytes counts the
+    documents and the containers of the results, the words of the results
+    are shared with the wordlist. The cache is safe to share between
+    threads, and pickles empty.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: Optional[int] = None):
+        if max_entries < 1:
+            raise ValueError(
+                f"max_entries must be positive, got {max_entries}."
+            )
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, bool], tuple[Any, int]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"max_entries": self.max_entries, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(state["max_entries"], state["max_bytes"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Drops every entry, the counters keep counting."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def info(self) -> CacheInfo:
+        """The counters and the current size of the cache."""
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.max_entries,
+            len(self._entries),
+            self._bytes,
+        )
+
+    def get(self, document: str, return_words: bool) -> Optional[Any]:
+        """The cached result for the document, or None."""
+        key = (document, return_words)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, document: str, return_words: bool, result: Any) -> None:
+        """Caches a result, evicting the least recently used ones."""
+        key = (document, return_words)
+        size = sys.getsizeof(document) + sys.getsizeof(result)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
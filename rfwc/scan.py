@@ -0,0 +1,62 @@
+"""The outputs of the RedFlagger, derived from a single scan."""
+
+from array import array
+from collections import Counter
+from functools import cached_property
+
+from .lexicon import Lexicon
+from .matchers import Match
+
+
+class ScanResult:
+    """The matches of one scan of a document, and the outputs derived
+    from them.
+
+    The outputs are computed on first access and then kept, so asking for
+    several of them costs a single scan. They follow the wordlist as it
+    is when they are first read, so read them before editing it.
+    """
+
+    def __init__(self, matches: list[Match], lexicon: Lexicon):
+        # The (start, end, word id) matches, in order.
+        self.matches = matches
+        self._lexicon = lexicon
+
+    def __repr__(self) -> str:
+        return f"ScanResult(words={self.words!r})"
+
+    @property
+    def flagged(self) -> bool:
+        """Whether a word was found, like detect_abuse(return_words=False)."""
+        return bool(self.matches)
+
+    @cached_property
+    def words(self) -> list[str]:
+        """The words found, like detect_abuse."""
+        word = self._lexicon.word
+        return [word(word_id) for _, _, word_id in self.matches]
+
+    @cached_property
+    def spans(self) -> array:
+        """The start, end, word_index triples of find_spans."""
+        positions = self._lexicon.positions()
+        spans = array("i")
+        for start, end, word_id in self.matches:
+            spans.extend((start, end, positions[word_id]))
+        return spans
+
+    @cached_property
+    def counts(self) -> Counter:
+        """The number of matches of every word, by position in the
+        wordlist."""
+        positions = self._lexicon.positions()
+        return Counter(positions[word_id] for _, _, word_id in self.matches)
+
+    @cached_property
+    def vector(self) -> list[int]:
+        """The counts of every word of the wordlist, like
+        get_abuse_vector."""
+        vector = [0] * len(self._lexicon)
+        for index, count in self.counts.items():
+            vector[index] = count
+        return vector
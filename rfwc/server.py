@@ -0,0 +1,183 @@
+"""A scanning daemon that keeps one RedFlagger loaded for many clients.
+
+The daemon speaks a JSON-lines protocol over a Unix socket or a localhost
+TCP port. Every request is one JSON object on one line:
+
+    {"id": 1, "method": "detect_abuse", "params": {"document": "..."}}
+
+and is answered, in order, by one JSON line holding either a result or an
+error:
+
+    {"id": 1, "result": ["..."]}
+    {"id": 1, "error": "..."}
+
+Connections stay open, so a client pays for connecting once. With http,
+the same request objects are accepted as the body of a POST to any path
+instead, for callers without a client.
+"""
+
+import json
+import os
+import socketserver
+import stat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+
+from .red_flagger import RedFlagger
+
+# Vector outputs that can be sent as JSON.
+JSON_VECTOR_OUTPUTS = ("list", "sparse")
+
+
+class ServerError(Exception):
+    """An error reported by the daemon."""
+
+
+def _check_type(name: str, value: Any, kind: type) -> None:
+    if not isinstance(value, kind):
+        raise TypeError(
+            f"{name} must be a {kind.__name__},"
+            f" got {type(value).__name__}."
+        )
+
+
+def _detect_abuse(
+    red_flagger: RedFlagger, document: str, return_words: bool = True
+) -> Any:
+    _check_type("document", document, str)
+    _check_type("return_words", return_words, bool)
+    return red_flagger.detect_abuse(document, return_words=return_words)
+
+
+def _detect_abuse_many(
+    red_flagger: RedFlagger, documents: list[str], return_words: bool = True
+) -> Any:
+    _check_type("documents", documents, list)
+    for document in documents:
+        _check_type("every document", document, str)
+    _check_type("return_words", return_words, bool)
+    return red_flagger._detect_abuse_chunk(documents, return_words)
+
+
+def _get_abuse_vector(
+    red_flagger: RedFlagger, document: str, output: str = "list"
+) -> Any:
+    _check_type("document", document, str)
+    if output not in JSON_VECTOR_OUTPUTS:
+        raise ValueError(
+            f"Unknown output {output}."
+            f" Available outputs: {JSON_VECTOR_OUTPUTS}."
+        )
+    return red_flagger.get_abuse_vector(document, output=output)
+
+
+METHODS: dict[str, Callable[..., Any]] = {
+    "detect_abuse": _detect_abuse,
+    "detect_abuse_many": _detect_abuse_many,
+    "get_abuse_vector": _get_abuse_vector,
+}
+
+
+def handle_request(red_flagger: RedFlagger, line: bytes) -> bytes:
+    """Answers one encoded request with one encoded response line."""
+    request_id = None
+    try:
+        request = json.loads(line)
+        if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object.")
+        request_id = request.get("id")
+        method = request.get("method")
+        if method not in METHODS:
+            raise ValueError(
+                f"Unknown method {method}. Available methods: {list(METHODS)}."
+            )
+        params = request.get("params", {})
+        if not isinstance(params, dict):
+            raise ValueError("params must be a JSON object.")
+        response = {
+            "id": request_id,
+            "result": METHODS[method](red_flagger, **params),
+        }
+    except (TypeError, ValueError) as e:
+        response = {"id": request_id, "error": str(e)}
+    except Exception as e:
+        # Any other failure is reported too, so that it only fails this
+        # request and not the ones pipelined after it on the connection.
+        response = {
+            "id": request_id,
+            "error": f"Internal error: {type(e).__name__}: {e}",
+        }
+    return json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class _StreamHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for line in self.rfile:
+            if line.strip():
+                self.wfile.write(handle_request(self.server.red_flagger, line))
+
+
+class _HTTPHandler(BaseHTTPRequestHandler):
+    # Keeps connections open between requests.
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = handle_request(self.server.red_flagger, self.rfile.read(length))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+class TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def make_server(
+    red_flagger: RedFlagger,
+    socket_path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    http: bool = False,
+) -> socketserver.BaseServer:
+    """Creates a daemon serving red_flagger, call serve_forever to run it.
+
+    Listens on the Unix socket at socket_path if it is given, otherwise on
+    host and port (0 picks a free port, see server_address).
+    """
+    if socket_path is not None:
+        if http:
+            raise ValueError("http is only served over TCP.")
+        if os.path.exists(socket_path):
+            # Left over by a daemon that didn't shut down cleanly.
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise ValueError(f"{socket_path} exists and isn't a socket.")
+            os.unlink(socket_path)
+        server = UnixServer(socket_path, _StreamHandler)
+    elif http:
+        server = HTTPServer((host, port), _HTTPHandler)
+    else:
+        server = TCPServer((host, port), _StreamHandler)
+    server.red_flagger = red_flagger
+    return server
@@ -0,0 +1,95 @@
+"""Placing the flat matcher tables where many processes can attach to them.
+
+One process (e.g. the master of a pre-forking server) packs the tables of
+its RedFlagger once and places them in shared memory or a file. Every
+worker then attaches with RedFlagger.from_shared rather than building its
+own copy of the matcher:
+
+    # In the master.
+    tables = RedFlagger().get_shared_tables()
+    memory = share_tables(tables, name="rfwc")
+
+    # In every worker.
+    red_flagger = RedFlagger.from_shared(name="rfwc")
+
+    # In the master, when shutting down.
+    memory.close()
+    memory.unlink()
+
+The tables are read-only. A worker that edits its wordlist builds a
+private matcher, the shared tables stay as they are.
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+from multiprocessing import resource_tracker, shared_memory
+from typing import Optional
+
+
+def share_tables(
+    tables: bytes, name: Optional[str] = None
+) -> shared_memory.SharedMemory:
+    """Copies the tables into a new block of shared memory.
+
+    The caller owns the block, it must be kept open while workers attach
+    and unlinked when no longer needed.
+    """
+    memory = shared_memory.SharedMemory(
+        name=name, create=True, size=max(len(tables), 1)
+    )
+    memory.buf[: len(tables)] = tables
+    return memory
+
+
+class AttachedMemory(shared_memory.SharedMemory):
+    """Shared memory that may be closed while matchers still use it.
+
+    The mapping is then left to be unmapped with the last view of it,
+    rather than failing (e.g. when garbage collected before the matcher).
+    """
+
+    def close(self) -> None:
+        try:
+            super().close()
+        except BufferError:
+            pass
+
+
+def attach_shared_memory(name: str) -> AttachedMemory:
+    """Attaches to a block of shared memory created by share_tables."""
+    if sys.version_info >= (3, 13):
+        return AttachedMemory(name=name, track=False)
+    # Before 3.13, attaching registers the block with the resource tracker
+    # of the process, which unlinks it when the process exits. Processes
+    # started by multiprocessing share the tracker of their parent, where
+    # the creator registered the block already, so registering it again
+    # changes nothing there, and unregistering it would drop the creator's
+    # registration. A process without a tracker gets one of its own, from
+    # which the block is unregistered once attached.
+    had_tracker = resource_tracker._resource_tracker._fd is not None
+    memory = AttachedMemory(name=name)
+    if not had_tracker:
+        resource_tracker.unregister(memory._name, "shared_memory")
+    return memory
+
+
+def write_tables(path: str, tables: bytes) -> None:
+    """Writes the tables to a file atomically, to be memory-mapped."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tables_file:
+            tables_file.write(tables)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def map_tables(path: str) -> mmap.mmap:
+    """Memory-maps a tables file read-only, so its pages are shared by
+    every process mapping it."""
+    with open(path, "rb") as tables_file:
+        return mmap.mmap(tables_file.fileno(), 0, access=mmap.ACCESS_READ)
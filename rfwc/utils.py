@@ -1,6 +1,13 @@
 """Utility functions for red flagger"""
 
-import re
+import importlib
+from itertools import islice
+from types import ModuleType
+from typing import Iterable, Iterator, TypeVar
+
+from .matchers import AhoCorasickMatcher, is_word_char
+
+T = TypeVar("T")
 
 
 def filter_overlaps_and_sort(word_list: list[str]) -> list[str]:
@@ -11,40 +18,60 @@ def filter_overlaps_and_sort(word_list: list[str]) -> list[str]:
         are sorted by their word list length, and recombined into the original
         phrase. This sorts the word_list (sorted_word_list) so that unigrams
         are first, followed by bi, and so on.
-    2) Every word from the sorted_word_list is compared to every other word in
-        the list. If two phrases in the word_list are identical, the index of
-        the longer phrase is added to bad indices for later removal. If
-        phrase_b contains phrase_a, phrase_b is not unique and its index
-        is added to bad indices for later removal.
-    3) The bad_indices list from 2 is used to select only the unique phrases
-        in sorted_word_list
+    2) An Aho-Corasick automaton is built over the sorted_word_list and every
+        phrase is scanned with it once. If a phrase is identical to an
+        earlier phrase, or an earlier phrase is found in it (between word
+        boundaries, ignoring case), it is not unique and is dropped.
+    3) The phrases that were not dropped in 2 are returned in sorted order.
 
     This algorithm also pseudo-sorts the list. First, all the unigrams
     are listed, then the multiword items.
+
+    Scanning every phrase with a single automaton replaces the pairwise
+    regex comparisons this used to do, so the cost grows with the total
+    length of the word list rather than with the square of its size.
     """
     # Breaks up phrases into word lists, sorts list by length of word list,
     # reforms phrase from word lists (now sorted)
     split_word_list = sorted([x.split() for x in word_list], key=len)
     sorted_word_list = [" ".join(word) for word in split_word_list]
 
-    # Compare every phrase from word list, only keep the unique words/phrases.
-    bad_indices: set[int] = set()
-    for i in range(len(sorted_word_list)):
-        for j in range(i + 1, len(sorted_word_list)):
-            # handles dupes in the word list (not caught by elif regex).
-            if sorted_word_list[i] == sorted_word_list[j]:
-                bad_indices.add(j)
-            elif re.search(
-                rf"\b{re.escape(sorted_word_list[i])}\b",
-                sorted_word_list[j],
-                flags=re.IGNORECASE,
-            ):
-                bad_indices.add(j)
-
-    # Keeping only unique phrases.
-    unique_wordlist = [
-        phrase
-        for i, phrase in enumerate(sorted_word_list)
-        if i not in bad_indices
-    ]
+    # The automaton reports the earliest index for each (case-folded) phrase.
+    matcher = AhoCorasickMatcher(sorted_word_list)
+    first_indices: dict[str, int] = {}
+    unique_wordlist = []
+    for j, phrase in enumerate(sorted_word_list):
+        # handles dupes in the word list (not caught by the automaton when
+        # the phrase does not start and end on a word boundary).
+        if first_indices.setdefault(phrase, j) < j:
+            continue
+        # An empty phrase (\b\b) is found in anything containing a word.
+        if first_indices.get("", j) < j and any(map(is_word_char, phrase)):
+            continue
+        if any(index < j for _, _, index in matcher.candidates(phrase)):
+            continue
+        unique_wordlist.append(phrase)
     return unique_wordlist
+
+
+def chunked(items: Iterable[T], chunk_size: int) -> Iterator[list[T]]:
+    """Lazily splits items into lists of at most chunk_size items."""
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_optional(name: str) -> ModuleType:
+    """Imports an optional dependency with an informative error."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        raise ImportError(
+            f"{name} is required for this feature, install it with"
+            f" `pip install rfwc[{name.split('.')[0]}]`."
+        ) from None
@@ -0,0 +1,172 @@
+"""The ordered wordlist with the lookups needed to edit it incrementally."""
+
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Optional
+
+from .lexicon import _BULK_REMOVAL, Lexicon
+from .matchers import boundaries, contains_phrase, fold_case, word_runs
+from .utils import filter_overlaps_and_sort
+
+
+class WordIndex:
+    """The wordlist in the order of filter_overlaps_and_sort, with stable ids.
+
+    Every word gets an id when it is added, which never changes. Adding
+    words keeps the result of filter_overlaps_and_sort over the whole
+    list, but only looks at the added words and the entries they overlap
+    with:
+    - an added word is dropped if an entry is found in it, which is
+        checked by looking up its bounded substrings,
+    - an entry is dropped if an added word with fewer words is found in
+        it, which is checked only for the entries sharing a word with it.
+    """
+
+    def __init__(self, words: list[str], word_ids: Optional[list[int]] = None):
+        # words must already be filtered and sorted.
+        self.lexicon = Lexicon(words, word_ids)
+        self._token_counts = array(
+            "I", [len(word.split()) for word in self.lexicon]
+        )
+        # The lookups used for edits are built on the first edit.
+        self._indexed = False
+
+    def _build_edit_index(self) -> None:
+        if self._indexed:
+            return
+        self._ids_by_folded: dict[str, list[int]] = {}
+        # Multi-word entries by the word runs they contain.
+        self._ids_by_run: dict[str, set[int]] = {}
+        self._multi_word_ids: set[int] = set()
+        for word_id, word in zip(self.lexicon.ids, self.lexicon):
+            self._index_word(word_id, word)
+        self._indexed = True
+
+    def __len__(self) -> int:
+        return len(self.lexicon)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.lexicon
+
+    def positions(self) -> array:
+        """Maps ids to positions in the wordlist, cached between edits."""
+        return self.lexicon.positions()
+
+    def _index_word(self, word_id: int, word: str) -> None:
+        self._ids_by_folded.setdefault(fold_case(word), []).append(word_id)
+        if len(word.split()) > 1:
+            self._multi_word_ids.add(word_id)
+            for run in set(word_runs(word)):
+                self._ids_by_run.setdefault(run, set()).add(word_id)
+
+    def _unindex_word(self, word_id: int, word: str) -> None:
+        folded = fold_case(word)
+        self._ids_by_folded[folded].remove(word_id)
+        if not self._ids_by_folded[folded]:
+            del self._ids_by_folded[folded]
+        if word_id in self._multi_word_ids:
+            self._multi_word_ids.remove(word_id)
+            for run in set(word_runs(word)):
+                self._ids_by_run[run].discard(word_id)
+                if not self._ids_by_run[run]:
+                    del self._ids_by_run[run]
+
+    def _contains_entry(self, phrase: str) -> bool:
+        """Whether an entry is found in phrase between word boundaries."""
+        folded = fold_case(phrase)
+        positions = boundaries(phrase)
+        for i, start in enumerate(positions):
+            for end in positions[i + 1 :]:
+                if folded[start:end] in self._ids_by_folded:
+                    return True
+        return False
+
+    def _entries_containing(self, phrase: str) -> set[int]:
+        """The entries with more words than phrase that phrase is found in."""
+        runs = set(word_runs(phrase))
+        if runs:
+            postings = [self._ids_by_run.get(run, set()) for run in runs]
+            candidates = min(postings, key=len)
+        else:
+            candidates = self._multi_word_ids
+        token_count = len(phrase.split())
+        return {
+            word_id
+            for word_id in candidates
+            if len(self.lexicon.word(word_id).split()) > token_count
+            and contains_phrase(self.lexicon.word(word_id), phrase)
+        }
+
+    def add(
+        self, words: Iterable[str]
+    ) -> Optional[tuple[list[tuple[int, str]], list[tuple[int, str]]]]:
+        """Adds words, returns the added and removed (id, word) pairs.
+
+        Returns None when the whole list had to be filtered again, which
+        only happens for empty phrases, as those overlap with everything.
+        """
+        phrases = [" ".join(word.split()) for word in words]
+        if "" in phrases or "" in self.lexicon:
+            self.__init__(
+                filter_overlaps_and_sort(self.lexicon.words() + phrases)
+            )
+            return None
+        self._build_edit_index()
+        added_words = [
+            phrase
+            for phrase in filter_overlaps_and_sort(phrases)
+            if phrase not in self.lexicon and not self._contains_entry(phrase)
+        ]
+        removed_ids: set[int] = set()
+        for phrase in added_words:
+            removed_ids |= self._entries_containing(phrase)
+        removed = self._remove_ids(sorted(removed_ids))
+        added = list(zip(self._insert(added_words), added_words))
+        return added, removed
+
+    def remove(self, words: Iterable[str]) -> list[tuple[int, str]]:
+        """Removes the words that are in the list, returns their (id, word)
+        pairs."""
+        self._build_edit_index()
+        found_ids = map(self.lexicon.find, dict.fromkeys(words))
+        return self._remove_ids(
+            [word_id for word_id in found_ids if word_id is not None]
+        )
+
+    def _insert(self, words: list[str]) -> list[int]:
+        """Inserts words after the entries with as many words or fewer."""
+        placed = []
+        for word in words:
+            token_count = len(word.split())
+            position = bisect_right(self._token_counts, token_count)
+            self._token_counts.insert(position, token_count)
+            placed.append((position, word))
+        word_ids = self.lexicon.insert(placed)
+        for word_id, word in zip(word_ids, words):
+            self._index_word(word_id, word)
+        return word_ids
+
+    def _remove_ids(self, word_ids: list[int]) -> list[tuple[int, str]]:
+        """Removes the ids, returns them with their words, which are gone
+        from the lexicon afterwards."""
+        removed = [
+            (word_id, self.lexicon.word(word_id)) for word_id in word_ids
+        ]
+        for word_id, word in removed:
+            self._unindex_word(word_id, word)
+        # By decreasing position, so deleting one doesn't move the others.
+        positions = self.lexicon.remove(word_ids)
+        if len(positions) > _BULK_REMOVAL:
+            removed_positions = set(positions)
+            self._token_counts = array(
+                "I",
+                [
+                    token_count
+                    for position, token_count in enumerate(self._token_counts)
+                    if position not in removed_positions
+                ],
+            )
+        else:
+            for position in positions:
+                del self._token_counts[position]
+        return removed
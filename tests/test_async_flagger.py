@@ -0,0 +1,171 @@
+"""
+Tests the asyncio front end against the synchronous RedFlagger.
+"""
+
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from rfwc import AsyncRedFlagger, RedFlagger
+
+DOCUMENTS = [
+    "My cat is eating prosciutto.",
+    "Big ben really is something, huh?",
+    "I visited bIG bEN and went there ON-foot to see the ClockTower.",
+] * 10
+
+
+class TestAsyncRedFlagger(unittest.TestCase):
+
+    def setUp(self):
+        self.red_flagger = RedFlagger()
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+
+    def test_detect_abuse(self):
+        async def detect(documents, **kwargs):
+            async with AsyncRedFlagger(self.red_flagger, **kwargs) as flagger:
+                return await asyncio.gather(
+                    *(
+                        flagger.detect_abuse(document, return_words=i % 2)
+                        for i, document in enumerate(documents)
+                    )
+                )
+
+        expected = [
+            self.red_flagger.detect_abuse(document, return_words=i % 2)
+            for i, document in enumerate(DOCUMENTS)
+        ]
+        for kwargs in ({}, {"max_batch_size": 4, "max_pending": 3}):
+            self.assertEqual(
+                asyncio.run(detect(DOCUMENTS, **kwargs)), expected
+            )
+
+    def test_detect_abuse_many(self):
+        async def detect(**kwargs):
+            async with AsyncRedFlagger(self.red_flagger, **kwargs) as flagger:
+                return await flagger.detect_abuse_many(
+                    iter(DOCUMENTS), return_words=False
+                )
+
+        expected = list(
+            self.red_flagger.detect_abuse_many(DOCUMENTS, return_words=False)
+        )
+        self.assertEqual(asyncio.run(detect(max_batch_size=7)), expected)
+        self.assertEqual(asyncio.run(detect(processes=2)), expected)
+
+    def test_cancellation(self):
+        async def detect():
+            async with AsyncRedFlagger(
+                self.red_flagger, batch_window=0.05
+            ) as flagger:
+                cancelled = asyncio.ensure_future(
+                    flagger.detect_abuse(DOCUMENTS[1])
+                )
+                kept = asyncio.ensure_future(
+                    flagger.detect_abuse(DOCUMENTS[2])
+                )
+                await asyncio.sleep(0)
+                cancelled.cancel()
+                return await asyncio.gather(
+                    cancelled, kept, return_exceptions=True
+                )
+
+        cancelled, kept = asyncio.run(detect())
+        self.assertIsInstance(cancelled, asyncio.CancelledError)
+        self.assertEqual(kept, self.red_flagger.detect_abuse(DOCUMENTS[2]))
+
+    def _overlapping(self, flagger_kwargs, detect):
+        """Runs detect with every scan waiting for another one to start,
+        which fails unless two batches are scanned at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+        scan = self.red_flagger._detect_abuse_chunk
+
+        def wait_then_scan(chunk, return_words):
+            barrier.wait()
+            return scan(chunk, return_words)
+
+        async def run():
+            async with AsyncRedFlagger(
+                self.red_flagger, **flagger_kwargs
+            ) as flagger:
+                return await detect(flagger)
+
+        with mock.patch.object(
+            self.red_flagger, "_detect_abuse_chunk", wait_then_scan
+        ):
+            return asyncio.run(run())
+
+    def test_concurrent_batches(self):
+        async def detect(flagger):
+            return await asyncio.gather(
+                *(flagger.detect_abuse(document) for document in DOCUMENTS[:2])
+            )
+
+        expected = [
+            self.red_flagger.detect_abuse(document)
+            for document in DOCUMENTS[:2]
+        ]
+        # One document per batch, so both can only finish if the two
+        # batches overlap.
+        results = self._overlapping(
+            {"threads": 2, "max_batch_size": 1}, detect
+        )
+        self.assertEqual(results, expected)
+
+        async def detect_many(flagger):
+            return await flagger.detect_abuse_many(
+                DOCUMENTS, return_words=False
+            )
+
+        results = self._overlapping(
+            {"threads": 2, "max_batch_size": 15}, detect_many
+        )
+        self.assertEqual(
+            results,
+            list(
+                self.red_flagger.detect_abuse_many(
+                    DOCUMENTS, return_words=False
+                )
+            ),
+        )
+
+    def test_errors(self):
+        async def detect():
+            async with AsyncRedFlagger(
+                self.red_flagger, threads=2, max_batch_size=1
+            ) as flagger:
+                return await asyncio.gather(
+                    flagger.detect_abuse(None),
+                    flagger.detect_abuse(DOCUMENTS[2]),
+                    return_exceptions=True,
+                )
+
+        # Only the batch that fails gets the error.
+        failed, kept = asyncio.run(detect())
+        self.assertIsInstance(failed, Exception)
+        self.assertEqual(kept, self.red_flagger.detect_abuse(DOCUMENTS[2]))
+
+    def test_executor(self):
+        async def detect(executor):
+            async with AsyncRedFlagger(
+                self.red_flagger, executor=executor
+            ) as flagger:
+                return await flagger.detect_abuse(DOCUMENTS[2])
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(
+                asyncio.run(detect(executor)),
+                self.red_flagger.detect_abuse(DOCUMENTS[2]),
+            )
+            # The executor was given, so it is still running.
+            self.assertEqual(executor.submit(len, "abc").result(), 3)
+
+    def test_invalid_sizes(self):
+        with self.assertRaises(ValueError):
+            AsyncRedFlagger(self.red_flagger, max_batch_size=0)
+        with self.assertRaises(ValueError):
+            AsyncRedFlagger(self.red_flagger, threads=0)
+        with ThreadPoolExecutor() as executor, self.assertRaises(ValueError):
+            AsyncRedFlagger(self.red_flagger, processes=2, executor=executor)
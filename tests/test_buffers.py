@@ -0,0 +1,82 @@
+"""Tests scanning bytes-like buffers and memory-mapped files."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from rfwc.buffers import iter_blocks, scan_buffer, scan_file
+from rfwc.matchers import AhoCorasickMatcher
+
+
+class TestBuffers(unittest.TestCase):
+
+    def setUp(self):
+        self.matcher = AhoCorasickMatcher(["clocktower", "Big Ben", "café"])
+        self.text = (
+            "I can see Big Ben!\n"
+            "Le CAFÉ near the clocktower\n"
+            "\xe9t\xe9 BIG BEN\r\n"
+            "clocktowers are not clocktower, big  ben\n"
+        ) * 5
+        self.data = self.text.encode("utf-8")
+
+    def _expected(self, text: str) -> list[tuple[int, int, int]]:
+        """The matches over the whole decoded text, in byte offsets."""
+        return [
+            (
+                len(text[:start].encode("utf-8", "surrogateescape")),
+                len(text[:end].encode("utf-8", "surrogateescape")),
+                index,
+            )
+            for start, end, index in self.matcher.finditer(text)
+        ]
+
+    def test_iter_blocks(self):
+        for block_size in (1, 7, 40, len(self.data) + 1):
+            blocks = list(iter_blocks(self.data, block_size))
+            self.assertEqual(
+                b"".join(bytes(block) for _, block in blocks), self.data
+            )
+            for offset, block in blocks[:-1]:
+                self.assertEqual(bytes(block[-1:]), b"\n")
+        self.assertEqual(list(iter_blocks(b"")), [])
+        with self.assertRaises(ValueError):
+            list(iter_blocks(self.data, 0))
+
+    def test_scan_buffer(self):
+        expected = self._expected(self.text)
+        self.assertEqual(len(expected), 25)
+        for buffer in (self.data, bytearray(self.data), memoryview(self.data)):
+            for block_size in (1, 16, 100, 1 << 20):
+                self.assertEqual(
+                    list(scan_buffer(self.matcher, buffer, block_size)),
+                    expected,
+                )
+
+    def test_invalid_utf8(self):
+        data = b"\xff\xfe Big Ben \xc3 caf\xc3\xa9\n\xe9 clocktower"
+        text = data.decode("utf-8", "surrogateescape")
+        self.assertEqual(
+            list(scan_buffer(self.matcher, data, 8)), self._expected(text)
+        )
+
+    def test_scan_file(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "input.txt")
+        with open(path, "wb") as f:
+            f.write(self.data)
+        self.assertEqual(
+            list(scan_file(self.matcher, path, 64)),
+            self._expected(self.text),
+        )
+
+        # Stopping early releases the file.
+        matches = scan_file(self.matcher, path, 64)
+        next(matches)
+        matches.close()
+
+        empty_path = os.path.join(tmp_dir, "empty.txt")
+        open(empty_path, "wb").close()
+        self.assertEqual(list(scan_file(self.matcher, empty_path)), [])
@@ -0,0 +1,118 @@
+"""Tests the on-disk cache of the compiled wordlist."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from rfwc import RedFlagger
+from rfwc.cache import (
+    CACHE_DIR_ENV,
+    compiled_path,
+    load_compiled,
+    save_compiled,
+)
+from rfwc.matchers import TrieMatcher
+from rfwc.normalize import Normalizer
+from rfwc.obscure_data import obscure
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        # Nothing is written to the user's cache directory.
+        environ = mock.patch.dict(os.environ, {CACHE_DIR_ENV: self.cache_dir})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def test_round_trip(self):
+        path = os.path.join(self.cache_dir, "compiled.rfwc")
+        compiled = {
+            "wordlist": ["Big Ben"],
+            "case_map": {"big ben": "Big Ben"},
+        }
+        self.assertTrue(save_compiled(path, compiled))
+        self.assertEqual(load_compiled(path), compiled)
+
+        # The artifact is obscured.
+        with open(path, "rb") as compiled_file:
+            self.assertNotIn(b"Big Ben", compiled_file.read())
+
+    def test_missing_or_broken(self):
+        path = os.path.join(self.cache_dir, "compiled.rfwc")
+        self.assertIsNone(load_compiled(path))
+        with open(path, "wb") as compiled_file:
+            compiled_file.write(b"not an artifact")
+        self.assertIsNone(load_compiled(path))
+
+    def test_red_flagger_uses_cache(self):
+        red_flagger = RedFlagger(use_cache=True)
+        wordlist = red_flagger.get_wordlist()
+        path = compiled_path(RedFlagger.DATA_DIR, "trie", self.cache_dir)
+        self.assertTrue(os.path.exists(path))
+
+        cached = RedFlagger(use_cache=True)
+        self.assertEqual(cached.get_wordlist(), wordlist)
+        self.assertEqual(
+            cached._index.lexicon.ids, red_flagger._index.lexicon.ids
+        )
+
+        document = "I went to see that clocktower Big Ben on-foot."
+        for flagger in (red_flagger, cached):
+            flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+        self.assertEqual(
+            cached.detect_abuse(document), red_flagger.detect_abuse(document)
+        )
+
+        # A broken artifact is rebuilt.
+        with open(path, "wb") as compiled_file:
+            compiled_file.write(b"broken")
+        rebuilt = RedFlagger(use_cache=True)
+        self.assertEqual(rebuilt.get_wordlist(), wordlist)
+        self.assertIsNotNone(load_compiled(path))
+
+    def test_source_change_invalidates(self):
+        source = os.path.join(self.cache_dir, "wordlist_b16.txt")
+        with open(source, "wb") as source_file:
+            source_file.write(obscure("clocktower") + b"\n")
+
+        class CustomFlagger(RedFlagger):
+            DATA_DIR = source
+
+        self.assertEqual(
+            CustomFlagger(use_cache=True).get_wordlist(),
+            ["clocktower"],
+        )
+        with open(source, "ab") as source_file:
+            source_file.write(obscure("Big Ben") + b"\n")
+        self.assertEqual(
+            CustomFlagger(use_cache=True).get_wordlist(),
+            ["clocktower", "Big Ben"],
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+    def test_cache_dir(self):
+        other_dir = os.path.join(self.cache_dir, "other")
+        RedFlagger(use_cache=True, cache_dir=other_dir)
+        self.assertEqual(os.listdir(self.cache_dir), ["other"])
+        self.assertEqual(len(os.listdir(other_dir)), 1)
+
+    def test_without_cache(self):
+        # The cache is off by default.
+        RedFlagger()
+        RedFlagger(cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_uncacheable_matchers(self):
+        # A trie artifact is there, but isn't used for the other matchers.
+        RedFlagger(use_cache=True)
+        listing = os.listdir(self.cache_dir)
+        for kwargs in ({"normalizer": Normalizer()}, {"max_distance": 1}):
+            with self.subTest(**kwargs):
+                red_flagger = RedFlagger(use_cache=True, **kwargs)
+                self.assertFalse(red_flagger._matcher.cacheable)
+                self.assertNotIsInstance(red_flagger._matcher, TrieMatcher)
+                self.assertEqual(os.listdir(self.cache_dir), listing)
@@ -0,0 +1,104 @@
+"""Tests that categories match like one RedFlagger per wordlist."""
+
+import random
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.categories import Categories
+from rfwc.matchers import TrieMatcher
+from rfwc.utils import filter_overlaps_and_sort
+
+
+class TestCategories(unittest.TestCase):
+
+    def setUp(self):
+        self.lists = {
+            "places": ["big ben", "clock tower", "tower", "Big Ben"],
+            "people": ["ben", "big", "Ben Nevis"],
+            "things": ["clock", "tower", "@home", "on-foot"],
+        }
+        self.documents = [
+            "",
+            "Big Ben is a clock tower, not a tower clock.",
+            "ben went on-foot to big ben and Ben Nevis @home",
+            "nothing to see here",
+        ]
+
+    def _expected(self, words, document):
+        words = filter_overlaps_and_sort(words)
+        matcher = TrieMatcher(words)
+        return [words[i] for _, _, i in matcher.finditer(document)]
+
+    def test_parity(self):
+        categories = Categories()
+        for name, words in self.lists.items():
+            categories.add(name, words)
+        self.assertEqual(categories.names(), list(self.lists))
+        for document in self.documents:
+            found = categories.detect(document)
+            flags = categories.detect(document, return_words=False)
+            for name, words in self.lists.items():
+                expected = self._expected(words, document)
+                self.assertEqual(found[name], expected, (name, document))
+                self.assertEqual(flags[name], bool(expected))
+
+    def test_edits(self):
+        rng = random.Random(0)
+        vocab = ["big", "ben", "Big Ben", "clock", "tower", "@home", "x y"]
+        categories = Categories()
+        lists: dict[str, list[str]] = {}
+        document = " ".join(vocab) + " big ben clock tower x y"
+        for _ in range(200):
+            name = rng.choice(["a", "b", "c"])
+            words = [
+                " ".join(rng.sample(vocab, rng.randint(1, 2)))
+                for _ in range(rng.randint(1, 3))
+            ]
+            if name in lists and rng.random() < 0.1:
+                categories.drop(name)
+                del lists[name]
+            elif name in lists and rng.random() < 0.4:
+                categories.remove(name, words)
+                lists[name] = [w for w in lists[name] if w not in words]
+            else:
+                categories.add(name, words)
+                lists[name] = filter_overlaps_and_sort(
+                    lists.get(name, []) + words
+                )
+            found = categories.detect(document)
+            self.assertEqual(set(found), set(lists))
+            for name, words in lists.items():
+                self.assertEqual(categories.wordlist(name), words)
+                self.assertEqual(
+                    found[name], self._expected(words, document), name
+                )
+
+    def test_unknown_category(self):
+        with self.assertRaises(ValueError):
+            Categories().drop("missing")
+
+
+class TestRedFlaggerCategories(unittest.TestCase):
+
+    def test_detect_categories(self):
+        red_flagger = RedFlagger(categories={"places": ["big ben"]})
+        red_flagger.add_category("people", ["ben", "big"])
+        self.assertEqual(red_flagger.get_categories(), ["places", "people"])
+        document = "Big Ben, you shit"
+        self.assertEqual(
+            red_flagger.detect_categories(document),
+            {
+                "default": red_flagger.detect_abuse(document),
+                "places": ["big ben"],
+                "people": ["big", "ben"],
+            },
+        )
+        red_flagger.remove_category_words("people", ["big"])
+        self.assertEqual(red_flagger.get_category_wordlist("people"), ["ben"])
+        red_flagger.remove_category("places")
+        self.assertEqual(
+            red_flagger.detect_categories(document, return_words=False),
+            {"default": True, "people": True},
+        )
+        with self.assertRaises(ValueError):
+            red_flagger.add_category("default", ["x"])
@@ -0,0 +1,135 @@
+"""Tests the rfwc command line interface."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from rfwc.cli import main, read_records
+
+
+class TestCLI(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.extra_words = self._write(
+            "extra_words.txt", "Big Ben\nclocktower\n"
+        )
+        self.output = os.path.join(self.tmp_dir, "output.jsonl")
+
+    def _write(self, filename: str, content: str) -> str:
+        path = os.path.join(self.tmp_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def _scan(self, *args: str) -> list[dict]:
+        exit_code = main(
+            [
+                "scan",
+                *args,
+                "--extra-words",
+                self.extra_words,
+                "--output",
+                self.output,
+            ]
+        )
+        self.assertEqual(exit_code, 0)
+        with open(self.output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_scan_text(self):
+        path = self._write(
+            "input.txt",
+            "I can see Big Ben!\nMy cat is eating prosciutto.\n"
+            "big ben is a clocktower\n",
+        )
+        self.assertEqual(
+            self._scan(path),
+            [
+                {"file": path, "line": 1, "words": ["Big Ben"]},
+                {"file": path, "line": 2, "words": []},
+                {"file": path, "line": 3, "words": ["Big Ben", "clocktower"]},
+            ],
+        )
+        self.assertEqual(
+            self._scan(path, "--flagged-only", "--chunk-size", "1"),
+            [
+                {"file": path, "line": 1, "words": ["Big Ben"]},
+                {"file": path, "line": 3, "words": ["Big Ben", "clocktower"]},
+            ],
+        )
+        self.assertEqual(
+            self._scan(path, "--count-only"),
+            [{"documents": 3, "flagged": 2}],
+        )
+
+    def test_scan_jsonl(self):
+        path = self._write(
+            "input.jsonl",
+            '{"message": {"body": "I can see Big Ben!"}}\n'
+            "\n"
+            '{"message": {"body": "My cat is eating prosciutto."}}\n',
+        )
+        self.assertEqual(
+            self._scan(path, "--format", "jsonl", "--field", "message.body"),
+            [
+                {"file": path, "line": 1, "words": ["Big Ben"]},
+                {"file": path, "line": 3, "words": []},
+            ],
+        )
+        self.assertEqual(
+            main(["scan", path, "--format", "jsonl", "--output", self.output]),
+            1,
+        )
+
+    def test_jsonl_values(self):
+        values = [0, False, None, "", "text", 1.5]
+        path = self._write(
+            "input.jsonl",
+            "".join(json.dumps({"body": value}) + "\n" for value in values),
+        )
+        self.assertEqual(
+            [
+                document
+                for _, _, document in read_records([path], "jsonl", "body", "")
+            ],
+            ["0", "False", "", "", "text", "1.5"],
+        )
+
+    def test_scan_csv(self):
+        path = self._write(
+            "input.csv",
+            'id,text\n1,"I can see Big Ben,\nthe clocktower"\n2,Nothing\n',
+        )
+        self.assertEqual(
+            self._scan(path, "--format", "csv", "--column", "text"),
+            [
+                {"file": path, "line": 1, "words": ["Big Ben", "clocktower"]},
+                {"file": path, "line": 2, "words": []},
+            ],
+        )
+        self.assertEqual(
+            main(
+                [
+                    "scan",
+                    path,
+                    "--format",
+                    "csv",
+                    "--column",
+                    "body",
+                    "--output",
+                    self.output,
+                ]
+            ),
+            1,
+        )
+
+    def test_scan_workers(self):
+        path = self._write("input.txt", "I can see Big Ben!\nNothing\n" * 10)
+        self.assertEqual(
+            self._scan(path, "--workers", "2", "--chunk-size", "3"),
+            self._scan(path),
+        )
@@ -0,0 +1,176 @@
+"""Tests that scanning columns in batches matches scanning every row."""
+
+import importlib.util
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.columns import row_batches
+from rfwc.normalize import Normalizer
+
+HAS_PANDAS = importlib.util.find_spec("pandas") is not None
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+HAS_DATASETS = importlib.util.find_spec("datasets") is not None
+
+ROWS = [
+    "Big Ben is a clocktower",
+    None,
+    "",
+    "big\nben, é clocktower",
+    "nothing here",
+    "clocktower big",
+    "ben big ben",
+]
+
+
+class TestColumns(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.red_flagger = RedFlagger()
+        cls.red_flagger.add_words(["Big Ben", "clocktower"])
+
+    def _expected_words(self, red_flagger=None):
+        red_flagger = red_flagger or self.red_flagger
+        return [red_flagger.detect_abuse(row or "") for row in ROWS]
+
+    def _check(self, column, to_list=list):
+        words = self._expected_words()
+        for batch_size in (1, 2, 1024):
+            self.assertEqual(
+                to_list(
+                    self.red_flagger.scan_column(column, "words", batch_size)
+                ),
+                words,
+            )
+            self.assertEqual(
+                to_list(
+                    self.red_flagger.scan_column(column, "mask", batch_size)
+                ),
+                [bool(row_words) for row_words in words],
+            )
+            (data, indices, indptr), shape = self.red_flagger.scan_column(
+                column, "matrix", batch_size
+            )
+            self.assertEqual(shape, (len(ROWS), len(self.red_flagger._index)))
+            for row, document in enumerate(ROWS):
+                vector = self.red_flagger.get_abuse_vector(document or "")
+                row_slice = slice(indptr[row], indptr[row + 1])
+                self.assertEqual(
+                    dict(zip(indices[row_slice], data[row_slice])),
+                    {i: count for i, count in enumerate(vector) if count},
+                )
+
+    def test_row_batches(self):
+        batches = list(row_batches(["ab", None, "é x", float("nan"), "z"], 2))
+        self.assertEqual(batches, [["ab", ""], ["é x", ""], ["z"]])
+        with self.assertRaises(ValueError):
+            row_batches(["ab"], 0)
+
+    def test_list(self):
+        self._check(ROWS)
+        self.assertEqual(
+            self.red_flagger.scan_column(iter(ROWS), "words", 2),
+            self._expected_words(),
+        )
+        with self.assertRaises(ValueError):
+            self.red_flagger.scan_column(ROWS, "vector")
+
+    def test_matchers(self):
+        for red_flagger in (
+            RedFlagger(matcher="regex", use_cache=False),
+            RedFlagger(normalizer=Normalizer()),
+            RedFlagger(max_distance=1),
+        ):
+            red_flagger.add_words(["Big Ben", "clocktower"])
+            self.assertEqual(
+                red_flagger.scan_column(ROWS, "words", 3),
+                self._expected_words(red_flagger),
+            )
+
+    @unittest.skipUnless(HAS_PANDAS, "pandas is not installed")
+    def test_pandas(self):
+        import pandas as pd
+
+        for dtype in (object, "string[python]", "string[pyarrow]"):
+            if dtype == "string[pyarrow]" and not HAS_PYARROW:
+                continue
+            series = pd.Series(ROWS, index=range(10, 17), name="text")
+            series = series.astype(dtype)
+            self._check(series, to_list=lambda result: result.tolist())
+            mask = self.red_flagger.scan_column(series)
+            self.assertIsInstance(mask, pd.Series)
+            self.assertEqual(list(mask.index), list(series.index))
+            self.assertEqual(mask.name, "text")
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_arrow(self):
+        import pyarrow as pa
+
+        columns = [
+            pa.array(ROWS),
+            pa.array(ROWS, pa.large_string()),
+            pa.chunked_array([ROWS[:3], ROWS[3:]]),
+            pa.array(ROWS).dictionary_encode(),
+        ]
+        for column in columns:
+            self._check(column, to_list=lambda result: result.to_pylist())
+        mask = self.red_flagger.scan_column(columns[0])
+        self.assertEqual(mask.type, pa.bool_())
+
+    def test_non_strings(self):
+        rows = [1, 2.5, b"big ben", None, "Big Ben", True]
+        self.assertEqual(
+            self.red_flagger.scan_column(rows),
+            [False, False, False, False, True, False],
+        )
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_arrow_python_parity(self):
+        import pyarrow as pa
+
+        # Non-strings and nulls are never flagged, whatever the container.
+        for values in ([1, None, 3], [b"big ben", None], [1.5], ROWS):
+            column = pa.array(values)
+            for output in ("mask", "words"):
+                self.assertEqual(
+                    self.red_flagger.scan_column(column, output).to_pylist(),
+                    self.red_flagger.scan_column(values, output),
+                    (values, output),
+                )
+        if HAS_PANDAS:
+            import pandas as pd
+
+            for dtype in ("int64", "Int64", "int64[pyarrow]"):
+                series = pd.Series([1, 2, 3], dtype=dtype)
+                self.assertEqual(
+                    self.red_flagger.scan_column(series).tolist(),
+                    [False] * 3,
+                )
+
+    def test_empty(self):
+        self.assertEqual(self.red_flagger.scan_column([]), [])
+        if HAS_PANDAS:
+            import pandas as pd
+
+            mask = self.red_flagger.scan_column(pd.Series([], dtype=object))
+            self.assertEqual(mask.dtype, bool)
+        if HAS_PYARROW:
+            import pyarrow as pa
+
+            column = pa.array([], pa.string())
+            mask = self.red_flagger.scan_column(column)
+            self.assertEqual(mask.type, pa.bool_())
+            words = self.red_flagger.scan_column(column, "words")
+            self.assertEqual(words.type, pa.list_(pa.string()))
+
+    @unittest.skipUnless(HAS_DATASETS, "datasets is not installed")
+    def test_datasets(self):
+        import datasets
+
+        dataset = datasets.Dataset.from_dict({"text": ROWS, "id": range(7)})
+        self._check(dataset["text"])
+        shuffled = dataset.shuffle(seed=0)
+        self.assertEqual(
+            self.red_flagger.scan_column(shuffled["text"], "words"),
+            [self.red_flagger.detect_abuse(r or "") for r in shuffled["text"]],
+        )
@@ -0,0 +1,198 @@
+"""Tests fuzzy matching against the exact matcher and brute force."""
+
+import pickle
+import random
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.fuzzy import MIN_LENGTH, FuzzyMatcher, deletions, edit_distance
+from rfwc.matchers import TrieMatcher
+from rfwc.normalize import Normalizer
+
+
+class TestEditDistance(unittest.TestCase):
+
+    def test_distances(self):
+        cases = [
+            ("bastard", "bastard", 0),
+            ("bastard", "bastrad", 1),
+            ("bastard", "bastar", 1),
+            ("bastard", "bastardo", 1),
+            ("bastard", "bostard", 1),
+            ("bastard", "btsarad", 3),
+            ("", "abc", 3),
+        ]
+        for a, b, expected in cases:
+            self.assertEqual(edit_distance(a, b, 5), expected)
+            self.assertEqual(edit_distance(b, a, 5), expected)
+            self.assertEqual(edit_distance(a, b, 1), min(expected, 2))
+
+    def test_deletions(self):
+        self.assertEqual(deletions("abc", 0), {"abc"})
+        self.assertEqual(deletions("abc", 1), {"abc", "bc", "ac", "ab"})
+        self.assertIn("a", deletions("abc", 2))
+
+
+class TestFuzzyMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.words = [
+            "ass",
+            "a*s",
+            "bastard",
+            "bastards",
+            "big ben",
+            "chimney sweeper",
+            "motherfucker",
+        ]
+        self.matcher = FuzzyMatcher(self.words)
+
+    def _found(self, matcher, document):
+        return [self.words[i] for _, _, i in matcher.finditer(document)]
+
+    def test_typos(self):
+        found = {
+            "you bastrad": ["bastard"],
+            "BASTARDS!": ["bastards"],
+            "a chimnay sweeper": ["chimney sweeper"],
+            "a chimnay sweepar": [],
+            "chimney\nsweepar": [],
+            "chimney  sweepar": [],
+            "chimney, sweepar": [],
+            "motherfuker": ["motherfucker"],
+            "as big bne": [],
+            "a*s ass": ["a*s", "ass"],
+            "bastardly": [],
+        }
+        for document, expected in found.items():
+            self.assertEqual(
+                self._found(self.matcher, document), expected, document
+            )
+            self.assertEqual(
+                self.matcher.search(document), bool(expected), document
+            )
+
+    def test_typos_by_length(self):
+        matcher = FuzzyMatcher(self.words, max_distance=2)
+        # One typo for every seven characters of a word.
+        self.assertEqual(
+            self._found(matcher, "a chimnay sweepar"), ["chimney sweeper"]
+        )
+        self.assertEqual(self._found(matcher, "mothrfucker"), ["motherfucker"])
+        self.assertEqual(self._found(matcher, "mothrfuker"), [])
+        self.assertEqual(self._found(matcher, "bstrad"), [])
+
+    def test_brute_force(self):
+        rng = random.Random(0)
+        words = ["bastard", "motherfucker", "tower", "clocks", "wanker"]
+        matcher = FuzzyMatcher(words, max_distance=2)
+        for _ in range(2000):
+            document = list(rng.choice(words))
+            for _ in range(rng.randint(0, 3)):
+                i = rng.randrange(len(document) + 1)
+                edit = rng.choice(["insert", "delete", "replace"])
+                if edit == "insert" or i == len(document):
+                    document.insert(i, rng.choice("abcdeo"))
+                elif edit == "delete":
+                    del document[i]
+                else:
+                    document[i] = rng.choice("abcdeo")
+            document = "".join(document)
+            expected = any(
+                edit_distance(document, word, typos) <= typos
+                for word in words
+                for typos in [
+                    min(
+                        2, len(word) // MIN_LENGTH, len(document) // MIN_LENGTH
+                    )
+                ]
+            )
+            self.assertEqual(matcher.search(document), expected, document)
+
+    def test_spans(self):
+        document = "Oh you BASTRAD, you chimnay sweeper."
+        spans = [
+            document[start:end]
+            for start, end, _ in self.matcher.finditer(document)
+        ]
+        self.assertEqual(spans, ["BASTRAD", "chimnay sweeper"])
+
+    def test_exact_parity(self):
+        trie = TrieMatcher(self.words)
+        for document in [
+            "ass, a*s and big ben",
+            "Bastards",
+            "chimney sweeper",
+        ]:
+            self.assertEqual(
+                list(self.matcher.finditer(document)),
+                list(trie.finditer(document)),
+            )
+
+    def test_edits(self):
+        self.matcher.remove_word(self.words[2], 2)
+        self.assertEqual(self._found(self.matcher, "bastrad"), [])
+        self.assertEqual(self._found(self.matcher, "bastardz"), ["bastards"])
+        self.matcher.add_word("bastard", 2)
+        self.assertEqual(self._found(self.matcher, "bastrad"), ["bastard"])
+        for word_id, word in enumerate(self.words):
+            self.matcher.remove_word(word, word_id)
+        self.assertEqual(self.matcher._root, {})
+        self.assertEqual(self.matcher._deletions, {})
+        self.assertFalse(self.matcher.search("bastrad ass"))
+
+    def test_pickle(self):
+        self.matcher.search("bastrad")
+        copy = pickle.loads(pickle.dumps(self.matcher))
+        self.assertEqual(copy._similar_cache, {})
+        self.assertEqual(self._found(copy, "bastrad"), ["bastard"])
+
+
+class TestRedFlaggerFuzzy(unittest.TestCase):
+
+    def test_detect(self):
+        red_flagger = RedFlagger(max_distance=1)
+        self.assertEqual(red_flagger.detect_abuse("you bastrad"), ["bastard"])
+        self.assertTrue(red_flagger.detect_abuse("bastrad", False))
+        self.assertEqual(red_flagger.redact("you bastrad"), "you *******")
+        self.assertEqual(RedFlagger().detect_abuse("you bastrad"), [])
+        red_flagger.add_words(["flooferdoodle"])
+        self.assertEqual(
+            red_flagger.detect_abuse("flooferdodle"), ["flooferdoodle"]
+        )
+        copy = pickle.loads(pickle.dumps(red_flagger))
+        self.assertEqual(copy.detect_abuse("bastrad"), ["bastard"])
+
+    def test_common_words(self):
+        # Common words a typo away from a phrase aren't flagged.
+        fuzzy = RedFlagger(max_distance=1)
+        exact = RedFlagger()
+        for document in [
+            "witch",
+            "ditch",
+            "pitch",
+            "pushy",
+            "white",
+            "the whole class",
+            "mother fucker",
+            "coming",
+            "varies",
+        ]:
+            self.assertEqual(
+                fuzzy.detect_abuse(document),
+                exact.detect_abuse(document),
+                document,
+            )
+
+    def test_min_length(self):
+        red_flagger = RedFlagger(max_distance=1, min_length=5)
+        self.assertEqual(red_flagger.detect_abuse("ditch"), ["bitch"])
+        self.assertEqual(RedFlagger(max_distance=1).detect_abuse("ditch"), [])
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            RedFlagger(matcher="regex", max_distance=1)
+        with self.assertRaises(ValueError):
+            RedFlagger(normalizer=Normalizer(), max_distance=1)
+        with self.assertRaises(ValueError):
+            FuzzyMatcher(["bastard"], max_distance=0)
@@ -0,0 +1,92 @@
+"""Tests the packed storage and lookups of the lexicon."""
+
+import pickle
+import random
+import unittest
+
+from rfwc.lexicon import Lexicon
+
+
+class TestLexicon(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ["cat", "Big Ben", "big ben", "", "🖕", "clock tower"]
+        self.lexicon = Lexicon(self.words)
+
+    def test_lookups(self):
+        lexicon = self.lexicon
+        self.assertEqual(len(lexicon), 6)
+        self.assertEqual(lexicon.words(), self.words)
+        self.assertEqual(list(lexicon), self.words)
+        for word_id, word in enumerate(self.words):
+            self.assertEqual(lexicon.word(word_id), word)
+            self.assertEqual(lexicon.find(word), word_id)
+            self.assertIn(word, lexicon)
+        self.assertIsNone(lexicon.find("BIG BEN"))
+        self.assertIn(lexicon.find("BIG BEN", ignore_case=True), (1, 2))
+        self.assertEqual(lexicon.find("Cat", ignore_case=True), 0)
+        self.assertIsNone(lexicon.find("dog", ignore_case=True))
+        self.assertNotIn("dog", lexicon)
+
+    def test_word_ids(self):
+        lexicon = Lexicon(["b", "a", "c"], [7, 2, 4])
+        self.assertEqual(lexicon.words(), ["b", "a", "c"])
+        self.assertEqual(lexicon.word(7), "b")
+        self.assertEqual(lexicon.find("c"), 4)
+        positions = lexicon.positions()
+        self.assertEqual([positions[i] for i in (2, 4, 7)], [1, 2, 0])
+        self.assertEqual(lexicon.insert([(0, "d")]), [8])
+        with self.assertRaises(ValueError):
+            Lexicon(["a"], [0, 1])
+
+    def test_edits(self):
+        rng = random.Random(0)
+        lexicon = Lexicon()
+        expected: list[tuple[int, str]] = []
+        lexicon.find("")  # The tables are kept up to date once built.
+        lexicon.find("", ignore_case=True)
+        for step in range(500):
+            if rng.random() < 0.6 or not expected:
+                words = [f"Word {step} {i}" for i in range(rng.randint(1, 20))]
+                placed = [
+                    (rng.randint(0, len(expected) + i), word)
+                    for i, word in enumerate(words)
+                ]
+                word_ids = lexicon.insert(placed)
+                for (position, word), word_id in zip(placed, word_ids):
+                    expected.insert(position, (word_id, word))
+            else:
+                removed = rng.sample(
+                    expected, rng.randint(1, min(len(expected), 20))
+                )
+                positions = lexicon.remove(word_id for word_id, _ in removed)
+                self.assertEqual(
+                    positions,
+                    sorted((expected.index(r) for r in removed), reverse=True),
+                )
+                for entry in removed:
+                    expected.remove(entry)
+                    self.assertNotIn(entry[1], lexicon)
+            self.assertEqual(list(lexicon.ids), [i for i, _ in expected])
+            # Before words() joins the inserted chunks.
+            self.assertEqual(
+                [lexicon.word(i) for i, _ in expected],
+                [w for _, w in expected],
+            )
+            if step % 3:
+                # Removals work with and without the positions cached.
+                lexicon.positions()
+            else:
+                self.assertEqual(lexicon.words(), [w for _, w in expected])
+            # The text of removed words is dropped along the way.
+            self.assertLessEqual(2 * lexicon._garbage, lexicon._offsets[-1])
+        self.assertTrue(expected)
+        for word_id, word in expected:
+            self.assertEqual(lexicon.find(word), word_id)
+            self.assertEqual(lexicon.find(word.upper(), True), word_id)
+
+    def test_pickle(self):
+        self.lexicon.find("cat")
+        copy = pickle.loads(pickle.dumps(self.lexicon))
+        self.assertEqual(copy.words(), self.words)
+        self.assertEqual(copy.find("clock tower"), 5)
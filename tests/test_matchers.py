@@ -0,0 +1,198 @@
+"""Tests that the matching engines agree with the reference regex engine."""
+
+import json
+import pickle
+import unittest
+
+from rfwc.matchers import (
+    AhoCorasickMatcher,
+    FlatTrieMatcher,
+    Prefilter,
+    RegexMatcher,
+    TrieMatcher,
+    contains_phrase,
+    get_matcher,
+    select_leftmost,
+)
+
+
+class TestMatchers(unittest.TestCase):
+
+    def setUp(self):
+        # Sorted by number of words, like filter_overlaps_and_sort does.
+        self.wordlist = [
+            "cat",
+            "@home-x",
+            "on-foot",
+            "@home",
+            "tower",
+            "snake_case",
+            "clock tower",
+            "big ben",
+            "Big Ben",
+        ]
+        self.documents = [
+            "",
+            "My cat is eating prosciutto.",
+            "Cats and a cat, CAT! concatenate",
+            "I went on-foot, not on foot, to the clock tower.",
+            "Staying @home or at@home or home@home",
+            "BIG BEN and big  ben and BigBen",
+            "snake_case snake_cases snake-case",
+            "tower clock tower towers",
+            "at@home-x and at@home, at@home-y",
+        ]
+        self.reference = RegexMatcher(self.wordlist)
+
+    def test_parity(self):
+        for matcher_class in (
+            AhoCorasickMatcher,
+            TrieMatcher,
+            FlatTrieMatcher,
+        ):
+            self._check_parity(matcher_class(self.wordlist), self.reference)
+
+    def _check_parity(self, matcher, reference):
+        for document in self.documents:
+            self.assertEqual(
+                list(matcher.finditer(document)),
+                list(reference.finditer(document)),
+                document,
+            )
+            self.assertEqual(
+                matcher.search(document), reference.search(document)
+            )
+
+    def test_word_ids(self):
+        word_ids = [10 * i for i in range(len(self.wordlist))]
+        reference = RegexMatcher(self.wordlist, word_ids)
+        for matcher_class in (
+            AhoCorasickMatcher,
+            TrieMatcher,
+            FlatTrieMatcher,
+        ):
+            self._check_parity(
+                matcher_class(self.wordlist, word_ids), reference
+            )
+
+    def test_duplicates_keep_first_index(self):
+        for matcher_class in (
+            AhoCorasickMatcher,
+            TrieMatcher,
+            FlatTrieMatcher,
+        ):
+            matcher = matcher_class(self.wordlist)
+            self.assertEqual(list(matcher.finditer("BIG BEN")), [(0, 7, 7)])
+
+    def test_trie_add_and_remove(self):
+        matcher = TrieMatcher(self.wordlist[:4])
+        for word_id, word in enumerate(self.wordlist[4:], start=4):
+            matcher.add_word(word, word_id)
+        self._check_parity(matcher, self.reference)
+
+        # Removing the first of two case-insensitive duplicates.
+        matcher.remove_word(self.wordlist[7], 7)
+        self.assertEqual(list(matcher.finditer("BIG BEN")), [(0, 7, 8)])
+        matcher.remove_word(self.wordlist[8], 8)
+        matcher.remove_word(self.wordlist[1], 1)
+        # Removing twice, or a phrase under another id, is a no-op.
+        matcher.remove_word(self.wordlist[1], 1)
+        matcher.remove_word(self.wordlist[2], 3)
+        remaining = [
+            w for i, w in enumerate(self.wordlist) if i not in (1, 7, 8)
+        ]
+        ids = [i for i in range(len(self.wordlist)) if i not in (1, 7, 8)]
+        self._check_parity(matcher, RegexMatcher(remaining, ids))
+        # Emptied branches of the trie are pruned.
+        self.assertNotIn("b", matcher._root)
+
+        # The state holds the trie only, the prefilter is rebuilt from it.
+        restored = TrieMatcher.from_state(
+            json.loads(json.dumps(matcher.get_state()))
+        )
+        self._check_parity(restored, RegexMatcher(remaining, ids))
+        self.assertEqual(restored._prefilter._keys, matcher._prefilter._keys)
+        restored.remove_word("cat", 0)
+        self.assertFalse(restored.search("My cat"))
+
+    def test_flat_trie_tables(self):
+        word_ids = [10 * i for i in range(len(self.wordlist))]
+        matcher = FlatTrieMatcher(self.wordlist, word_ids)
+        self.assertEqual(matcher.words(), (self.wordlist, word_ids))
+        reference = RegexMatcher(self.wordlist, word_ids)
+        tables = bytes(matcher.tables())
+        for copy in (
+            FlatTrieMatcher.from_buffer(bytearray(tables)),
+            FlatTrieMatcher.from_state(matcher.get_state()),
+            pickle.loads(pickle.dumps(matcher)),
+        ):
+            self._check_parity(copy, reference)
+        with self.assertRaises(ValueError):
+            FlatTrieMatcher.from_buffer(b"RFWT")
+        with self.assertRaises(ValueError):
+            FlatTrieMatcher.from_buffer(tables[:-1])
+        with self.assertRaises(ValueError):
+            FlatTrieMatcher.from_buffer(b"X" + tables[1:])
+
+    def test_prefiltered_search(self):
+        wordlist = self.wordlist + ["🖕", "<3"]
+        documents = self.documents + [
+            "Sending 🖕 and <3",
+            "clock<3tower",
+            "Nothing to see here.",
+        ]
+        for matcher_class in (
+            RegexMatcher,
+            AhoCorasickMatcher,
+            TrieMatcher,
+            FlatTrieMatcher,
+        ):
+            matcher = matcher_class.from_state(
+                matcher_class(wordlist).get_state()
+            )
+            for document in documents:
+                self.assertEqual(
+                    matcher.search(document),
+                    bool(list(matcher.finditer(document))),
+                    (matcher_class.name, document),
+                )
+        # Attached tables get a prefilter of their phrases.
+        tables = FlatTrieMatcher(wordlist).tables()
+        matcher = FlatTrieMatcher.from_buffer(tables)
+        self.assertTrue(matcher._prefilter.rejects("Nothing to see here."))
+        self.assertFalse(matcher._prefilter.rejects("Sending 🖕"))
+
+    def test_prefilter(self):
+        prefilter = Prefilter(["clock tower", "@home", "🖕", ""])
+        self.assertTrue(prefilter.rejects("clocks and a bell"))
+        self.assertFalse(prefilter.rejects("CLOCK, clocks"))
+        self.assertFalse(prefilter.rejects("at home"))
+        self.assertFalse(prefilter.rejects("x🖕x"))
+        prefilter.add("tower")
+        prefilter.remove("clock tower")
+        prefilter.remove("🖕")
+        self.assertTrue(prefilter.rejects("clock"))
+        self.assertFalse(prefilter.rejects("tower"))
+        self.assertTrue(prefilter.rejects("x🖕x"))
+
+    def test_contains_phrase(self):
+        self.assertTrue(contains_phrase("the Big Ben clock", "big ben"))
+        self.assertFalse(contains_phrase("the Big Bens clock", "big ben"))
+        self.assertFalse(contains_phrase("@home", "@Home"))
+        self.assertTrue(contains_phrase("at@home", "@Home"))
+        self.assertTrue(contains_phrase("word", ""))
+        self.assertFalse(contains_phrase("!!", ""))
+
+    def test_empty_wordlist(self):
+        for name in ("regex", "aho-corasick", "trie", "flat-trie"):
+            matcher = get_matcher(name)([])
+            self.assertEqual(list(matcher.finditer("anything")), [])
+            self.assertFalse(matcher.search("anything"))
+
+    def test_select_leftmost(self):
+        candidates = [(4, 9, 0), (0, 5, 2), (0, 3, 1), (6, 8, 3)]
+        self.assertEqual(select_leftmost(candidates), [(0, 3, 1), (4, 9, 0)])
+
+    def test_unknown_matcher(self):
+        with self.assertRaises(ValueError):
+            get_matcher("unknown")
@@ -0,0 +1,78 @@
+"""Tests the opt-in instrumentation of the RedFlagger."""
+
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.metrics import Histogram, Metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        self.assertIsNone(histogram.quantile(0.5))
+        for value in (0.0005, 0.002, 0.003, 0.05, 1.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.quantile(0.99), float("inf"))
+        snapshot = histogram.snapshot()
+        self.assertEqual(
+            snapshot["buckets"], [[0.001, 1], [0.01, 3], [0.1, 4]]
+        )
+        self.assertEqual(snapshot["count"], 5)
+        self.assertAlmostEqual(snapshot["sum"], 1.0555)
+
+    def test_hooks_and_pickling(self):
+        events = []
+        metrics = Metrics()
+        metrics.add_hook(lambda *event: events.append(event))
+        metrics.increment("documents", 3)
+        metrics.observe("detect_abuse", 0.5)
+        self.assertEqual(
+            events,
+            [("counter", "documents", 3), ("timing", "detect_abuse", 0.5)],
+        )
+
+        copy = pickle.loads(pickle.dumps(metrics))
+        self.assertEqual(copy.snapshot()["counters"], {})
+        metrics.reset()
+        self.assertEqual(metrics.snapshot()["histograms"], {})
+
+    def test_red_flagger(self):
+        self.assertIsNone(RedFlagger().get_metrics())
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        metrics = Metrics()
+        red_flagger = RedFlagger(
+            use_cache=True, cache_dir=cache_dir, metrics=metrics
+        )
+        self.assertIn("load_wordlist", metrics.histograms)
+        self.assertIn("load_matcher", metrics.histograms)
+        RedFlagger(use_cache=True, cache_dir=cache_dir, metrics=metrics)
+        self.assertIn("load_compiled", metrics.histograms)
+
+        red_flagger.add_words(["Big Ben", "clocktower"])
+        self.assertEqual(metrics.histograms["update_matcher"].count, 1)
+        red_flagger.detect_abuse("Big Ben is a clocktower")
+        red_flagger.detect_abuse("Nothing here", return_words=False)
+        list(
+            red_flagger.detect_abuse_many(
+                ["big ben", "clock", "no", "tower"], return_words=False
+            )
+        )
+        red_flagger.scan("Big Ben and big ben")
+        snapshot = red_flagger.get_metrics()
+        self.assertEqual(
+            snapshot["counters"],
+            {"documents": 7, "flagged_documents": 3, "words": 4},
+        )
+        self.assertEqual(snapshot["match_rate"], 3 / 7)
+        self.assertEqual(snapshot["histograms"]["scan"]["count"], 1)
+        self.assertEqual(snapshot["histograms"]["detect_abuse"]["count"], 2)
+        self.assertEqual(
+            snapshot["histograms"]["detect_abuse_chunk"]["count"], 1
+        )
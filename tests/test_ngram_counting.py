@@ -0,0 +1,150 @@
+"""Tests of the scripts building the lexicon to annotate: counting n-grams
+in shards agrees with counting them at once, and failed downloads of
+lexicons give empty word lists."""
+
+import importlib.util
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+HAS_DEPENDENCIES = all(
+    importlib.util.find_spec(name) is not None for name in ("numpy", "nltk")
+)
+DATA_BUILDING = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "data_building"
+)
+
+
+@unittest.skipUnless(HAS_DEPENDENCIES, "numpy or nltk is not installed")
+class TestNgramCounting(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        sys.path.insert(0, DATA_BUILDING)
+        cls.addClassCleanup(sys.path.remove, DATA_BUILDING)
+        import helpers
+        import ngram_counting
+
+        cls.ngram_counting = ngram_counting
+        rng = random.Random(0)
+        vocabulary = [f"word{i}" for i in range(8)]
+        # Zipf-like, so the counts are spread out.
+        weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+        cls.rows = [
+            " ".join(rng.choices(vocabulary, weights, k=rng.randint(1, 12)))
+            for _ in range(300)
+        ]
+        cls.exact = helpers.initialize_grams()
+        for row in cls.rows:
+            helpers.update_grams(row.split(), *cls.exact)
+
+    def _shards(self, size):
+        return (
+            self.rows[start : start + size]
+            for start in range(0, len(self.rows), size)
+        )
+
+    def test_all_ngrams(self):
+        # Every n-gram is wanted, so all of them are counted exactly.
+        wanted = (10, 70, 600)
+        single = self.ngram_counting.top_ngrams(
+            [self.rows], *wanted, workers=1
+        )
+        sharded = self.ngram_counting.top_ngrams(
+            self._shards(17), *wanted, workers=2
+        )
+        for exact, single_top, sharded_top in zip(self.exact, single, sharded):
+            self.assertEqual(dict(single_top), dict(exact))
+            self.assertEqual(dict(sharded_top), dict(exact))
+
+    def test_top_ngrams(self):
+        wanted = (3, 5, 8)
+        single = self.ngram_counting.top_ngrams(
+            [self.rows], *wanted, workers=1
+        )
+        sharded = self.ngram_counting.top_ngrams(
+            self._shards(17), *wanted, workers=2
+        )
+        for exact, n, single_top, sharded_top in zip(
+            self.exact, wanted, single, sharded
+        ):
+            counts = [count for _, count in exact.most_common(n)]
+            self.assertEqual([count for _, count in single_top], counts)
+            self.assertEqual([count for _, count in sharded_top], counts)
+            # N-grams tied at the cut-off may differ, the others don't.
+            above = {
+                ngram for ngram, count in exact.items() if count > counts[-1]
+            }
+            for top in (single_top, sharded_top):
+                self.assertLessEqual(above, {ngram for ngram, _ in top})
+
+    def test_sketch(self):
+        sketch = self.ngram_counting.NgramSketch(2, width=64, depth=2)
+        sketch.update(self.exact[0])
+        estimates = sketch.estimate(list(self.exact[0]))
+        # A count-min sketch never underestimates.
+        for estimate, count in zip(estimates, self.exact[0].values()):
+            self.assertGreaterEqual(estimate, count)
+        self.assertEqual(len(sketch.most_common(2)), 2)
+
+
+HAS_BUILD_DEPENDENCIES = HAS_DEPENDENCIES and all(
+    importlib.util.find_spec(name) is not None
+    for name in ("datasets", "pandas", "requests")
+)
+
+
+@unittest.skipUnless(
+    HAS_BUILD_DEPENDENCIES, "the data building dependencies are not installed"
+)
+class TestDownloadWordlist(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        sys.path.insert(0, DATA_BUILDING)
+        cls.addClassCleanup(sys.path.remove, DATA_BUILDING)
+        import lexicon_to_annotate_creation
+
+        cls.creation = lexicon_to_annotate_creation
+
+    def _download(self, **kwargs):
+        requests = self.creation.requests
+        with (
+            tempfile.TemporaryDirectory() as cache_dir,
+            mock.patch.object(requests, "get", **kwargs),
+            redirect_stdout(io.StringIO()) as output,
+        ):
+            words = self.creation.download_github_wordlist(
+                "https://example.com/words.txt", cache_dir
+            )
+            cached = os.listdir(cache_dir)
+        return words, cached, output.getvalue()
+
+    def test_failed_request(self):
+        requests = self.creation.requests
+        for error in (requests.ConnectionError, requests.Timeout):
+            with self.subTest(error=error.__name__):
+                words, cached, output = self._download(
+                    side_effect=error("unreachable")
+                )
+                self.assertEqual(words, set())
+                self.assertEqual(cached, [])
+                self.assertIn("Failed to get file", output)
+
+    def test_failed_status(self):
+        response = mock.Mock(status_code=404, text="")
+        words, cached, output = self._download(return_value=response)
+        self.assertEqual(words, set())
+        self.assertEqual(cached, [])
+        self.assertIn("Code: 404", output)
+
+    def test_download(self):
+        response = mock.Mock(status_code=200, text="Word\nother word")
+        words, cached, _ = self._download(return_value=response)
+        self.assertEqual(words, {"word", "other word"})
+        self.assertEqual(len(cached), 1)
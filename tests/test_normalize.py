@@ -0,0 +1,186 @@
+"""Tests the normalization of obfuscated spellings and its matcher."""
+
+import pickle
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.matchers import TrieMatcher
+from rfwc.normalize import NormalizedMatcher, Normalizer
+
+
+class TestNormalizer(unittest.TestCase):
+
+    def setUp(self):
+        self.normalizer = Normalizer()
+
+    def test_normalize(self):
+        cases = {
+            "Sh1t": "shit",
+            "$hiiiit!": "shit!",
+            "s.h.i.t and s h i t": "shit and shit",
+            "s̈ḧïẗ": "shit",
+            "𝐬𝐡𝐢𝐭": "shit",
+            "Ѕhit": "shit",
+            "shit-faced": "shit-faced",
+            "1-based": "1-based",
+            "4 + 1 = 5": "4 + 1 = 5",
+            "a*s": "a*s",
+            "it's a b.c": "it's abc",
+        }
+        for text, expected in cases.items():
+            self.assertEqual(self.normalizer.normalize(text).text, expected)
+
+    def test_offsets(self):
+        for text in ["Sh1iiit, s.h.i.t and $hit!", "s̈ḧïẗ 𝐬𝐡𝐢𝐭", "aaa", "x"]:
+            normalized = self.normalizer.normalize(text)
+            spans = [
+                normalized.span(i, i + 1) for i in range(len(normalized.text))
+            ]
+            # Characters come from disjoint spans, in order.
+            self.assertEqual(spans[0][0], 0)
+            self.assertEqual(spans[-1][1], len(text))
+            for (_, end), (start, _) in zip(spans, spans[1:]):
+                self.assertLessEqual(end, start)
+        normalized = self.normalizer.normalize("Sh1iiit, s.h.i.t")
+        self.assertEqual(normalized.text, "shit, shit")
+        self.assertEqual(normalized.runs, {2: 4})
+        self.assertEqual(normalized.span(0, 4), (0, 7))
+        self.assertEqual(normalized.span(6, 10), (9, 16))
+
+    def test_disabled(self):
+        normalizer = Normalizer(
+            leet=None,
+            collapse_repeats=False,
+            separators="",
+            fold_unicode=False,
+        )
+        normalized = normalizer.normalize("Sh1iiit, s.h.i.t s̈")
+        self.assertEqual(normalized.text, "sh1iiit, s.h.i.t s̈")
+        self.assertIsNone(normalized.removed)
+        self.assertIsNone(normalized.collapsed)
+
+    def test_pickle(self):
+        normalizer = pickle.loads(pickle.dumps(Normalizer(separators=".")))
+        self.assertEqual(normalizer.normalize("s h.i").text, "s hi")
+
+
+class TestNormalizedMatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ["ass", "shit", "big ben", "as"]
+        self.matcher = NormalizedMatcher(Normalizer(), self.words)
+
+    def test_runs(self):
+        found = {
+            "as": ["as"],
+            "ass": ["ass"],
+            "asss": ["ass"],
+            "a$$": ["ass"],
+            "a.s": ["as"],
+            "shiiiit": ["shit"],
+            "big  b3n": ["big ben"],
+        }
+        for document, expected in found.items():
+            words = [
+                self.words[i] for _, _, i in self.matcher.finditer(document)
+            ]
+            self.assertEqual(words, expected, document)
+            self.assertTrue(self.matcher.search(document))
+        matcher = NormalizedMatcher(Normalizer(), ["ass", "asses"])
+        self.assertEqual(list(matcher.finditer("as")), [])
+        self.assertFalse(matcher.search("an as"))
+        self.assertEqual(list(matcher.finditer("assess")), [])
+        self.assertFalse(matcher.search("assess"))
+
+    def test_spans(self):
+        document = "Oh SH1IIIT, it's B.I.G B3N!"
+        spans = [
+            document[start:end]
+            for start, end, _ in self.matcher.finditer(document)
+        ]
+        self.assertEqual(spans, ["SH1IIIT", "B.I.G B3N"])
+
+    def test_edits(self):
+        self.matcher.remove_word(self.words[1], 1)
+        self.assertFalse(self.matcher.search("sh1t"))
+        self.matcher.add_word("Sh1t", 7)
+        self.assertEqual(list(self.matcher.finditer("a shit")), [(2, 6, 7)])
+
+    def test_plain_parity(self):
+        normalizer = Normalizer(
+            leet=None,
+            collapse_repeats=False,
+            separators="",
+            fold_unicode=False,
+        )
+        matcher = NormalizedMatcher(normalizer, self.words)
+        trie = TrieMatcher(self.words)
+        for document in ["as ass, asss", "Big Ben shit", "big  ben", ""]:
+            self.assertEqual(
+                list(matcher.finditer(document)),
+                list(trie.finditer(document)),
+            )
+
+
+class TestRedFlaggerNormalizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.red_flagger = RedFlagger(normalizer=Normalizer())
+
+    def test_detect(self):
+        red_flagger = self.red_flagger
+        self.assertEqual(red_flagger.detect_abuse("$hiiiit happens"), ["shit"])
+        self.assertEqual(red_flagger.detect_abuse("s.h.i.t"), ["shit"])
+        self.assertEqual(red_flagger.detect_abuse("as if"), [])
+        self.assertEqual(red_flagger.redact("oh 𝐬𝐡𝐢𝐭!"), "oh ****!")
+        spans = red_flagger.find_spans("no, sh!iit")
+        self.assertEqual(list(spans[:2]), [4, 10])
+        self.assertEqual(
+            red_flagger.get_wordlist()[spans[2]],
+            "shit",
+        )
+        self.assertEqual(RedFlagger().detect_abuse("$hiiiit happens"), [])
+
+    def test_variants(self):
+        # Spelled as in the document, else without leet characters.
+        red_flagger = self.red_flagger
+        self.assertEqual(red_flagger.detect_abuse("you bitch"), ["bitch"])
+        self.assertEqual(red_flagger.detect_abuse("you b1tch"), ["b1tch"])
+        self.assertEqual(red_flagger.detect_abuse("you biiitch"), ["bitch"])
+        exact = RedFlagger()
+        for word in exact.get_wordlist():
+            if exact.detect_abuse(word) == [word]:
+                self.assertEqual(red_flagger.detect_abuse(word), [word])
+
+    def test_exact_superset(self):
+        exact = RedFlagger()
+        for document in [
+            "shit@home",
+            "mail fuck@you.com",
+            "b@stard and s.h.i.t",
+            "fl.o.o.f.y",
+        ]:
+            found = self.red_flagger.detect_abuse(document)
+            for word in exact.detect_abuse(document):
+                self.assertIn(word, found, document)
+
+    def test_run_lengths(self):
+        for document in ["assess", "a.s.s.e.s.s", "class", "pass", "passes"]:
+            self.assertEqual(self.red_flagger.detect_abuse(document), [])
+        self.assertEqual(self.red_flagger.detect_abuse("asssses"), ["asses"])
+
+    def test_edits_and_pickle(self):
+        red_flagger = RedFlagger(normalizer=Normalizer())
+        red_flagger.add_words(["fl0ofy", "bl4rg"])
+        self.assertEqual(red_flagger.detect_abuse("FLOOOFY"), ["fl0ofy"])
+        red_flagger.remove_words(["bl4rg"])
+        self.assertEqual(red_flagger.detect_abuse("blarg"), [])
+        copy = pickle.loads(pickle.dumps(red_flagger))
+        self.assertEqual(copy.detect_abuse("fl.o.o.f.y"), ["y"])
+        self.assertEqual(copy.detect_abuse("f l o o f y"), ["fl0ofy"])
+        self.assertEqual(copy.detect_abuse("bl@rg"), [])
+
+    def test_requires_trie(self):
+        with self.assertRaises(ValueError):
+            RedFlagger(matcher="regex", normalizer=Normalizer())
@@ -2,7 +2,14 @@
 
 import unittest
 
-from rfwc.obscure_data import obscure, unobscure
+from rfwc.obscure_data import (
+    ObscuringError,
+    is_obscured_wordlist,
+    obscure,
+    obscure_wordlist,
+    unobscure,
+    unobscure_wordlist,
+)
 
 
 class TestObscureData(unittest.TestCase):
@@ -51,3 +58,38 @@ class TestObscureData(unittest.TestCase):
             unobscure(self.simple_b16), unobscure(self.simple_b16)
         )
         self.assertEqual(unobscure(self.leet_b16), unobscure(self.leet_b16))
+
+
+class TestObscuredWordlist(unittest.TestCase):
+
+    def setUp(self):
+        self.words = ["Hello", "H377o W()\rld<>", "clock tower", "café 🖕", ""]
+
+    def test_round_trip(self):
+        for filtered in (True, False):
+            data = obscure_wordlist(self.words, filtered)
+            self.assertTrue(is_obscured_wordlist(data))
+            wordlist = unobscure_wordlist(data)
+            self.assertEqual(wordlist.words, self.words)
+            self.assertEqual(wordlist.filtered, filtered)
+        self.assertEqual(unobscure_wordlist(obscure_wordlist([])).words, [])
+
+    def test_not_plain_text(self):
+        data = obscure_wordlist(self.words)
+        for word in self.words[:4]:
+            self.assertNotIn(word.encode("utf-8"), data)
+
+    def test_errors(self):
+        data = obscure_wordlist(self.words)
+        self.assertFalse(is_obscured_wordlist(obscure("Hello")))
+        for broken in (
+            obscure("Hello"),
+            data[:-1],
+            data[:12] + bytes([data[12] ^ 1]) + data[13:],
+            data[:-2] + bytes([data[-2] ^ 1]) + data[-1:],
+            data[:4] + b"\x09" + data[5:],
+        ):
+            with self.assertRaises(ObscuringError):
+                unobscure_wordlist(broken)
+        with self.assertRaises(ValueError):
+            obscure_wordlist(["two\nlines"])
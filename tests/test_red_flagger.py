@@ -3,10 +3,15 @@ Tests various properties of the obscuring/unobscuring
 functions which are critical to the lib.
 """
 
+import importlib.util
 import unittest
+import unittest.mock
 
 from rfwc import RedFlagger
 
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+HAS_SCIPY = importlib.util.find_spec("scipy") is not None
+
 
 class TestRedFlagger(unittest.TestCase):
 
@@ -16,7 +21,8 @@ class TestRedFlagger(unittest.TestCase):
     def test_get_wordlist(self):
         self.assertEqual(len(self.red_flagger.get_wordlist()), 1882)
         self.assertEqual(
-            self.red_flagger.get_wordlist(), self.red_flagger._wordlist
+            self.red_flagger.get_wordlist(),
+            list(self.red_flagger._index.lexicon),
         )
 
     def test_add_words(self):
@@ -100,6 +106,208 @@ class TestRedFlagger(unittest.TestCase):
         )
         self.assertEqual(detected_8, ["Big Ben"])
 
+    def test_find_spans(self):
+        wl = self.red_flagger.get_wordlist()
+        self.red_flagger.remove_words(wl)
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+
+        self.assertEqual(list(self.red_flagger.find_spans("")), [])
+        document = "I saw big ben, the clocktower, on-foot."
+        spans = self.red_flagger.find_spans(document)
+        self.assertEqual(spans.typecode, "i")
+        self.assertEqual(list(spans), [6, 13, 2, 19, 29, 0, 31, 38, 1])
+        wordlist = self.red_flagger.get_wordlist()
+        self.assertEqual(
+            [wordlist[i] for i in spans[2::3]],
+            self.red_flagger.detect_abuse(document),
+        )
+        with self.assertRaises(ValueError):
+            self.red_flagger.find_spans(document, output="list")
+
+    def test_scan(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        documents = ["", "Nothing here.", "big ben, the clocktower, Big Ben"]
+        for document in documents:
+            result = self.red_flagger.scan(document)
+            self.assertEqual(
+                result.flagged,
+                self.red_flagger.detect_abuse(document, return_words=False),
+            )
+            self.assertEqual(
+                result.words, self.red_flagger.detect_abuse(document)
+            )
+            self.assertEqual(
+                result.spans, self.red_flagger.find_spans(document)
+            )
+            self.assertEqual(
+                result.vector, self.red_flagger.get_abuse_vector(document)
+            )
+
+    def test_scan_single_pass(self):
+        self.red_flagger.add_words(["Big Ben"])
+        matcher = self.red_flagger._matcher
+        calls = []
+
+        def finditer(document):
+            calls.append(document)
+            return matcher.finditer(document)
+
+        self.red_flagger._matcher = unittest.mock.Mock(finditer=finditer)
+        result = self.red_flagger.scan("big ben and Big Ben")
+        self.assertEqual(result.words, ["Big Ben", "Big Ben"])
+        self.assertTrue(result.flagged)
+        self.assertEqual(len(result.spans), 6)
+        self.assertEqual(sum(result.vector), 2)
+        self.assertEqual(len(calls), 1)
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    def test_find_spans_numpy(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        document = "I saw big ben, the clocktower."
+        spans = self.red_flagger.find_spans(document, output="numpy")
+        self.assertEqual(spans["start"].tolist(), [6, 19])
+        self.assertEqual(spans["end"].tolist(), [13, 29])
+        self.assertEqual(
+            list(spans["word_index"]),
+            list(self.red_flagger.find_spans(document)[2::3]),
+        )
+
+    def test_redact(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        document = "I saw big ben, the clocktower."
+        self.assertEqual(
+            self.red_flagger.redact(document),
+            "I saw *******, the **********.",
+        )
+        self.assertEqual(
+            self.red_flagger.redact(document, "[X]", keep_length=False),
+            "I saw [X], the [X].",
+        )
+        self.assertEqual(
+            self.red_flagger.redact("Nothing here."), "Nothing here."
+        )
+
+    def test_detect_abuse_many(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+        documents = [
+            "",
+            "My cat is eating prosciutto.",
+            "Big ben really is something, huh?",
+            "I visited bIG bEN and went there ON-foot to see the ClockTower.",
+        ] * 3
+
+        for return_words in (True, False):
+            expected = [
+                self.red_flagger.detect_abuse(d, return_words=return_words)
+                for d in documents
+            ]
+            # Generators are accepted and chunks don't change the results.
+            for chunk_size in (1, 5, 1024):
+                detected = self.red_flagger.detect_abuse_many(
+                    (d for d in documents),
+                    return_words=return_words,
+                    chunk_size=chunk_size,
+                )
+                self.assertEqual(list(detected), expected)
+
+        self.assertEqual(list(self.red_flagger.detect_abuse_many([])), [])
+        with self.assertRaises(ValueError):
+            list(self.red_flagger.detect_abuse_many(documents, chunk_size=0))
+
+    def test_scan_parallel(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+        documents = [
+            "My cat is eating prosciutto.",
+            "Big ben really is something, huh?",
+            "I visited bIG bEN and went there ON-foot to see the ClockTower.",
+        ] * 20
+
+        for return_words in (True, False):
+            expected = list(
+                self.red_flagger.detect_abuse_many(
+                    documents, return_words=return_words
+                )
+            )
+            detected = self.red_flagger.scan_parallel(
+                iter(documents),
+                workers=2,
+                chunk_size=7,
+                return_words=return_words,
+            )
+            self.assertEqual(list(detected), expected)
+
+    def test_result_cache(self):
+        red_flagger = RedFlagger(result_cache_size=16)
+        self.assertIsNone(self.red_flagger.result_cache_info())
+        document = "I visited bIG bEN and saw the ClockTower."
+        self.assertEqual(red_flagger.detect_abuse(document), [])
+
+        red_flagger.add_words(["Big Ben", "clocktower"])
+        words = red_flagger.detect_abuse(document)
+        self.assertEqual(words, ["Big Ben", "clocktower"])
+        words.append("changed")
+        self.assertEqual(
+            list(red_flagger.detect_abuse_many([document] * 3)),
+            [["Big Ben", "clocktower"]] * 3,
+        )
+        self.assertTrue(red_flagger.detect_abuse(document, False))
+        info = red_flagger.result_cache_info()
+        self.assertEqual((info.hits, info.misses, info.entries), (3, 3, 2))
+
+        red_flagger.remove_words(["clocktower"])
+        self.assertEqual(red_flagger.detect_abuse(document), ["Big Ben"])
+
+    def test_detect_abuse_buffer(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        document = "Café, big ben!\nThe clocktower."
+        data = document.encode("utf-8")
+        detected = list(self.red_flagger.detect_abuse_buffer(data))
+        self.assertEqual(
+            [word for _, _, word in detected],
+            self.red_flagger.detect_abuse(document),
+        )
+        self.assertEqual(
+            [data[start:end] for start, end, _ in detected],
+            [b"big ben", b"clocktower"],
+        )
+
+    def test_incremental_updates(self):
+        # Patching the trie gives the same results as rebuilding a matcher.
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+        self.red_flagger.add_words(["the clocktower bell", "ben", "foot"])
+        self.red_flagger.remove_words(["on-foot", "ben"])
+        self.red_flagger.add_words(["big ben"])
+        self.assertIn("big ben", self.red_flagger.get_wordlist())
+        self.assertNotIn("Big Ben", self.red_flagger.get_wordlist())
+
+        rebuilt = RedFlagger(matcher="regex", use_cache=False)
+        rebuilt.remove_words(rebuilt.get_wordlist())
+        rebuilt.add_words(self.red_flagger.get_wordlist())
+        self.assertEqual(
+            rebuilt.get_wordlist(), self.red_flagger.get_wordlist()
+        )
+        document = "Big Ben, the clocktower bell, on-foot or by foot."
+        self.assertEqual(
+            self.red_flagger.detect_abuse(document),
+            rebuilt.detect_abuse(document),
+        )
+        self.assertEqual(
+            self.red_flagger.get_abuse_vector(document),
+            rebuilt.get_abuse_vector(document),
+        )
+
+    def test_regex_matcher(self):
+        # The trie is the default engine, as documented in the README.
+        self.assertEqual(self.red_flagger._matcher.name, "trie")
+        regex_flagger = RedFlagger(matcher="regex")
+        document = "Big Ben is a clocktower, well, kind of."
+        for red_flagger in (self.red_flagger, regex_flagger):
+            red_flagger.add_words(["Big Ben", "clocktower"])
+        self.assertEqual(
+            regex_flagger.detect_abuse(document),
+            self.red_flagger.detect_abuse(document),
+        )
+
     def test_get_abuse_vector(self):
         wl = self.red_flagger.get_wordlist()
         self.red_flagger.remove_words(wl)
@@ -128,3 +336,56 @@ class TestRedFlagger(unittest.TestCase):
             I can see that clocktower from my home!"
         )
         self.assertEqual(multi_matches, [2, 0, 1])
+
+    def test_get_abuse_vector_sparse(self):
+        wl = self.red_flagger.get_wordlist()
+        self.red_flagger.remove_words(wl)
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+
+        self.assertEqual(self.red_flagger.get_abuse_vector("", "sparse"), [])
+        multi_matches = self.red_flagger.get_abuse_vector(
+            "My favourite clocktower is Big Ben. \
+            I can see that clocktower from my home!",
+            output="sparse",
+        )
+        self.assertEqual(multi_matches, [(0, 2), (2, 1)])
+
+        with self.assertRaises(ValueError):
+            self.red_flagger.get_abuse_vector("", output="dict")
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    def test_get_abuse_vector_numpy(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        document = "Big Ben is a clocktower, Big Ben."
+        self.assertEqual(
+            self.red_flagger.get_abuse_vector(document, "numpy").tolist(),
+            self.red_flagger.get_abuse_vector(document),
+        )
+
+    def test_get_abuse_matrix(self):
+        wl = self.red_flagger.get_wordlist()
+        self.red_flagger.remove_words(wl)
+        self.red_flagger.add_words(["Big Ben", "clocktower", "on-foot"])
+
+        documents = [
+            "The Eiffel Tower looks great at night",
+            "I can see Big Ben!",
+            "clocktower, Big Ben, clocktower and on-foot",
+        ]
+        (data, indices, indptr), shape = self.red_flagger.get_abuse_matrix(
+            iter(documents), chunk_size=2
+        )
+        self.assertEqual(shape, (3, 3))
+        self.assertEqual(list(data), [1, 2, 1, 1])
+        self.assertEqual(list(indices), [2, 0, 1, 2])
+        self.assertEqual(list(indptr), [0, 0, 1, 4])
+
+    @unittest.skipUnless(HAS_SCIPY, "scipy is not installed")
+    def test_get_abuse_matrix_scipy(self):
+        self.red_flagger.add_words(["Big Ben", "clocktower"])
+        documents = ["", "Big Ben is a clocktower, Big Ben."]
+        matrix = self.red_flagger.get_abuse_matrix(documents, as_scipy=True)
+        self.assertEqual(
+            matrix.toarray().tolist(),
+            [self.red_flagger.get_abuse_vector(d) for d in documents],
+        )
@@ -0,0 +1,48 @@
+"""Tests the eviction and accounting of the result cache."""
+
+import pickle
+import unittest
+
+from rfwc.result_cache import CacheInfo, ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", True, ("x",))
+        cache.put("b", True, ())
+        self.assertEqual(cache.get("a", True), ("x",))
+        cache.put("c", False, True)
+        # b was the least recently used entry.
+        self.assertIsNone(cache.get("b", True))
+        self.assertEqual(cache.get("a", True), ("x",))
+        self.assertTrue(cache.get("c", False))
+        self.assertIsNone(cache.get("c", True))
+        self.assertEqual(cache.info()[:4], (3, 2, 2, 2))
+
+    def test_max_bytes(self):
+        cache = ResultCache(max_entries=100, max_bytes=300)
+        cache.put("a" * 1000, False, True)
+        self.assertEqual(len(cache), 0)
+        for document in ("a", "b", "c", "d", "e", "f"):
+            cache.put(document, False, False)
+        self.assertLessEqual(cache.info().bytes, 300)
+        self.assertIsNotNone(cache.get("f", False))
+        self.assertIsNone(cache.get("a", False))
+
+    def test_clear_and_pickle(self):
+        cache = ResultCache(max_entries=3, max_bytes=1000)
+        cache.put("a", False, True)
+        cache.get("a", False)
+        cache.clear()
+        self.assertEqual(cache.info(), CacheInfo(1, 0, 3, 0, 0))
+
+        cache.put("a", False, True)
+        copy = pickle.loads(pickle.dumps(cache))
+        self.assertEqual((copy.max_entries, copy.max_bytes), (3, 1000))
+        self.assertEqual(len(copy), 0)
+
+    def test_invalid_size(self):
+        with self.assertRaises(ValueError):
+            ResultCache(max_entries=0)
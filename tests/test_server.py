@@ -0,0 +1,173 @@
+"""Tests the scanning daemon and its client over local sockets."""
+
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.client import RedFlaggerClient
+from rfwc.server import ServerError, handle_request, make_server
+
+DOCUMENTS = [
+    "My cat is eating prosciutto.",
+    "I visited bIG bEN and went there to see the ClockTower.",
+]
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.red_flagger = RedFlagger()
+        cls.red_flagger.add_words(["Big Ben", "clocktower"])
+
+    def _serve(self, **kwargs):
+        server = make_server(self.red_flagger, **kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+
+        def stop():
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+        self.addCleanup(stop)
+        return server
+
+    def _check_client(self, client: RedFlaggerClient):
+        with client:
+            for document in DOCUMENTS:
+                self.assertEqual(
+                    client.detect_abuse(document),
+                    self.red_flagger.detect_abuse(document),
+                )
+                self.assertEqual(
+                    client.detect_abuse(document, return_words=False),
+                    self.red_flagger.detect_abuse(
+                        document, return_words=False
+                    ),
+                )
+                for output in ("list", "sparse"):
+                    self.assertEqual(
+                        client.get_abuse_vector(document, output=output),
+                        self.red_flagger.get_abuse_vector(
+                            document, output=output
+                        ),
+                    )
+            self.assertEqual(
+                client.detect_abuse_many(iter(DOCUMENTS), return_words=False),
+                [False, True],
+            )
+            with self.assertRaises(ServerError):
+                client._call("get_wordlist")
+            # The connection is still usable after an error.
+            self.assertEqual(client.detect_abuse(DOCUMENTS[0]), [])
+
+    def test_unix_socket(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        socket_path = os.path.join(tmp_dir, "rfwc.sock")
+        self._serve(socket_path=socket_path)
+        self._check_client(RedFlaggerClient(socket_path=socket_path))
+
+    def test_tcp(self):
+        server = self._serve(port=0)
+        self._check_client(RedFlaggerClient(port=server.server_address[1]))
+
+    def test_reconnect(self):
+        server = self._serve(port=0)
+        port = server.server_address[1]
+        with RedFlaggerClient(port=port) as client:
+            self.assertEqual(client.detect_abuse(DOCUMENTS[0]), [])
+            # Simulates a daemon that dropped the connection.
+            client._socket.close()
+            client._socket = None
+            self.assertTrue(
+                client.detect_abuse(DOCUMENTS[1], return_words=False)
+            )
+
+    def test_http(self):
+        server = self._serve(port=0, http=True)
+        connection = http.client.HTTPConnection(*server.server_address)
+        self.addCleanup(connection.close)
+        for document in DOCUMENTS:
+            body = json.dumps(
+                {
+                    "id": 7,
+                    "method": "detect_abuse",
+                    "params": {"document": document},
+                }
+            )
+            connection.request("POST", "/", body=body)
+            response = json.loads(connection.getresponse().read())
+            self.assertEqual(
+                response,
+                {"id": 7, "result": self.red_flagger.detect_abuse(document)},
+            )
+
+    def test_handle_request_errors(self):
+        for line in (
+            b"not json",
+            b"[1, 2]",
+            b'{"id": 1, "method": "redact"}',
+            b'{"id": 1, "method": "detect_abuse", "params": {"doc": "x"}}',
+            b'{"id": 1, "method": "get_abuse_vector",'
+            b' "params": {"document": "x", "output": "numpy"}}',
+            b'{"id": 1, "method": "detect_abuse", "params": {"document": 1}}',
+            b'{"id": 1, "method": "detect_abuse",'
+            b' "params": {"document": "x", "return_words": "no"}}',
+            b'{"id": 1, "method": "detect_abuse_many",'
+            b' "params": {"documents": "xy"}}',
+            b'{"id": 1, "method": "detect_abuse_many",'
+            b' "params": {"documents": ["x", null]}}',
+            b'{"id": 1, "method": "get_abuse_vector",'
+            b' "params": {"document": ["x"]}}',
+        ):
+            response = json.loads(handle_request(self.red_flagger, line))
+            self.assertIn("error", response)
+
+    def test_internal_errors(self):
+        class Broken:
+            def detect_abuse(self, document, return_words):
+                raise RuntimeError("broken")
+
+        line = (
+            b'{"id": 3, "method": "detect_abuse", "params": {"document": ""}}'
+        )
+        response = json.loads(handle_request(Broken(), line))
+        self.assertEqual(response["id"], 3)
+        self.assertIn("RuntimeError", response["error"])
+
+    def test_pipelined_errors(self):
+        server = self._serve()
+        with socket.create_connection(server.server_address) as connection:
+            lines = [
+                {"id": 1, "method": "detect_abuse", "params": {"document": 1}},
+                {
+                    "id": 2,
+                    "method": "detect_abuse_many",
+                    "params": {"documents": [None]},
+                },
+                {
+                    "id": 3,
+                    "method": "detect_abuse",
+                    "params": {"document": DOCUMENTS[1]},
+                },
+            ]
+            connection.sendall(
+                b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+            )
+            reader = connection.makefile("rb")
+            responses = [json.loads(reader.readline()) for _ in lines]
+        self.assertEqual([r["id"] for r in responses], [1, 2, 3])
+        self.assertIn("error", responses[0])
+        self.assertIn("error", responses[1])
+        self.assertEqual(
+            responses[2]["result"],
+            self.red_flagger.detect_abuse(DOCUMENTS[1]),
+        )
@@ -0,0 +1,123 @@
+"""Tests RedFlaggers attached to shared matcher tables."""
+
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from rfwc import RedFlagger
+from rfwc.shared import attach_shared_memory, share_tables, write_tables
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestShared(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.red_flagger = RedFlagger(use_cache=False)
+        cls.tables = cls.red_flagger.get_shared_tables()
+        cls.documents = [
+            "",
+            "This is a clean sentence.",
+            "You are an idiot, a stupid IDIOT.",
+        ] + cls.red_flagger.get_wordlist()[::50]
+
+    def _check_parity(self, shared):
+        self.assertEqual(
+            shared.get_wordlist(), self.red_flagger.get_wordlist()
+        )
+        for document in self.documents:
+            self.assertEqual(
+                shared.detect_abuse(document),
+                self.red_flagger.detect_abuse(document),
+            )
+            self.assertEqual(
+                shared.detect_abuse(document, return_words=False),
+                self.red_flagger.detect_abuse(document, return_words=False),
+            )
+            self.assertEqual(
+                shared.get_abuse_vector(document, "sparse"),
+                self.red_flagger.get_abuse_vector(document, "sparse"),
+            )
+
+    def test_shared_memory(self):
+        memory = share_tables(self.tables)
+        try:
+            shared = RedFlagger.from_shared(name=memory.name)
+            self._check_parity(shared)
+            # Pickled copies, as sent to scan_parallel workers, get their
+            # own tables.
+            self._check_parity(pickle.loads(pickle.dumps(shared)))
+            del shared
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def test_other_process_leaves_block(self):
+        # A process attaching on its own, which has a resource tracker of
+        # its own, doesn't unlink the block when it exits.
+        memory = share_tables(b"RFWT")
+        try:
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys\n"
+                    "from rfwc.shared import attach_shared_memory\n"
+                    "memory = attach_shared_memory(sys.argv[1])\n"
+                    "assert bytes(memory.buf[:4]) == b'RFWT'\n"
+                    "memory.close()\n"
+                    # Waits for the tracker to clean up, if there is one.
+                    "from multiprocessing import resource_tracker\n"
+                    "tracker = resource_tracker._resource_tracker\n"
+                    "if tracker._fd is not None:\n"
+                    "    import os\n"
+                    "    os.close(tracker._fd)\n"
+                    "    os.waitpid(tracker._pid, 0)\n",
+                    memory.name,
+                ],
+                cwd=ROOT,
+                check=True,
+            )
+            attached = attach_shared_memory(memory.name)
+            self.assertEqual(bytes(attached.buf[:4]), b"RFWT")
+            attached.close()
+        finally:
+            memory.close()
+            memory.unlink()
+
+    def test_mapped_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "tables.rfwt")
+            write_tables(path, self.tables)
+            shared = RedFlagger.from_shared(path=path)
+            self._check_parity(shared)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_edits_build_a_private_matcher(self):
+        shared = RedFlagger.from_shared(buffer=self.tables)
+        self._check_parity(shared)
+        shared.add_words(["prosciutto"])
+        self.assertEqual(shared.detect_abuse("prosciutto!"), ["prosciutto"])
+        self.assertEqual(
+            shared.get_abuse_vector("prosciutto")[
+                shared.get_wordlist().index("prosciutto")
+            ],
+            1,
+        )
+        shared.remove_words(["prosciutto"])
+        self.assertEqual(shared.detect_abuse("prosciutto!"), [])
+        # The shared tables are unchanged.
+        self._check_parity(RedFlagger.from_shared(buffer=self.tables))
+
+    def test_one_source(self):
+        with self.assertRaises(ValueError):
+            RedFlagger.from_shared()
+        with self.assertRaises(ValueError):
+            RedFlagger.from_shared(name="rfwc", buffer=self.tables)
@@ -1,10 +1,34 @@
 """Tests the util functions which are critical to the lib."""
 
+import random
+import re
 import unittest
 
 from rfwc.utils import filter_overlaps_and_sort
 
 
+def pairwise_filter_overlaps_and_sort(word_list: list[str]) -> list[str]:
+    """The original quadratic implementation, kept as a reference."""
+    split_word_list = sorted([x.split() for x in word_list], key=len)
+    sorted_word_list = [" ".join(word) for word in split_word_list]
+    bad_indices: set[int] = set()
+    for i in range(len(sorted_word_list)):
+        for j in range(i + 1, len(sorted_word_list)):
+            if sorted_word_list[i] == sorted_word_list[j]:
+                bad_indices.add(j)
+            elif re.search(
+                rf"\b{re.escape(sorted_word_list[i])}\b",
+                sorted_word_list[j],
+                flags=re.IGNORECASE,
+            ):
+                bad_indices.add(j)
+    return [
+        phrase
+        for i, phrase in enumerate(sorted_word_list)
+        if i not in bad_indices
+    ]
+
+
 class TestUtils(unittest.TestCase):
 
     def setUp(self):
@@ -39,3 +63,42 @@ class TestUtils(unittest.TestCase):
         ]
         actual_result = filter_overlaps_and_sort(self.wordlist)
         self.assertEqual(expected_result, actual_result)
+
+    def test_filter_overlaps_and_sort_parity(self):
+        """Compares against the pairwise implementation on random phrases
+        mixing casing, punctuation and repeated words."""
+        rng = random.Random(0)
+        vocab = [
+            "cat",
+            "Cat",
+            "cats",
+            "on-foot",
+            "on",
+            "foot",
+            "@home",
+            "@Home",
+            "home",
+            "snake_case",
+            "big",
+            "Ben",
+            "it's",
+        ]
+        word_list = [
+            "  ".join(rng.choices(vocab, k=rng.randint(1, 4)))
+            for _ in range(300)
+        ]
+        for size in (0, 1, 10, 50, len(word_list)):
+            self.assertEqual(
+                filter_overlaps_and_sort(word_list[:size]),
+                pairwise_filter_overlaps_and_sort(word_list[:size]),
+            )
+        # Empty phrases behave like \b\b in the pairwise implementation.
+        with_empty = word_list[:20] + ["", "   ", "!!"]
+        self.assertEqual(
+            filter_overlaps_and_sort(with_empty),
+            pairwise_filter_overlaps_and_sort(with_empty),
+        )
+        self.assertEqual(
+            filter_overlaps_and_sort(self.wordlist),
+            pairwise_filter_overlaps_and_sort(self.wordlist),
+        )
@@ -0,0 +1,76 @@
+"""Tests that incremental edits of the wordlist match a full refilter."""
+
+import random
+import unittest
+
+from rfwc.utils import filter_overlaps_and_sort
+from rfwc.word_index import WordIndex
+
+
+class TestWordIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.vocab = [
+            "cat",
+            "Cat",
+            "cats",
+            "on-foot",
+            "on",
+            "foot",
+            "@home",
+            "@Home",
+            "home",
+            "big",
+            "Ben",
+            "it's",
+            "!!",
+        ]
+
+    def _check(self, index: WordIndex, expected: list[str]) -> None:
+        lexicon = index.lexicon
+        self.assertEqual(lexicon.words(), expected)
+        self.assertEqual(list(map(lexicon.word, lexicon.ids)), expected)
+        positions = index.positions()
+        self.assertEqual(
+            [positions[word_id] for word_id in lexicon.ids],
+            list(range(len(expected))),
+        )
+        for word_id, word in zip(lexicon.ids, expected):
+            self.assertEqual(lexicon.find(word), word_id)
+
+    def test_add_and_remove_parity(self):
+        rng = random.Random(0)
+        expected: list[str] = []
+        index = WordIndex(expected)
+        for _ in range(300):
+            if rng.random() < 0.7:
+                words = [
+                    " ".join(rng.choices(self.vocab, k=rng.randint(1, 3)))
+                    for _ in range(rng.randint(1, 4))
+                ]
+                expected = filter_overlaps_and_sort(expected + words)
+                changes = index.add(words)
+                added, removed = changes
+                self.assertTrue(set(w for _, w in added) <= set(expected))
+            else:
+                words = rng.sample(expected, min(len(expected), 3)) + [
+                    "not there"
+                ]
+                expected = [w for w in expected if w not in words]
+                removed = index.remove(words)
+                self.assertEqual(
+                    sorted(w for _, w in removed), sorted(set(words[:-1]))
+                )
+            self._check(index, expected)
+
+    def test_add_removes_entries(self):
+        index = WordIndex(["clocktower", "big ben", "the big ben clock"])
+        added, removed = index.add(["ben", "Clocktower", "big ben"])
+        self.assertEqual(added, [(3, "ben")])
+        self.assertEqual(removed, [(1, "big ben"), (2, "the big ben clock")])
+        self._check(index, ["clocktower", "ben"])
+
+    def test_empty_phrase_refilters(self):
+        index = WordIndex(["cat", "big ben", "!!"])
+        self.assertIsNone(index.add(["   "]))
+        self._check(index, ["", "!!"])